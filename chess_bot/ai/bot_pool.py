@@ -0,0 +1,195 @@
+"""
+Bot Pool - per-game bot instances in least-recently-used order, bounded by
+count and estimated memory. Bots of finished or evicted games are reset and
+kept on a free list, since building a bot (transposition table, opening book)
+is far more expensive than clearing one. Bots handed out with use_bot are
+pinned until released, so a search never loses its bot to another game.
+"""
+
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, List
+
+from .engine.bot import Bot
+
+
+# Think time configuration by difficulty: (max_think_time_ms, use_max_think_time)
+DIFFICULTY_SETTINGS = {
+    'easy': (500, True),
+    'medium': (2000, True),
+    'hard': (5000, False),
+}
+
+
+class BotPool:
+    """Pool of bot instances for handling multiple games"""
+    
+    def __init__(self, max_bots: int = 100, max_bytes: int = 2048 * 1024 * 1024,
+                 idle_timeout: int = 3600, max_free: int = 4,
+                 bot_factory: Callable[[], Bot] = Bot):
+        self.bots: 'OrderedDict[str, Bot]' = OrderedDict()  # Least recently used first
+        self.last_used: Dict[str, float] = {}
+        self.free_bots: List[Bot] = []
+        self.in_use: Dict[int, int] = {}  # id(bot) -> callers holding it
+        self.lock = Lock()
+        
+        self.max_bots = max_bots        # Maximum concurrent games
+        self.max_bytes = max_bytes      # Estimated memory budget for all bots
+        self.idle_timeout = idle_timeout
+        self.max_free = max_free        # Reset bots kept for reuse
+        self.bot_factory = bot_factory
+        
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.recycled = 0
+        self.created = 0
+    
+    @contextmanager
+    def use_bot(self, game_id: str, difficulty: str = 'medium'):
+        """Bot for a game, pinned (never evicted or recycled) until the block exits"""
+        bot = self.get_bot(game_id, difficulty, pin=True)
+        try:
+            yield bot
+        finally:
+            self.unpin(bot)
+    
+    def get_bot(self, game_id: str, difficulty: str = 'medium', pin: bool = False) -> Bot:
+        """Get or create bot for game (pinned if asked; the caller then unpins it)"""
+        with self.lock:
+            bot = self.bots.get(game_id)
+            if bot is not None:
+                self.hits += 1
+                self.bots.move_to_end(game_id)
+                self.last_used[game_id] = time.time()
+                if pin:
+                    self._pin(bot)
+                return bot
+            
+            self.misses += 1
+            self._evict_idle()
+            self._evict_to_fit(self.max_bots - 1)
+            bot = self.free_bots.pop() if self.free_bots else None
+            if bot is not None:
+                self.recycled += 1
+            else:
+                self.created += 1
+        
+        # Reset or build outside the lock so other games are not blocked
+        if bot is not None:
+            bot.reset()
+        else:
+            bot = self.bot_factory()
+        
+        max_think_time_ms, use_max_think_time = DIFFICULTY_SETTINGS.get(
+            difficulty, DIFFICULTY_SETTINGS['medium']
+        )
+        bot.max_think_time_ms = max_think_time_ms
+        bot.use_max_think_time = use_max_think_time
+        
+        with self.lock:
+            # Another request may have created one meanwhile
+            existing = self.bots.get(game_id)
+            if existing is not None:
+                self._release(bot)
+                bot = existing
+            else:
+                self.bots[game_id] = bot
+                self.last_used[game_id] = time.time()
+            if pin:
+                self._pin(bot)
+        
+        return bot
+    
+    def unpin(self, bot: Bot):
+        """Give back a pinned bot; one evicted or removed meanwhile is recycled now"""
+        with self.lock:
+            count = self.in_use.pop(id(bot)) - 1
+            if count:
+                self.in_use[id(bot)] = count
+            elif not any(pooled is bot for pooled in self.bots.values()):
+                self._release(bot)
+    
+    def remove_bot(self, game_id: str):
+        """Remove bot from pool (game deleted or session expired)"""
+        with self.lock:
+            bot = self.bots.pop(game_id, None)
+            self.last_used.pop(game_id, None)
+            if bot is not None:
+                self._release(bot)
+    
+    def prewarm(self, count: int) -> int:
+        """Build bots ahead of time onto the free list; returns bots added"""
+        added = 0
+        while added < count:
+            with self.lock:
+                if len(self.free_bots) >= self.max_free:
+                    break
+            bot = self.bot_factory()
+            with self.lock:
+                self.free_bots.append(bot)
+                self.created += 1
+            added += 1
+        return added
+    
+    def get_bot_count(self) -> int:
+        with self.lock:
+            return len(self.bots)
+    
+    def estimated_bytes(self) -> int:
+        with self.lock:
+            return self._estimated_bytes()
+    
+    def get_stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'bots': len(self.bots),
+                'free_bots': len(self.free_bots),
+                'estimated_mb': round(self._estimated_bytes() / (1024 * 1024), 1),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'recycled': self.recycled,
+                'created': self.created,
+            }
+    
+    def _estimated_bytes(self) -> int:
+        return sum(bot.estimated_bytes() for bot in self.bots.values())
+    
+    def _evict_idle(self):
+        """Evict bots unused for longer than idle_timeout (caller holds lock)"""
+        cutoff = time.time() - self.idle_timeout
+        for game_id in list(self.bots):
+            if self.last_used[game_id] >= cutoff:
+                break  # LRU order: everything after is more recent
+            self._evict(game_id)
+    
+    def _evict_to_fit(self, max_bots: int):
+        """Evict least recently used bots until within limits (caller holds lock)"""
+        for game_id in list(self.bots):
+            if len(self.bots) <= max_bots and self._estimated_bytes() <= self.max_bytes:
+                break
+            self._evict(game_id)
+    
+    def _pin(self, bot: Bot):
+        self.in_use[id(bot)] = self.in_use.get(id(bot), 0) + 1
+    
+    def _evict(self, game_id: str):
+        bot = self.bots[game_id]
+        if id(bot) in self.in_use:
+            return  # Never take a bot away from a caller still using it
+        
+        del self.bots[game_id]
+        del self.last_used[game_id]
+        self.evictions += 1
+        self._release(bot)
+    
+    def _release(self, bot: Bot):
+        """Keep a bot for reuse if the free list has room (caller holds lock)"""
+        if len(self.free_bots) < self.max_free and id(bot) not in self.in_use:
+            self.free_bots.append(bot)
@@ -0,0 +1,173 @@
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from threading import Lock
+from typing import List, Optional
+
+
+class AnalysisResult:
+    """Outcome of a finished search for one position"""
+    
+    def __init__(self, best_move: str, evaluation: int, depth: int,
+                 pv: List[str] = None, nodes: int = 0, budget_ms: int = 0):
+        self.best_move = best_move  # UCI
+        self.evaluation = evaluation
+        self.depth = depth
+        self.pv = pv or [best_move]
+        self.nodes = nodes
+        self.budget_ms = budget_ms
+    
+    def to_dict(self) -> dict:
+        return {
+            'best_move': self.best_move,
+            'evaluation': self.evaluation,
+            'depth': self.depth,
+            'pv': self.pv,
+            'nodes': self.nodes,
+            'budget_ms': self.budget_ms,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'AnalysisResult':
+        return cls(**data)
+
+
+class AnalysisCache:
+    """
+    Search results shared by all games, keyed by (zobrist key, think budget).
+    
+    Depth-sufficiency rule: a request with a given budget is answered by a
+    result searched with at least that budget, or by any result that reached
+    the requested minimum depth.
+    
+    Recent results live in an in-memory LRU; with a disk path, results are
+    also written to SQLite so they survive restarts and are shared between
+    worker processes on one host.
+    """
+    
+    def __init__(self, max_entries: int = 50000, disk_path: Optional[str] = None):
+        self.entries: 'OrderedDict[tuple, AnalysisResult]' = OrderedDict()
+        self.budgets = set()
+        self.max_entries = max_entries
+        self.lock = Lock()
+        
+        self.disk_path = disk_path
+        self.local = threading.local()
+        if disk_path:
+            with self._connection() as conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS analysis ('
+                    ' zobrist_key TEXT NOT NULL,'
+                    ' budget_ms INTEGER NOT NULL,'
+                    ' result TEXT NOT NULL,'
+                    ' PRIMARY KEY (zobrist_key, budget_ms))'
+                )
+        
+        # Statistics
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+    
+    def lookup(self, zobrist_key: int, budget_ms: int,
+               min_depth: Optional[int] = None) -> Optional[AnalysisResult]:
+        """Best usable result for the position, or None"""
+        with self.lock:
+            result = self._lookup_memory(zobrist_key, budget_ms, min_depth)
+            if result:
+                self.hits += 1
+                return result
+        
+        result = self._lookup_disk(zobrist_key, budget_ms, min_depth)
+        
+        with self.lock:
+            if result:
+                self.disk_hits += 1
+                self._put(zobrist_key, result)
+            else:
+                self.misses += 1
+        return result
+    
+    def store(self, zobrist_key: int, result: AnalysisResult):
+        """Remember a finished search, keeping the deeper of two results"""
+        with self.lock:
+            existing = self.entries.get((zobrist_key, result.budget_ms))
+            if existing and existing.depth > result.depth:
+                return
+            self._put(zobrist_key, result)
+        
+        if self.disk_path:
+            with self._connection() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO analysis (zobrist_key, budget_ms, result)'
+                    ' VALUES (?, ?, ?)',
+                    (self._disk_key(zobrist_key), result.budget_ms, json.dumps(result.to_dict()))
+                )
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.budgets.clear()
+    
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'disk': bool(self.disk_path),
+            }
+    
+    def _lookup_memory(self, zobrist_key, budget_ms, min_depth):
+        """Search the LRU (caller holds lock)"""
+        for budget in sorted(self.budgets):
+            result = self.entries.get((zobrist_key, budget))
+            if result and self._is_sufficient(result, budget_ms, min_depth):
+                self.entries.move_to_end((zobrist_key, budget))
+                return result
+        return None
+    
+    def _lookup_disk(self, zobrist_key, budget_ms, min_depth):
+        if not self.disk_path:
+            return None
+        
+        rows = self._connection().execute(
+            'SELECT result FROM analysis WHERE zobrist_key = ? ORDER BY budget_ms',
+            (self._disk_key(zobrist_key),)
+        ).fetchall()
+        for (data,) in rows:
+            result = AnalysisResult.from_dict(json.loads(data))
+            if self._is_sufficient(result, budget_ms, min_depth):
+                return result
+        return None
+    
+    @staticmethod
+    def _is_sufficient(result, budget_ms, min_depth):
+        if result.budget_ms >= budget_ms:
+            return True
+        return min_depth is not None and result.depth >= min_depth
+    
+    def _put(self, zobrist_key, result):
+        """Insert into the LRU (caller holds lock)"""
+        key = (zobrist_key, result.budget_ms)
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        self.budgets.add(result.budget_ms)
+        
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.disk_path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self.local.conn = conn
+        return conn
+    
+    @staticmethod
+    def _disk_key(zobrist_key):
+        # Zobrist keys are unsigned 64-bit, beyond SQLite's signed INTEGER
+        return format(zobrist_key, '016x')
@@ -1,5 +1,13 @@
 import os
 from pathlib import Path
+from threading import Lock
+
+from chess_core.packed_position import position_key
+
+
+# Parsed book shared by every bot in the process; never modified once loaded
+_book_cache = {}
+_book_lock = Lock()
 
 def parse_book_txt(file_path):
     """
@@ -9,7 +17,9 @@ def parse_book_txt(file_path):
     <move> <count>
     ...
     
-    Returns: {simplified_fen: [(move_uci, count), ...], ...}
+    Returns: {position_key: [(move_uci, count), ...], ...}
+    Positions are keyed by their packed form (see packed_position), which is
+    smaller than the FEN and lets bots look up a Board without building a FEN.
     """
     book_data = {}
     current_fen = None
@@ -23,7 +33,7 @@ def parse_book_txt(file_path):
                     
                 if line.startswith('pos '):
                     # Extract FEN (remove "pos " prefix)
-                    current_fen = line[4:].strip()
+                    current_fen = position_key(line[4:].strip())
                     book_data[current_fen] = []
                 elif current_fen:
                     # Parse move and count
@@ -43,12 +53,21 @@ def parse_book_txt(file_path):
 
 
 def load_opening_book():
-    """Load opening book from book.txt"""
+    """Load opening book from book.txt (parsed once per process)"""
+    with _book_lock:
+        if 'data' not in _book_cache:
+            _book_cache['data'] = _read_opening_book()
+        return _book_cache['data']
+
+
+def _read_opening_book():
+    """Find and parse the opening book file"""
     # Try multiple possible locations
     base_dir = Path(__file__).resolve().parent.parent.parent
     
     possible_paths = [
         base_dir / 'assets' / 'book.txt',
+        base_dir / 'assets' / 'Book.txt',
         base_dir / 'ai' / 'resources' / 'book.txt',
         base_dir / 'book.txt',
         Path(__file__).parent / 'book.txt',
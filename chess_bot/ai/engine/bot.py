@@ -1,15 +1,17 @@
-from .board import Board
+from chess_core.board import Board
 from .searcher import Searcher
-from .move import Move
+from chess_core.move import Move
 from .opening_book import OpeningBook
 from .book_loader import load_opening_book
+from .cancellation import CancellationToken
+from .analysis_cache import AnalysisCache, AnalysisResult
 import time
 
 """
 Improved Bot with opening book support and better configuration.
 """
 class Bot:  
-    def __init__(self, use_opening_book=True):
+    def __init__(self, use_opening_book=True, analysis_cache: AnalysisCache = None):
         """Initialize bot"""
         self.board = Board()
         self.searcher = Searcher(self.board)
@@ -21,6 +23,9 @@ class Bot:
         else:
             self.opening_book = None
         
+        # Results of earlier searches, shared with other bots
+        self.analysis_cache = analysis_cache
+        
         # Configuration
         self.use_max_think_time = False
         self.max_think_time_ms = 2500
@@ -29,15 +34,32 @@ class Bot:
         # State
         self.is_thinking = False
         self.latest_move_is_book_move = False
+        self.latest_move_is_cached = False
+        self.latest_analysis = None  # AnalysisResult of the last search or cache hit
     
     def notify_new_game(self):
         """Notify bot of new game"""
         self.searcher.clear_for_new_position()
         self.latest_move_is_book_move = False
     
-    def set_position(self, fen: str):
-        """Set board position from FEN"""
-        self.board = Board(fen)
+    def reset(self):
+        """Return bot to a fresh state so it can be reused for another game"""
+        self.notify_new_game()
+        self.set_position(Board.START_FEN)
+        self.searcher.stop_requested = False
+        self.searcher.on_iteration_complete = None
+        self.use_max_think_time = False
+        self.max_think_time_ms = 2500
+        self.is_thinking = False
+    
+    def estimated_bytes(self) -> int:
+        """Rough memory footprint, dominated by the transposition table"""
+        return (self.searcher.transposition_table.memory_bytes()
+                + self.searcher.move_ordering.memory_bytes())
+    
+    def set_position(self, position):
+        """Set board position from a FEN string or packed position"""
+        self.board = Board.from_packed(position) if isinstance(position, bytes) else Board(position)
         self.searcher.board = self.board
     
     def make_move(self, move_string: str):
@@ -67,12 +89,33 @@ class Bot:
         min_think_time = min(50, my_time_remaining_ms * 0.25)
         return int(max(min_think_time, think_time_ms))
     
-    def think_timed(self, time_ms: int) -> tuple:
+    def think_timed(self, time_ms: int, progress_callback=None,
+                    cancel_token: CancellationToken = None, deadline: float = None) -> tuple:
         """
         Main thinking function.
+        progress_callback: optional callable(depth, best_move_uci, evaluation, nodes)
+        invoked after every completed search iteration.
+        cancel_token: aborts the search when cancelled (result should be discarded)
+        deadline: absolute time.time() by which the search must finish
         Returns: (best_move_uci, evaluation, nodes_searched)
         """
+        steps = self.think_steps(time_ms, progress_callback, cancel_token, deadline)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+    
+    def think_steps(self, time_ms: int, progress_callback=None,
+                    cancel_token: CancellationToken = None, deadline: float = None,
+                    slice_nodes: int = None):
+        """
+        Resumable think_timed: a generator pausing every `slice_nodes` search
+        nodes (see Searcher.search_steps) that returns think_timed's result.
+        """
         self.latest_move_is_book_move = False
+        self.latest_move_is_cached = False
+        self.latest_analysis = None
         self.is_thinking = True
         
         # Try opening book first
@@ -83,16 +126,52 @@ class Bot:
                 self.is_thinking = False
                 return book_move, 0, 0
         
+        # Reuse a search of this position made by any game
+        if self.analysis_cache:
+            cached = self.analysis_cache.lookup(self.board.zobrist_key, time_ms)
+            if cached:
+                self.latest_move_is_cached = True
+                self.latest_analysis = cached
+                self.is_thinking = False
+                if progress_callback:
+                    progress_callback(cached.depth, cached.best_move, cached.evaluation, 0)
+                return cached.best_move, cached.evaluation, 0
+        
         # Run search
-        best_move, evaluation, nodes = self.searcher.start_search(time_ms)
+        if progress_callback:
+            self.searcher.on_iteration_complete = (
+                lambda depth, move, evaluation, nodes: progress_callback(
+                    depth, move.to_uci() if move else None, evaluation, nodes
+                )
+            )
+        try:
+            best_move, evaluation, nodes = yield from self.searcher.search_steps(
+                time_ms, cancel_token=cancel_token, deadline=deadline, slice_nodes=slice_nodes
+            )
+        finally:
+            self.searcher.on_iteration_complete = None
+            self.is_thinking = False
         
-        self.is_thinking = False
+        if best_move and self.searcher.current_depth > 0:
+            pv = self.searcher.get_principal_variation(self.searcher.current_depth)
+            self.latest_analysis = AnalysisResult(
+                best_move.to_uci(), evaluation, self.searcher.current_depth,
+                [move.to_uci() for move in pv] if pv and pv[0].value == best_move.value else None,
+                nodes, time_ms
+            )
+            # Only complete searches are good enough to answer later requests
+            if self.analysis_cache and self.searcher.used_full_budget():
+                self.analysis_cache.store(self.board.zobrist_key, self.latest_analysis)
         
         if best_move:
             return best_move.to_uci(), evaluation, nodes
         else:
             return None, 0, 0
     
+    def stop_thinking(self):
+        """Make the current search return its best move so far"""
+        self.searcher.request_stop()
+    
     def get_board_fen(self) -> str:
         """Get current board FEN"""
         return self.board.to_fen()
@@ -141,7 +220,7 @@ def get_bot_move(request):
 def validate_move(request):
     """Legacy endpoint - validate move"""
     from django.http import JsonResponse
-    from .move_generator import MoveGenerator
+    from chess_core.move_generator import MoveGenerator
     import json
     
     try:
@@ -0,0 +1,23 @@
+from threading import Event
+
+
+class CancellationToken:
+    """
+    Thread-safe flag for aborting a search from outside the searching thread.
+    Unlike Searcher.request_stop(), a cancelled search stops immediately and
+    its result should be discarded.
+    """
+
+    def __init__(self):
+        self._event = Event()
+        self.reason = None
+
+    def cancel(self, reason: str = 'cancelled'):
+        """Cancel the search (first reason wins)"""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
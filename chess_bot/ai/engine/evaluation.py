@@ -1,4 +1,4 @@
-from .piece import Piece
+from chess_core.piece import Piece
 
 
 class Evaluation:
@@ -3,7 +3,10 @@ Move Ordering for better alpha-beta pruning.
 Based on Chess-Coding-Adventure/src/Core/Search/MoveOrdering.cs
 """
 
-from .piece import Piece
+from array import array
+
+from chess_core.piece import Piece
+
 
 class MoveOrdering:
     """Orders moves to improve alpha-beta search efficiency"""
@@ -13,6 +16,7 @@ class MoveOrdering:
     WINNING_CAPTURE_BIAS = 8_000_000
     PROMOTE_BIAS = 6_000_000
     KILLER_BIAS = 4_000_000
+    COUNTER_MOVE_BIAS = 3_000_000
     LOSING_CAPTURE_BIAS = 2_000_000
     REGULAR_BIAS = 0
     
@@ -30,102 +34,228 @@ class MoveOrdering:
     
     def __init__(self):
         """Initialize move ordering"""
-        self.killer_moves = [[None, None] for _ in range(self.MAX_KILLER_MOVE_PLY)]
-        # History[color][from_square][to_square]
-        self.history = [[[0 for _ in range(64)] for _ in range(64)] for _ in range(2)]
+        # Killer move values per ply (0 = none)
+        self.killer_moves = [[0, 0] for _ in range(self.MAX_KILLER_MOVE_PLY)]
+        
+        # Flat tables (see HISTORY_SIZE and continuation_key)
+        self.history = array('h', bytes(2 * HISTORY_SIZE))                  # [color][to][from]
+        self.continuation_history = array('h', bytes(2 * CONTINUATION_SIZE))  # [previous key][key]
+        self.counter_moves = array('H', bytes(2 * NUM_CONTINUATION_KEYS))     # [previous key] -> move
     
     def clear_history(self):
-        """Clear history heuristic"""
-        self.history = [[[0 for _ in range(64)] for _ in range(64)] for _ in range(2)]
+        """Clear history, continuation history and counter-move tables"""
+        self.history = array('h', bytes(2 * HISTORY_SIZE))
+        self.continuation_history = array('h', bytes(2 * CONTINUATION_SIZE))
+        self.counter_moves = array('H', bytes(2 * NUM_CONTINUATION_KEYS))
     
     def clear_killers(self):
         """Clear killer moves"""
-        self.killer_moves = [[None, None] for _ in range(self.MAX_KILLER_MOVE_PLY)]
+        self.killer_moves = [[0, 0] for _ in range(self.MAX_KILLER_MOVE_PLY)]
     
     def clear(self):
         """Clear all move ordering data"""
         self.clear_history()
         self.clear_killers()
     
+    def age_history(self):
+        """
+        Halve the from/to history before a new search, so statistics from
+        earlier moves of the game fade instead of dominating. Continuation
+        history is kept bounded by gravity alone (halving it would cost more
+        than a shallow search).
+        """
+        history = self.history
+        for index in range(HISTORY_SIZE):
+            if history[index]:
+                history[index] //= 2
+    
+    def memory_bytes(self):
+        """Memory held by the ordering tables"""
+        return (self.history.itemsize * len(self.history)
+                + self.continuation_history.itemsize * len(self.continuation_history)
+                + self.counter_moves.itemsize * len(self.counter_moves))
+    
     def add_killer_move(self, move, ply):
-        """Add a killer move at given ply"""
+        """Add a killer move (16-bit move value) at given ply"""
         if ply < self.MAX_KILLER_MOVE_PLY:
-            if self.killer_moves[ply][0] != move:
-                self.killer_moves[ply][1] = self.killer_moves[ply][0]
-                self.killer_moves[ply][0] = move
+            killers = self.killer_moves[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
     
     def is_killer_move(self, move, ply):
-        """Check if move is a killer move"""
+        """Check if move (16-bit move value) is a killer move"""
         if ply >= self.MAX_KILLER_MOVE_PLY:
             return False
-        return (move == self.killer_moves[ply][0] or 
-                move == self.killer_moves[ply][1])
+        return move == self.killer_moves[ply][0] or move == self.killer_moves[ply][1]
     
     def order_moves(self, moves, board, hash_move, ply_from_root):
         """
-        Order moves for better alpha-beta search.
-        Returns list of (move, score) tuples sorted by score (highest first).
+        Order Move objects for better alpha-beta search (highest score first).
         """
-        move_scores = []
-        
-        for move in moves:
-            score = self._score_move(move, board, hash_move, ply_from_root)
-            move_scores.append((move, score))
-        
-        # Sort by score (descending)
-        move_scores.sort(key=lambda x: x[1], reverse=True)
-        return [move for move, score in move_scores]
-    
-    def _score_move(self, move, board, hash_move, ply_from_root):
-        """Score a single move"""
-        # Hash move gets highest priority
-        if hash_move and move.value == hash_move.value:
-            return self.HASH_MOVE_SCORE
+        moves_by_value = {move.value: move for move in moves}
+        ordered = self.order_move_values(
+            [move.value for move in moves], len(moves), board,
+            hash_move.value if hash_move else 0, ply_from_root
+        )
+        return [moves_by_value[value] for value in ordered]
+    
+    def order_move_values(self, buffer, count, board, hash_move, ply_from_root,
+                          previous_key=-1, previous_key_2=-1):
+        """
+        Order the first `count` move values of buffer (highest score first).
+        previous_key / previous_key_2: continuation keys of the moves one and
+        two plies back (-1 if none), for counter moves and continuation history.
         
-        score = 0
-        start_square = move.start_square
-        target_square = move.target_square
+        Score, generation order (for ties) and move are packed into one int
+        per move, so ordering is a single in-place sort without tuples or key
+        functions. Returns a new list of move values.
+        """
+        square = board.square
+        history = self.history
+        color_offset = 0 if board.white_to_move else 4096
+        piece_values = PIECE_VALUES
+        piece_index = PIECE_INDEX
         
-        moved_piece = board.square[start_square]
-        moved_piece_type = Piece.piece_type(moved_piece)
-        captured_piece = board.square[target_square]
-        captured_piece_type = Piece.piece_type(captured_piece)
+        if ply_from_root < self.MAX_KILLER_MOVE_PLY:
+            killer_1, killer_2 = self.killer_moves[ply_from_root]
+        else:
+            killer_1 = killer_2 = -1
         
-        is_capture = captured_piece != 0
+        # Continuation history rows for the previous two moves
+        continuation = self.continuation_history
+        row_1 = previous_key * NUM_CONTINUATION_KEYS if previous_key >= 0 else -1
+        row_2 = previous_key_2 * NUM_CONTINUATION_KEYS if previous_key_2 >= 0 else -1
+        counter_move = self.counter_moves[previous_key] if previous_key >= 0 else -1
         
-        # Captures
-        if is_capture:
-            # MVV-LVA (Most Valuable Victim - Least Valuable Attacker)
-            moved_value = self.PIECE_VALUES.get(moved_piece_type, 0)
-            captured_value = self.PIECE_VALUES.get(captured_piece_type, 0)
-            capture_delta = captured_value - moved_value
+        keys = []
+        for index in range(count):
+            move = buffer[index]
+            if move == hash_move:
+                keys.append((self.HASH_MOVE_SCORE << 24) | move)
+                continue
             
-            # Good captures (winning material or equal)
-            if capture_delta >= 0:
-                score = self.WINNING_CAPTURE_BIAS + capture_delta
-            else:
-                score = self.LOSING_CAPTURE_BIAS + capture_delta
-        
-        # Promotions
-        if move.is_promotion:
-            score = self.PROMOTE_BIAS
-        
-        # Quiet moves
-        if not is_capture:
-            # Killer moves
-            if self.is_killer_move(move, ply_from_root):
-                score = self.KILLER_BIAS
+            start_square = move & 0x3F
+            target_square = (move >> 6) & 0x3F
+            captured_piece = square[target_square]
+            
+            # Captures: MVV-LVA (Most Valuable Victim - Least Valuable Attacker)
+            if captured_piece:
+                capture_delta = piece_values[captured_piece & 0b0111] - piece_values[square[start_square] & 0b0111]
+                if move >> 12 >= 4:  # Capturing promotion
+                    score = self.PROMOTE_BIAS
+                elif capture_delta >= 0:
+                    score = self.WINNING_CAPTURE_BIAS + capture_delta
+                else:
+                    score = self.LOSING_CAPTURE_BIAS + capture_delta
+            
+            # Quiet moves: killers, counter move, then history
             else:
-                score = self.REGULAR_BIAS
+                if move == killer_1 or move == killer_2:
+                    score = self.KILLER_BIAS
+                elif move == counter_move:
+                    score = self.COUNTER_MOVE_BIAS
+                else:
+                    score = self.REGULAR_BIAS
+                
+                score += history[color_offset + (move & 0xFFF)]
+                key = piece_index[square[start_square]] * 64 + target_square
+                if row_1 >= 0:
+                    score += continuation[row_1 + key]
+                if row_2 >= 0:
+                    score += continuation[row_2 + key]
             
-            # History heuristic
-            color_index = 0 if board.white_to_move else 1
-            score += self.history[color_index][start_square][target_square]
+            keys.append((score << 24) | ((255 - index) << 16) | move)
+        
+        keys.sort(reverse=True)
+        return [key & 0xFFFF for key in keys]
+    
+    def order_captures(self, buffer, count, board):
+        """
+        Captures among the first `count` move values of buffer, most valuable
+        victim first and, between equal victims, least valuable attacker first
+        (for quiescence search).
+        """
+        square = board.square
+        piece_values = PIECE_VALUES
+        keys = []
+        for index in range(count):
+            move = buffer[index]
+            captured_piece = square[(move >> 6) & 0x3F]
+            if captured_piece:
+                score = piece_values[captured_piece & 0b0111] * 16 - piece_values[square[move & 0x3F] & 0b0111] // 64
+                keys.append((score << 16) | move)
         
-        return score
+        keys.sort(reverse=True)
+        return [key & 0xFFFF for key in keys]
     
     def update_history(self, move, board, depth):
-        """Update history heuristic for a good quiet move"""
-        color_index = 0 if board.white_to_move else 1
-        history_bonus = depth * depth
-        self.history[color_index][move.start_square][move.target_square] += history_bonus
\ No newline at end of file
+        """Reward a good quiet move (16-bit move value) in the from/to history"""
+        color_offset = 0 if board.white_to_move else 4096
+        _apply_bonus(self.history, color_offset + (move & 0xFFF), min(depth * depth, MAX_BONUS))
+    
+    def update_quiet_stats(self, move, quiets_tried, board, depth, ply_from_root,
+                           previous_key=-1, previous_key_2=-1):
+        """
+        After a quiet move caused a beta cutoff (board at the node, before
+        the move): reward it, penalize the quiets tried before it, and record
+        it as killer and counter move.
+        """
+        self.add_killer_move(move, ply_from_root)
+        if previous_key >= 0:
+            self.counter_moves[previous_key] = move
+        
+        bonus = min(depth * depth, MAX_BONUS)
+        square = board.square
+        history = self.history
+        continuation = self.continuation_history
+        color_offset = 0 if board.white_to_move else 4096
+        row_1 = previous_key * NUM_CONTINUATION_KEYS if previous_key >= 0 else -1
+        row_2 = previous_key_2 * NUM_CONTINUATION_KEYS if previous_key_2 >= 0 else -1
+        
+        for quiet, quiet_bonus in [(move, bonus)] + [(other, -bonus) for other in quiets_tried]:
+            _apply_bonus(history, color_offset + (quiet & 0xFFF), quiet_bonus)
+            target_square = (quiet >> 6) & 0x3F
+            key = PIECE_INDEX[square[quiet & 0x3F]] * 64 + target_square
+            if row_1 >= 0:
+                _apply_bonus(continuation, row_1 + key, quiet_bonus)
+            if row_2 >= 0:
+                _apply_bonus(continuation, row_2 + key, quiet_bonus)
+
+
+def continuation_key(piece, target_square):
+    """Continuation history key of a move: moved piece and its target square"""
+    return PIECE_INDEX[piece] * 64 + target_square
+
+
+def _apply_bonus(table, index, bonus):
+    """
+    History gravity: move the entry towards +/-MAX_HISTORY by bonus, less the
+    closer it already is, so entries stay bounded and new results outweigh
+    old ones.
+    """
+    entry = table[index]
+    table[index] = entry + bonus - entry * abs(bonus) // MAX_HISTORY
+
+
+# History entries stay within +/-MAX_HISTORY (fits the int16 tables)
+MAX_HISTORY = 16384
+MAX_BONUS = 1200
+
+# [color][to][from]: a move's low 12 bits (from | to << 6) index a color's block
+HISTORY_SIZE = 2 * 64 * 64
+
+# Moved piece (12 kinds) and target square
+NUM_CONTINUATION_KEYS = 12 * 64
+CONTINUATION_SIZE = NUM_CONTINUATION_KEYS * NUM_CONTINUATION_KEYS
+
+# Piece value -> 0..11 (white pawn..king, black pawn..king)
+PIECE_INDEX = [0] * 16
+for _piece_type in range(Piece.PAWN, Piece.KING + 1):
+    PIECE_INDEX[_piece_type | Piece.WHITE] = _piece_type - 1
+    PIECE_INDEX[_piece_type | Piece.BLACK] = _piece_type + 5
+
+# Piece values for MVV-LVA, indexed by piece type
+PIECE_VALUES = [0] * 8
+for _piece_type, _value in MoveOrdering.PIECE_VALUES.items():
+    PIECE_VALUES[_piece_type] = _value
@@ -4,6 +4,8 @@ Opening Book for chess bot - plays known good opening moves.
 
 import random
 
+from chess_core.packed_position import position_key
+
 
 class OpeningBook:
     """Opening book with weighted move selection"""
@@ -11,7 +13,7 @@ class OpeningBook:
     def __init__(self, book_data=None):
         """
         Initialize opening book.
-        book_data format: { "fen": [("move_uci", play_count), ...], ... }
+        book_data format: { "fen" or position_key: [("move_uci", play_count), ...], ... }
         """
         self.moves_by_position = {}
         self.rng = random.Random()
@@ -26,7 +28,7 @@ class OpeningBook:
         # Starting position common responses
         start_fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
         
-        self.moves_by_position = {
+        self.load_book({
             # Starting position - most popular moves
             start_fen: [
                 ("e2e4", 100),  # King's Pawn
@@ -75,16 +77,17 @@ class OpeningBook:
                 ("e7e6", 80),   # Paulsen/Taimanov
                 ("g7g6", 50),   # Hyperaccelerated Dragon
             ],
-        }
+        })
     
     def load_book(self, book_data):
-        """Load book from dictionary"""
+        """Load book from dictionary (FEN keys are converted to position keys)"""
+        if any(isinstance(key, str) for key in book_data):
+            book_data = {position_key(key): moves for key, moves in book_data.items()}
         self.moves_by_position = book_data
     
     def has_book_move(self, fen):
         """Check if position is in book"""
-        simplified_fen = self._simplify_fen(fen)
-        return simplified_fen in self.moves_by_position
+        return position_key(fen) in self.moves_by_position
     
     def try_get_book_move(self, board, weight_pow=0.5):
         """
@@ -92,14 +95,10 @@ class OpeningBook:
         weight_pow: 0 = random, 1 = always most popular
         Returns: (move_uci, is_book_move)
         """
-        fen = board.to_fen() if hasattr(board, 'to_fen') else board
-        simplified_fen = self._simplify_fen(fen)
-        
-        if simplified_fen not in self.moves_by_position:
+        moves = self.moves_by_position.get(position_key(board))
+        if not moves:
             return None, False
         
-        moves = self.moves_by_position[simplified_fen]
-        
         # Calculate weighted probabilities
         total_weight = sum(count ** weight_pow for _, count in moves)
         
@@ -121,17 +120,6 @@ class OpeningBook:
         
         # Fallback (shouldn't reach here)
         return moves[0][0], True
-    
-    def _simplify_fen(self, fen):
-        """
-        Simplify FEN to match book.txt format.
-        book.txt uses: position side castling ep (with '-' for ep if none)
-        """
-        parts = fen.split()
-        if len(parts) >= 4:
-            # Return: position side castling ep
-            return ' '.join(parts[:4])
-        return fen
 
 # Example usage with polyglot book format (for .bin files)
 class PolyglotBook:
@@ -1,13 +1,15 @@
 import time
-from typing import Optional, Tuple
-from .board import Board
-from .move import Move
-from .move_generator import MoveGenerator
+from typing import Generator, List, Optional, Tuple
+from chess_core.board import Board
+from chess_core.move import Move
+from chess_core.move_generator import MoveGenerator, new_move_buffer
+from chess_core.attacks import gives_check
 from .evaluation import Evaluation
 from .transposition_table import TranspositionTable
-from .move_ordering import MoveOrdering
+from .move_ordering import MoveOrdering, PIECE_INDEX
 from .repetition_table import RepetitionTable
-from .piece import Piece
+from chess_core.piece import Piece
+from .cancellation import CancellationToken
 
 
 class Searcher:
@@ -28,6 +30,9 @@ class Searcher:
         self.move_ordering = MoveOrdering()
         self.repetition_table = RepetitionTable()
         
+        # Legal move values per ply, reused across nodes (see _move_buffer)
+        self.move_buffers = []
+        
         # Search state
         self.current_depth = 0
         self.best_move = None
@@ -36,38 +41,85 @@ class Searcher:
         self.best_eval_this_iteration = 0
         self.has_searched_at_least_one_move = False
         self.search_cancelled = False
+        self.stop_requested = False
+        
+        # Called after every completed iteration with
+        # (depth, best_move, best_eval, nodes_searched)
+        self.on_iteration_complete = None
         
         # Diagnostics
         self.nodes_searched = 0
         self.num_cutoffs = 0
         self.search_start_time = 0
         self.time_limit_ms = 0
+        self.stop_time = 0
+        self.cancel_token = None
+        self.max_depth = 256
+        self.max_nodes = None
+        self.slice_nodes = None
+        self.next_pause_at = None
     
     def clear_for_new_position(self):
         """Clear search data for new position"""
         self.move_ordering.clear()
         self.transposition_table.clear()
     
-    def start_search(self, time_ms: int) -> Tuple[Optional[Move], int, int]:
+    def start_search(self, time_ms: int, cancel_token: Optional[CancellationToken] = None,
+                     deadline: Optional[float] = None, max_depth: Optional[int] = None,
+                     max_nodes: Optional[int] = None) -> Tuple[Optional[Move], int, int]:
         """
         Main search entry point.
+        cancel_token: aborts the search as soon as it is cancelled
+        deadline: absolute time.time() after which the search stops,
+                  whichever comes first with time_ms
+        max_depth: stop after completing this iteration depth
+        max_nodes: stop once this many nodes have been searched
         Returns: (best_move, evaluation, nodes_searched)
         """
+        steps = self.search_steps(time_ms, cancel_token, deadline, max_depth, max_nodes)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+    
+    def search_steps(self, time_ms: int, cancel_token: Optional[CancellationToken] = None,
+                     deadline: Optional[float] = None, max_depth: Optional[int] = None,
+                     max_nodes: Optional[int] = None,
+                     slice_nodes: Optional[int] = None) -> Generator[None, None, Tuple[Optional[Move], int, int]]:
+        """
+        Resumable search: a generator that pauses every `slice_nodes` nodes so a
+        scheduler can interleave many searches on one thread. Takes the same
+        limits as start_search (time limits are wall-clock, so time spent paused
+        counts) and returns its result as the generator's return value.
+        """
         # Initialize
         self.best_eval_this_iteration = self.best_eval = 0
         self.best_move_this_iteration = self.best_move = None
         self.search_cancelled = False
+        self.stop_requested = False
         self.nodes_searched = 0
         self.num_cutoffs = 0
         self.current_depth = 0
         self.time_limit_ms = time_ms
         self.search_start_time = time.time()
+        self.stop_time = self.search_start_time + time_ms / 1000
+        if deadline is not None:
+            self.stop_time = min(self.stop_time, deadline)
+        self.cancel_token = cancel_token
+        self.max_depth = max_depth or 256
+        self.max_nodes = max_nodes
+        self.slice_nodes = slice_nodes
+        self.next_pause_at = slice_nodes if slice_nodes else None
         
         # Initialize repetition table
         self.repetition_table.init([])
         
+        # Let history from earlier moves of the game fade
+        self.move_ordering.age_history()
+        
         # Run iterative deepening search
-        self.run_iterative_deepening_search()
+        yield from self.run_iterative_deepening_search()
         
         # Emergency fallback
         if self.best_move is None:
@@ -76,9 +128,9 @@ class Searcher:
         
         return self.best_move, self.best_eval, self.nodes_searched
     
-    def run_iterative_deepening_search(self):
-        """Iterative deepening loop"""
-        for search_depth in range(1, 257):
+    def run_iterative_deepening_search(self) -> Generator[None, None, None]:
+        """Iterative deepening loop (generator, see search_steps)"""
+        for search_depth in range(1, self.max_depth + 1):
             self.has_searched_at_least_one_move = False
             self.current_iteration_depth = search_depth
             
@@ -87,7 +139,7 @@ class Searcher:
                 break
             
             # Search at current depth
-            self.search(
+            yield from self.search(
                 ply_remaining=search_depth,
                 ply_from_root=0,
                 alpha=self.NEGATIVE_INFINITY,
@@ -107,6 +159,11 @@ class Searcher:
                 self.best_move = self.best_move_this_iteration
                 self.best_eval = self.best_eval_this_iteration
                 
+                if self.on_iteration_complete:
+                    self.on_iteration_complete(
+                        search_depth, self.best_move, self.best_eval, self.nodes_searched
+                    )
+                
                 # Reset for next iteration
                 self.best_eval_this_iteration = float('-inf')
                 self.best_move_this_iteration = None
@@ -118,10 +175,14 @@ class Searcher:
                         break
     
     def search(self, ply_remaining: int, ply_from_root: int, alpha: int, beta: int,
-               num_extensions: int = 0, prev_move: Optional[Move] = None, 
-               prev_was_capture: bool = False) -> int:
+               num_extensions: int = 0, prev_move: int = 0,
+               prev_was_capture: bool = False, prev_key: int = -1,
+               prev_key_2: int = -1) -> Generator[None, None, int]:
         """
         Main alpha-beta search with enhancements.
+        Works on 16-bit move values (prev_move: the move leading here, 0 at the root).
+        prev_key / prev_key_2: continuation keys of the last two moves (-1 if none).
+        A generator returning the score; drive it with `yield from`.
         """
         if self.should_stop_search():
             self.search_cancelled = True
@@ -158,13 +219,14 @@ class Searcher:
         
         # Quiescence search at leaf nodes
         if ply_remaining == 0:
-            return self.quiescence_search(alpha, beta)
+            return (yield from self.quiescence_search(alpha, beta, ply_from_root))
         
         # Generate and order moves
-        moves = self.move_generator.generate_moves(self.board)
-        hash_move = self.transposition_table.try_get_stored_move(zobrist_key)
-        ordered_moves = self.move_ordering.order_moves(
-            moves, self.board, hash_move, ply_from_root
+        buffer = self._move_buffer(ply_from_root)
+        count = self.move_generator.generate_move_values(self.board, buffer)
+        hash_move = self.transposition_table.get_stored_move_value(zobrist_key)
+        ordered_moves = self.move_ordering.order_move_values(
+            buffer, count, self.board, hash_move, ply_from_root, prev_key, prev_key_2
         )
         
         # Checkmate/stalemate detection
@@ -179,26 +241,31 @@ class Searcher:
         
         # Update repetition table
         if ply_from_root > 0 and prev_move:
-            was_pawn_move = Piece.piece_type(self.board.square[prev_move.target_square]) == Piece.PAWN
+            was_pawn_move = Piece.piece_type(self.board.square[(prev_move >> 6) & 0x3F]) == Piece.PAWN
             self.repetition_table.push(zobrist_key, prev_was_capture or was_pawn_move)
         
         evaluation_bound = TranspositionTable.UPPER_BOUND
-        best_move_in_position = None
+        best_move_in_position = 0
+        quiets_tried = []
         
         for i, move in enumerate(ordered_moves):
-            captured_piece_type = Piece.piece_type(self.board.square[move.target_square])
+            target_square = (move >> 6) & 0x3F
+            captured_piece_type = Piece.piece_type(self.board.square[target_square])
             is_capture = captured_piece_type != 0
+            move_key = PIECE_INDEX[self.board.square[move & 0x3F]] * 64 + target_square
+            is_check = gives_check(self.board, move)
             
-            # Make move
+            # Make move (the child position's check status is already known)
             self.board.make_move(move, in_search=True)
+            self.board.current_game_state.in_check = is_check
             
             # Extensions
             extension = 0
             if num_extensions < self.MAX_EXTENSIONS:
-                if self.is_in_check():
+                if is_check:
                     extension = 1
-                elif Piece.piece_type(self.board.square[move.target_square]) == Piece.PAWN:
-                    target_rank = move.target_square // 8
+                elif Piece.piece_type(self.board.square[target_square]) == Piece.PAWN:
+                    target_rank = target_square // 8
                     if target_rank == 1 or target_rank == 6:  # Passed pawn
                         extension = 1
             
@@ -208,28 +275,32 @@ class Searcher:
             # Late move reduction
             if extension == 0 and ply_remaining >= 3 and i >= 3 and not is_capture:
                 reduce_depth = 1
-                eval_score = -self.search(
+                eval_score = -(yield from self.search(
                     ply_remaining - 1 - reduce_depth,
                     ply_from_root + 1,
                     -alpha - 1,
                     -alpha,
                     num_extensions,
                     move,
-                    is_capture
-                )
+                    is_capture,
+                    move_key,
+                    prev_key
+                ))
                 needs_full_search = eval_score > alpha
             
             # Full depth search
             if needs_full_search:
-                eval_score = -self.search(
+                eval_score = -(yield from self.search(
                     ply_remaining - 1 + extension,
                     ply_from_root + 1,
                     -beta,
                     -alpha,
                     num_extensions + extension,
                     move,
-                    is_capture
-                )
+                    is_capture,
+                    move_key,
+                    prev_key
+                ))
             
             # Unmake move
             self.board.unmake_move(move, in_search=True)
@@ -248,8 +319,10 @@ class Searcher:
                 
                 # Update move ordering data
                 if not is_capture:
-                    self.move_ordering.add_killer_move(move, ply_from_root)
-                    self.move_ordering.update_history(move, self.board, ply_remaining)
+                    self.move_ordering.update_quiet_stats(
+                        move, quiets_tried, self.board, ply_remaining, ply_from_root,
+                        prev_key, prev_key_2
+                    )
                 
                 if ply_from_root > 0:
                     self.repetition_table.try_pop()
@@ -257,6 +330,9 @@ class Searcher:
                 self.num_cutoffs += 1
                 return beta
             
+            if not is_capture:
+                quiets_tried.append(move)
+            
             # New best move
             if eval_score > alpha:
                 evaluation_bound = TranspositionTable.EXACT
@@ -264,7 +340,7 @@ class Searcher:
                 alpha = eval_score
                 
                 if ply_from_root == 0:
-                    self.best_move_this_iteration = move
+                    self.best_move_this_iteration = Move.from_value(move)
                     self.best_eval_this_iteration = eval_score
                     self.has_searched_at_least_one_move = True
         
@@ -278,8 +354,8 @@ class Searcher:
         
         return alpha
     
-    def quiescence_search(self, alpha: int, beta: int) -> int:
-        """Search captures until quiet position"""
+    def quiescence_search(self, alpha: int, beta: int, ply_from_root: int = 0) -> Generator[None, None, int]:
+        """Search captures until quiet position (generator returning the score)"""
         if self.should_stop_search():
             self.search_cancelled = True
             return 0
@@ -288,6 +364,11 @@ class Searcher:
         eval_score = Evaluation.evaluate(self.board)
         self.nodes_searched += 1
         
+        # Let a scheduler run other searches
+        if self.next_pause_at is not None and self.nodes_searched >= self.next_pause_at:
+            self.next_pause_at = self.nodes_searched + self.slice_nodes
+            yield
+        
         if eval_score >= beta:
             self.num_cutoffs += 1
             return beta
@@ -296,12 +377,12 @@ class Searcher:
             alpha = eval_score
         
         # Generate capture moves
-        moves = self.move_generator.generate_moves(self.board)
-        capture_moves = [m for m in moves if self.board.square[m.target_square] != 0]
+        buffer = self._move_buffer(ply_from_root)
+        count = self.move_generator.generate_move_values(self.board, buffer)
         
-        for move in capture_moves:
+        for move in self.move_ordering.order_captures(buffer, count, self.board):
             self.board.make_move(move, in_search=True)
-            eval_score = -self.quiescence_search(-beta, -alpha)
+            eval_score = -(yield from self.quiescence_search(-beta, -alpha, ply_from_root + 1))
             self.board.unmake_move(move, in_search=True)
             
             if eval_score >= beta:
@@ -313,14 +394,71 @@ class Searcher:
         
         return alpha
     
+    def get_principal_variation(self, max_length: int = 16) -> List[Move]:
+        """Expected line of play, read from the transposition table"""
+        pv = []
+        seen = set()
+        
+        while len(pv) < max_length:
+            key = self.board.zobrist_key
+            stored = self.transposition_table.try_get_stored_move(key)
+            if stored is None or key in seen:
+                break
+            
+            # Guard against hash collisions: only follow legal moves
+            move = next(
+                (m for m in self.move_generator.generate_moves(self.board) if m.value == stored.value),
+                None
+            )
+            if move is None:
+                break
+            
+            seen.add(key)
+            pv.append(move)
+            self.board.make_move(move, in_search=True)
+        
+        for move in reversed(pv):
+            self.board.unmake_move(move, in_search=True)
+        
+        return pv
+    
+    def _move_buffer(self, ply: int):
+        """Move buffer for a ply (allocated the first time a search reaches it)"""
+        buffers = self.move_buffers
+        while len(buffers) <= ply:
+            buffers.append(new_move_buffer())
+        return buffers[ply]
+    
+    def used_full_budget(self) -> bool:
+        """True if the last search ran for its whole time budget (not stopped, cancelled or cut by a deadline)"""
+        if self.cancel_token is not None and self.cancel_token.is_cancelled:
+            return False
+        if self.stop_requested:
+            return False
+        if self.max_nodes is not None and self.nodes_searched >= self.max_nodes:
+            return False
+        return self.stop_time >= self.search_start_time + self.time_limit_ms / 1000
+    
+    def request_stop(self):
+        """
+        Ask a running search to finish early ("move now").
+        The first iteration always completes so a searched move is returned.
+        """
+        self.stop_requested = True
+    
     def should_stop_search(self) -> bool:
-        """Check if time limit exceeded"""
-        elapsed_ms = (time.time() - self.search_start_time) * 1000
-        return elapsed_ms >= self.time_limit_ms
+        """Check if time limit or deadline passed, or the search was stopped/cancelled"""
+        if self.cancel_token is not None and self.cancel_token.is_cancelled:
+            return True
+        if self.stop_requested and self.current_depth > 0:
+            return True
+        if self.max_nodes is not None and self.nodes_searched >= self.max_nodes:
+            return True
+        return time.time() >= self.stop_time
     
     def is_in_check(self) -> bool:
-        """Check if current side is in check"""
-        return self.move_generator.is_in_check(self.board)
+        """Check if current side is in check (cached in the board state)"""
+        return self.board.is_in_check()
     
     def _calculate_zobrist_key(self) -> int:
         """Get zobrist hash for current position"""
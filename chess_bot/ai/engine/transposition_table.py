@@ -1,3 +1,8 @@
+import sys
+
+from chess_core.move import Move
+
+
 class TranspositionTable:
     LOOKUP_FAILED = -1
     
@@ -8,32 +13,48 @@ class TranspositionTable:
     
     def __init__(self, size_mb=64):
         """Initialize transposition table with given size in MB"""
-        import sys
-        
         # Calculate number of entries based on size
         entry_size = sys.getsizeof(Entry())
         desired_size_bytes = size_mb * 1024 * 1024
         num_entries = desired_size_bytes // entry_size
         
         self.count = num_entries
-        self.entries = [Entry() for _ in range(num_entries)]
+        self.entries = [EMPTY_ENTRY] * num_entries
+        self.used = 0  # Slots holding a real entry (for memory estimates)
         self.enabled = True
+        
+        # Lookup statistics (cumulative)
+        self.probes = 0
+        self.hits = 0
     
     def clear(self):
-        """Clear all entries"""
-        self.entries = [Entry() for _ in range(self.count)]
+        """
+        Clear all entries.
+        Empty slots share one immutable entry, so this is a single list
+        allocation instead of constructing millions of objects.
+        """
+        self.entries = [EMPTY_ENTRY] * self.count
+        self.used = 0
+    
+    def memory_bytes(self):
+        """Estimated memory held by the table"""
+        return sys.getsizeof(self.entries) + self.used * ENTRY_SIZE_BYTES
     
     def get_index(self, zobrist_key):
         """Get index for zobrist key"""
         return zobrist_key % self.count
     
     def try_get_stored_move(self, zobrist_key):
-        """Try to get stored move for position"""
-        index = self.get_index(zobrist_key)
-        entry = self.entries[index]
+        """Try to get stored move for position (a Move, or None)"""
+        value = self.get_stored_move_value(zobrist_key)
+        return Move.from_value(value) if value else None
+    
+    def get_stored_move_value(self, zobrist_key):
+        """Stored 16-bit move value for position (0 if none)"""
+        entry = self.entries[zobrist_key % self.count]
         if entry.key == zobrist_key:
             return entry.move
-        return None
+        return 0
     
     def lookup_evaluation(self, zobrist_key, depth, ply_from_root, alpha, beta):
         """
@@ -43,6 +64,7 @@ class TranspositionTable:
         if not self.enabled:
             return self.LOOKUP_FAILED
         
+        self.probes += 1
         index = self.get_index(zobrist_key)
         entry = self.entries[index]
         
@@ -55,29 +77,40 @@ class TranspositionTable:
                 
                 # Exact evaluation
                 if entry.node_type == self.EXACT:
+                    self.hits += 1
                     return corrected_score
                 
                 # Upper bound - return if <= alpha
                 if entry.node_type == self.UPPER_BOUND and corrected_score <= alpha:
+                    self.hits += 1
                     return corrected_score
                 
                 # Lower bound - return if >= beta (causes cutoff)
                 if entry.node_type == self.LOWER_BOUND and corrected_score >= beta:
+                    self.hits += 1
                     return corrected_score
         
         return self.LOOKUP_FAILED
     
     def store_evaluation(self, zobrist_key, depth, ply_from_root, eval_score, 
                         eval_type, move):
-        """Store evaluation in transposition table"""
+        """Store evaluation in transposition table (move: Move, 16-bit move value or None)"""
         if not self.enabled:
             return
         
+        if move is None:
+            move = 0
+        elif move.__class__ is not int:
+            move = move.value
+        
         index = self.get_index(zobrist_key)
         corrected_score = self._correct_mate_score_for_storage(
             eval_score, ply_from_root
         )
         
+        if self.entries[index] is EMPTY_ENTRY:
+            self.used += 1
+        
         entry = Entry(
             key=zobrist_key,
             value=corrected_score,
@@ -110,11 +143,17 @@ class TranspositionTable:
 
 
 class Entry:
-    """Single transposition table entry"""
+    """Single transposition table entry (move is a 16-bit move value, 0 = none)"""
+    __slots__ = ('key', 'value', 'depth', 'node_type', 'move')
     
-    def __init__(self, key=0, value=0, depth=0, node_type=0, move=None):
+    def __init__(self, key=0, value=0, depth=0, node_type=0, move=0):
         self.key = key
         self.value = value
         self.depth = depth
         self.node_type = node_type
-        self.move = move
\ No newline at end of file
+        self.move = move
+
+
+# Entries are replaced, never mutated, so every empty slot can share this one
+EMPTY_ENTRY = Entry()
+ENTRY_SIZE_BYTES = sys.getsizeof(EMPTY_ENTRY)
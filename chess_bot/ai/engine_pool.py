@@ -0,0 +1,148 @@
+"""
+Engine Pool - analyses many positions in parallel on worker processes.
+
+Positions are sent in chunks of consecutive positions from the same game,
+and every worker process keeps one Searcher alive between chunks, so the
+transposition table filled by one position speeds up the next.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from threading import Lock
+from typing import Iterator, List, Optional
+
+from chess_core.board import Board
+from chess_core.move_generator import MoveGenerator
+from chess_core.packed_position import PACKED_SIZE, pack_fen
+from .engine.searcher import Searcher
+
+
+# Searcher owned by the current worker process, reused between chunks
+_worker_searcher = None
+
+
+def analyze_chunk(positions: bytes, time_ms: int, max_depth: Optional[int],
+                  max_nodes: Optional[int]) -> List[tuple]:
+    """
+    Analyse packed positions (back to back) in order (runs inside a worker process).
+    Returns (best_move, evaluation, depth, nodes, pv) per position.
+    """
+    global _worker_searcher
+    if _worker_searcher is None:
+        _worker_searcher = Searcher(Board())
+    searcher = _worker_searcher
+    
+    results = []
+    for offset in range(0, len(positions), PACKED_SIZE):
+        board = Board.from_packed(positions[offset:offset + PACKED_SIZE])
+        searcher.board = board
+        
+        best_move, evaluation, nodes = searcher.start_search(
+            time_ms, max_depth=max_depth, max_nodes=max_nodes
+        )
+        pv = searcher.get_principal_variation(searcher.current_depth) if best_move else []
+        
+        results.append((
+            best_move.to_uci() if best_move else None,
+            evaluation,
+            searcher.current_depth,
+            nodes,
+            [move.to_uci() for move in pv],
+        ))
+    return results
+
+
+def positions_from_moves(start_fen: str, moves: List[str]) -> List[dict]:
+    """
+    Every position of a game, each with the move that was played from it.
+    Raises ValueError on an illegal move.
+    """
+    board = Board(start_fen)
+    gen = MoveGenerator()
+    positions = []
+    
+    for ply, move_uci in enumerate(moves):
+        positions.append({'ply': ply, 'fen': board.to_fen(), 'played_move': move_uci})
+        for legal_move in gen.generate_moves(board):
+            if legal_move.to_uci() == move_uci:
+                board.make_move(legal_move)
+                break
+        else:
+            raise ValueError(f"Illegal move at ply {ply}: {move_uci}")
+    
+    positions.append({'ply': len(moves), 'fen': board.to_fen(), 'played_move': None})
+    return positions
+
+
+class EnginePool:
+    """Process pool running analysis chunks, created on first use"""
+    
+    def __init__(self, max_workers: int = None, chunk_size: int = 8):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.executor = None
+        self.lock = Lock()
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                # Spawned workers don't inherit the web server's threads and locks
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self.executor
+    
+    def make_chunks(self, games: List[List[dict]]) -> List[List[dict]]:
+        """Split each game's positions into runs of consecutive positions"""
+        chunks = []
+        for positions in games:
+            for start in range(0, len(positions), self.chunk_size):
+                chunks.append(positions[start:start + self.chunk_size])
+        return chunks
+    
+    def analyze(self, games: List[List[dict]], time_ms: int, max_depth: Optional[int] = None,
+                max_nodes: Optional[int] = None) -> Iterator[dict]:
+        """
+        Analyse positions grouped by game. Each task is {'fen', ...};
+        results are the task with the analysis added.
+        Yields results as chunks complete (not in input order).
+        Closing the iterator cancels chunks that have not started.
+        """
+        executor = self._get_executor()
+        
+        # Workers get packed positions rather than pickled task dicts
+        futures = {}
+        for chunk in self.make_chunks(games):
+            positions = b''.join(pack_fen(task['fen']) for task in chunk)
+            future = executor.submit(analyze_chunk, positions, time_ms, max_depth, max_nodes)
+            futures[future] = chunk
+        
+        try:
+            for future in as_completed(futures):
+                for task, (best_move, evaluation, depth, nodes, pv) in zip(futures[future], future.result()):
+                    yield dict(task, best_move=best_move, evaluation=evaluation,
+                               depth=depth, nodes=nodes, pv=pv)
+        finally:
+            for future in futures:
+                future.cancel()
+    
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+
+def _create_engine_pool() -> EnginePool:
+    """Build the engine pool from Django settings (CPU count without them)"""
+    from django.conf import settings
+    
+    if not settings.configured:
+        return EnginePool()
+    return EnginePool(max_workers=getattr(settings, 'BOT_ENGINE_WORKERS', None))
+
+
+# Global engine pool instance
+engine_pool = _create_engine_pool()
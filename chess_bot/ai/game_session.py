@@ -1,25 +1,34 @@
 """
 Game Session Manager - handles unique game IDs and multiple concurrent games.
-No database storage, just in-memory session management.
+Sessions are kept as compact state (start FEN plus move list) in a pluggable
+session store, so several worker processes can share them.
 """
 
+import heapq
+import os
 import uuid
 import time
-from threading import Lock
-from typing import Dict, Optional
+from threading import Lock, Thread
+from typing import List, Optional
+
+from chess_core.board import Board
+from chess_core.move_generator import MoveGenerator
+from .session_store import SessionStore, InMemorySessionStore, create_session_store, worker_id
 
 
 class GameSession:
     """Represents a single chess game session"""
     
-    def __init__(self, game_id: str):
+    def __init__(self, game_id: str, start_fen: str = Board.START_FEN):
         self.game_id = game_id
-        self.fen = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+        self.start_fen = start_fen
+        self.fen = start_fen
         self.moves = []  # List of UCI moves
         self.created_at = time.time()
         self.last_accessed = time.time()
         self.player_color = 'white'  # Player plays as white by default
         self.difficulty = 'medium'   # easy, medium, hard
+        self.owner = worker_id()     # Worker that last served this game (sticky routing hint)
     
     def update_position(self, fen: str, move: str = None):
         """Update position after a move"""
@@ -31,16 +40,99 @@ class GameSession:
     def is_expired(self, timeout: int = 3600) -> bool:
         """Check if session expired (default 1 hour)"""
         return time.time() - self.last_accessed > timeout
+    
+    def to_state(self) -> dict:
+        """Compact, JSON-serializable state for session stores"""
+        return {
+            'start_fen': self.start_fen,
+            'moves': self.moves,
+            'fen': self.fen,
+            'player_color': self.player_color,
+            'difficulty': self.difficulty,
+            'created_at': self.created_at,
+            'last_accessed': self.last_accessed,
+            'owner': self.owner,
+        }
+    
+    @classmethod
+    def from_state(cls, game_id: str, state: dict) -> 'GameSession':
+        """Rebuild a session from stored state"""
+        session = cls(game_id, state.get('start_fen', Board.START_FEN))
+        session.moves = list(state.get('moves', []))
+        session.fen = state.get('fen') or replay_moves(session.start_fen, session.moves)
+        session.player_color = state.get('player_color', 'white')
+        session.difficulty = state.get('difficulty', 'medium')
+        session.created_at = state.get('created_at', session.created_at)
+        session.last_accessed = state.get('last_accessed', session.last_accessed)
+        session.owner = state.get('owner') or worker_id()
+        return session
+
+
+def replay_moves(start_fen: str, moves) -> str:
+    """Play UCI moves from a start position and return the resulting FEN"""
+    board = Board(start_fen)
+    gen = MoveGenerator()
+    
+    for move_uci in moves:
+        for legal_move in gen.generate_moves(board):
+            if legal_move.to_uci() == move_uci:
+                board.make_move(legal_move)
+                break
+        else:
+            raise ValueError(f"Illegal move in session history: {move_uci}")
+    
+    return board.to_fen()
 
 
 class GameSessionManager:
-    """Manages multiple game sessions"""
+    """
+    Manages multiple game sessions.
     
-    def __init__(self):
-        self.sessions: Dict[str, GameSession] = {}
-        self.lock = Lock()
-        self.cleanup_interval = 300  # Cleanup every 5 minutes
-        self.last_cleanup = time.time()
+    Session access takes only the lock stripe of its game id. Expiry is
+    handled by a background sweeper thread that pops a min-heap of expiry
+    times, so no request ever scans all sessions. Reads write the access
+    time back only once it is `touch_interval` seconds old, so polling a
+    game costs no store write.
+    """
+    
+    def __init__(self, store: SessionStore = None, timeout: int = 3600,
+                 lock_stripes: int = 64, sweep_interval: float = 30,
+                 touch_interval: float = None):
+        self.store = store or InMemorySessionStore()
+        self.timeout = timeout
+        self.touch_interval = touch_interval if touch_interval is not None else min(60, timeout / 10)
+        self.locks = [Lock() for _ in range(lock_stripes)]
+        
+        # Min-heap of (expires_at, game_id) for games this worker has seen.
+        # Entries are not updated on access; the sweeper re-checks the
+        # stored access time and reschedules games that are still in use.
+        self.expiry_heap = []
+        self.scheduled = set()
+        self.heap_lock = Lock()
+        
+        self.sweep_interval = sweep_interval
+        self.store_purge_interval = 300  # Full purge of shared stores every 5 minutes
+        self.last_store_purge = time.time()
+        self.sweeper = None
+        self.sweeper_pid = None
+        
+        # Called with the game id whenever a session expires
+        self.expiry_listeners = []
+    
+    def add_expiry_listener(self, callback):
+        """Register callback(game_id) run when a session expires"""
+        self.expiry_listeners.append(callback)
+    
+    def _notify_expired(self, game_ids):
+        for game_id in game_ids:
+            for callback in self.expiry_listeners:
+                try:
+                    callback(game_id)
+                except Exception as e:
+                    print(f"Session expiry listener failed for {game_id}: {e}")
+    
+    def _lock_for(self, game_id: str) -> Lock:
+        return self.locks[hash(game_id) % len(self.locks)]
     
     def create_game(self, player_color: str = 'white', difficulty: str = 'medium') -> str:
         """
@@ -49,72 +141,156 @@ class GameSessionManager:
         """
         game_id = str(uuid.uuid4())
         
-        with self.lock:
+        with self._lock_for(game_id):
             session = GameSession(game_id)
             session.player_color = player_color
             session.difficulty = difficulty
-            self.sessions[game_id] = session
-            
-            # Cleanup old sessions
-            self._cleanup_expired_sessions()
+            self.store.save(game_id, session.to_state())
         
+        self._schedule_expiry(game_id, session.last_accessed + self.timeout)
         return game_id
     
     def get_game(self, game_id: str) -> Optional[GameSession]:
         """Get game session by ID"""
-        with self.lock:
-            session = self.sessions.get(game_id)
-            if session and not session.is_expired():
-                session.last_accessed = time.time()
-                return session
-            elif session:
-                # Remove expired session
-                del self.sessions[game_id]
-            return None
+        with self._lock_for(game_id):
+            state = self.store.load(game_id)
+            if not state:
+                return None
+            
+            session = GameSession.from_state(game_id, state)
+            if session.is_expired(self.timeout):
+                # The sweeper removes it
+                return None
+            
+            # Refresh access time and claim the game for this worker, but
+            # only write when either has changed enough to matter
+            now = time.time()
+            owner = worker_id()
+            if now - session.last_accessed >= self.touch_interval or session.owner != owner:
+                session.last_accessed = now
+                session.owner = owner
+                self.store.save(game_id, session.to_state())
+        
+        if game_id not in self.scheduled:
+            # Created by another worker
+            self._schedule_expiry(game_id, session.last_accessed + self.timeout)
+        return session
     
     def update_game(self, game_id: str, fen: str, move: str = None) -> bool:
         """Update game position"""
-        with self.lock:
-            session = self.sessions.get(game_id)
-            if session:
+        with self._lock_for(game_id):
+            state = self.store.load(game_id)
+            if state:
+                session = GameSession.from_state(game_id, state)
                 session.update_position(fen, move)
+                session.owner = worker_id()
+                self.store.save(game_id, session.to_state())
                 return True
             return False
     
     def delete_game(self, game_id: str) -> bool:
         """Delete a game session"""
-        with self.lock:
-            if game_id in self.sessions:
-                del self.sessions[game_id]
-                return True
-            return False
+        with self._lock_for(game_id):
+            return self.store.delete(game_id)
     
     def get_game_count(self) -> int:
         """Get number of active games"""
-        with self.lock:
-            return len(self.sessions)
+        return self.store.count()
     
-    def _cleanup_expired_sessions(self):
-        """Remove expired sessions"""
-        current_time = time.time()
-        
-        # Only cleanup periodically
-        if current_time - self.last_cleanup < self.cleanup_interval:
-            return
-        
-        expired = [
-            game_id for game_id, session in self.sessions.items()
-            if session.is_expired()
-        ]
+    def _schedule_expiry(self, game_id: str, expires_at: float):
+        with self.heap_lock:
+            heapq.heappush(self.expiry_heap, (expires_at, game_id))
+            self.scheduled.add(game_id)
+        self._ensure_sweeper()
+    
+    def sweep(self, now: float = None) -> List[str]:
+        """
+        Expire sessions whose heap entry is due. Games accessed since they
+        were scheduled are pushed back with their new expiry time.
+        Returns the expired game ids.
+        """
+        now = now or time.time()
+        expired = []
         
-        for game_id in expired:
-            del self.sessions[game_id]
+        while True:
+            with self.heap_lock:
+                if not self.expiry_heap or self.expiry_heap[0][0] > now:
+                    break
+                _, game_id = heapq.heappop(self.expiry_heap)
+            
+            with self._lock_for(game_id):
+                state = self.store.load(game_id)
+                if state and now - state['last_accessed'] <= self.timeout:
+                    reschedule_at = state['last_accessed'] + self.timeout
+                else:
+                    reschedule_at = None
+                    if state:
+                        self.store.delete(game_id)
+            
+            if reschedule_at is not None:
+                with self.heap_lock:
+                    heapq.heappush(self.expiry_heap, (reschedule_at, game_id))
+            else:
+                # Expired here, or deleted/expired by another worker
+                with self.heap_lock:
+                    self.scheduled.discard(game_id)
+                expired.append(game_id)
         
-        self.last_cleanup = current_time
+        # Sessions of shared stores no live worker has scheduled (e.g. owner restarted)
+        if self.store.shared and now - self.last_store_purge >= self.store_purge_interval:
+            self.last_store_purge = now
+            expired.extend(game_id for game_id in self.store.purge_expired(self.timeout)
+                           if game_id not in expired)
         
         if expired:
+            self._notify_expired(expired)
             print(f"Cleaned up {len(expired)} expired game sessions")
+        return expired
+    
+    def _ensure_sweeper(self):
+        """Start the sweeper thread in this process (again after a fork)"""
+        if self.sweeper_pid == os.getpid():
+            return
+        with self.heap_lock:
+            if self.sweeper_pid == os.getpid():
+                return
+            self.sweeper_pid = os.getpid()
+            self.sweeper = Thread(target=self._sweep_loop, name='session-sweeper', daemon=True)
+            self.sweeper.start()
+    
+    def _sweep_loop(self):
+        while True:
+            with self.heap_lock:
+                next_due = self.expiry_heap[0][0] if self.expiry_heap else None
+            
+            wait = self.sweep_interval
+            if next_due is not None:
+                wait = min(wait, max(0.0, next_due - time.time()))
+            
+            time.sleep(wait)
+            
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Session sweep failed: {e}")
+
+
+def _create_game_manager() -> GameSessionManager:
+    """Build the session manager from Django settings (in-memory without them)"""
+    from django.conf import settings
+    
+    if not settings.configured:
+        return GameSessionManager()
+    
+    timeout = getattr(settings, 'BOT_SESSION_TIMEOUT', 3600)
+    store = create_session_store(
+        backend=getattr(settings, 'BOT_SESSION_BACKEND', 'memory'),
+        sqlite_path=getattr(settings, 'BOT_SESSION_SQLITE_PATH', None),
+        redis_url=getattr(settings, 'BOT_REDIS_URL', None),
+        timeout=timeout,
+    )
+    return GameSessionManager(store, timeout)
 
 
 # Global session manager instance
-game_manager = GameSessionManager()
\ No newline at end of file
+game_manager = _create_game_manager()
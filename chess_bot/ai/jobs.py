@@ -0,0 +1,242 @@
+"""
+Bot Move Jobs - runs bot searches in the background so HTTP workers are freed.
+Clients poll or stream a job for progress (depth, score, best move) and the final move.
+"""
+
+import uuid
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Lock
+from typing import Callable, Dict, Optional
+
+from .engine.cancellation import CancellationToken
+from . import metrics
+
+
+class BotMoveJob:
+    """A single background bot search"""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    CANCELLED = 'cancelled'
+    FAILED = 'failed'
+
+    FINISHED_STATES = (DONE, CANCELLED, FAILED)
+
+    def __init__(self, job_id: str, game_id: str):
+        self.job_id = job_id
+        self.game_id = game_id
+        self.status = self.PENDING
+        self.progress = {
+            'depth': 0,
+            'evaluation': 0,
+            'best_move': None,
+            'nodes_searched': 0,
+        }
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.queued = False  # Handed to the thread pool (reserved jobs searched in the request never are)
+
+        # Set by the client while the job runs
+        self.stop_requested = False
+        self.cancel_token = CancellationToken()
+
+        # Bumped on every change so streams can wait for updates
+        self.version = 0
+        self.changed = Condition()
+
+        # Called to make the running search move now
+        self.interrupt = None
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self.cancel_token.is_cancelled
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in self.FINISHED_STATES
+
+    def update_progress(self, depth: int, best_move: Optional[str], evaluation: int, nodes: int):
+        """Record progress of the running search"""
+        with self.changed:
+            self.progress = {
+                'depth': depth,
+                'evaluation': evaluation,
+                'best_move': best_move,
+                'nodes_searched': nodes,
+            }
+            self._bump()
+
+    def set_status(self, status: str, result: dict = None, error: str = None):
+        """Move job to a new state"""
+        with self.changed:
+            self.status = status
+            if status == self.RUNNING:
+                self.started_at = time.time()
+            if status in self.FINISHED_STATES:
+                self.finished_at = time.time()
+            if result is not None:
+                self.result = result
+            if error is not None:
+                self.error = error
+            self._bump()
+
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        """Block until the job changes past `version` or timeout; returns current version"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout=timeout)
+            return self.version
+
+    def _bump(self):
+        self.version += 1
+        self.changed.notify_all()
+
+    def to_dict(self) -> dict:
+        with self.changed:
+            elapsed_from = self.started_at or self.created_at
+            elapsed_to = self.finished_at or time.time()
+            return {
+                'job_id': self.job_id,
+                'game_id': self.game_id,
+                'status': self.status,
+                'progress': dict(self.progress),
+                'result': self.result,
+                'error': self.error,
+                'elapsed_ms': int((elapsed_to - elapsed_from) * 1000),
+            }
+
+
+class JobConflict(Exception):
+    """Raised when a game already has a running bot search"""
+
+
+class BotJobManager:
+    """Runs bot move jobs on a thread pool, at most one active job per game"""
+
+    def __init__(self, max_workers: int = 4, retention: int = 600):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bot-job')
+        self.jobs: Dict[str, BotMoveJob] = {}
+        self.active_by_game: Dict[str, str] = {}
+        self.lock = Lock()
+        self.retention = retention  # Keep finished jobs for 10 minutes
+
+    def submit(self, game_id: str, run: Callable[[BotMoveJob], dict]) -> BotMoveJob:
+        """
+        Queue a job for a game.
+        run(job) performs the search and returns the result payload.
+        Raises JobConflict if the game already has an unfinished job.
+        """
+        job = self.reserve(game_id)
+        self.start(job, run)
+        return job
+
+    def reserve(self, game_id: str) -> BotMoveJob:
+        """
+        Claim the game's job slot before touching its session, so concurrent
+        moves in one game are rejected up front. The pending job is then
+        either started or released.
+        Raises JobConflict if the game already has an unfinished job.
+        """
+        with self.lock:
+            self._prune_finished()
+
+            if self.active_job_id(game_id):
+                raise JobConflict(f'Game {game_id} already has a bot move in progress')
+
+            job = BotMoveJob(str(uuid.uuid4()), game_id)
+            self.jobs[job.job_id] = job
+            self.active_by_game[game_id] = job.job_id
+        return job
+
+    def start(self, job: BotMoveJob, run: Callable[[BotMoveJob], dict]):
+        """Run a reserved job in the background"""
+        job.queued = True
+        self.executor.submit(self._run, job, run)
+
+    def release(self, job: BotMoveJob):
+        """Free the slot of a reserved job that was not started (or ran in the request)"""
+        with self.lock:
+            self.jobs.pop(job.job_id, None)
+            if self.active_by_game.get(job.game_id) == job.job_id:
+                del self.active_by_game[job.game_id]
+
+    def get_job(self, job_id: str) -> Optional[BotMoveJob]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def active_job_id(self, game_id: str) -> Optional[str]:
+        """Id of the unfinished job for a game, if any"""
+        job_id = self.active_by_game.get(game_id)
+        job = self.jobs.get(job_id) if job_id else None
+        if job and not job.is_finished:
+            return job_id
+        return None
+
+    def stop(self, job_id: str) -> bool:
+        """Ask a job to play its best move so far"""
+        job = self.get_job(job_id)
+        if not job or job.is_finished:
+            return False
+        job.stop_requested = True
+        if job.interrupt:
+            job.interrupt()
+        return True
+
+    def cancel(self, job_id: str) -> bool:
+        """Abort a job without playing a move"""
+        job = self.get_job(job_id)
+        if not job or job.is_finished:
+            return False
+        job.cancel_token.cancel('cancelled')
+        if job.status == BotMoveJob.PENDING:
+            job.set_status(BotMoveJob.CANCELLED)
+        return True
+
+    def get_job_count(self) -> int:
+        with self.lock:
+            return sum(1 for job in self.jobs.values() if not job.is_finished)
+
+    def get_queue_depth(self) -> tuple:
+        """(jobs waiting for a thread, jobs running)"""
+        with self.lock:
+            statuses = [job.status for job in self.jobs.values() if job.queued]
+        return statuses.count(BotMoveJob.PENDING), statuses.count(BotMoveJob.RUNNING)
+
+    def _run(self, job: BotMoveJob, run: Callable[[BotMoveJob], dict]):
+        if job.cancel_requested:
+            if not job.is_finished:
+                job.set_status(BotMoveJob.CANCELLED)
+            return
+
+        job.set_status(BotMoveJob.RUNNING)
+        metrics.job_queue_wait.observe(job.started_at - job.created_at)
+        try:
+            result = run(job)
+            if job.cancel_requested:
+                job.set_status(BotMoveJob.CANCELLED)
+            else:
+                job.set_status(BotMoveJob.DONE, result=result)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            job.set_status(BotMoveJob.FAILED, error=str(e))
+
+    def _prune_finished(self):
+        """Drop finished jobs past retention (caller holds lock)"""
+        cutoff = time.time() - self.retention
+        stale = [
+            job_id for job_id, job in self.jobs.items()
+            if job.is_finished and job.finished_at < cutoff
+        ]
+        for job_id in stale:
+            job = self.jobs.pop(job_id)
+            if self.active_by_game.get(job.game_id) == job_id:
+                del self.active_by_game[job.game_id]
+
+
+# Global job manager instance
+job_manager = BotJobManager()
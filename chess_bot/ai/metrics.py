@@ -0,0 +1,230 @@
+"""
+Metrics - counters, gauges and histograms rendered in the Prometheus text
+exposition format at /metrics/.
+
+Each labelled series has its own small lock, taken only for a few integer
+updates, so recording on the request path stays cheap. Gauges that mirror
+state owned elsewhere (sessions, bots, queue depth) are read by callbacks
+at scrape time instead of being updated on every change.
+"""
+
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[Tuple[str, ...], object] = {}
+        self.lock = Lock()
+        self.callback = None
+
+    def labels(self, *values):
+        """Series for the given label values (created on first use)"""
+        key = tuple(str(value) for value in values)
+        child = self.children.get(key)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def set_function(self, callback: Callable[[], float]):
+        """Read the (unlabelled) value from callback() on every scrape"""
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        if self.callback is not None:
+            try:
+                self.labels().value = self.callback()
+            except Exception as e:
+                print(f"Metrics callback for {self.name} failed: {e}")
+
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        for key, child in sorted(self.children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}']
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0
+        self.lock = Lock()
+
+
+class _CounterChild(_Value):
+    def inc(self, amount: float = 1):
+        with self.lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (or a callback reading one kept elsewhere)"""
+
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class _GaugeChild(_Value):
+    def set(self, value: float):
+        self.value = value
+
+
+class Gauge(_Metric):
+    """Current value, set directly or read from a callback at scrape time"""
+
+    type_name = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    def __init__(self, upper_bounds: List[float]):
+        self.upper_bounds = upper_bounds
+        self.bucket_counts = [0] * len(upper_bounds)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.upper_bounds, value)
+        with self.lock:
+            self.bucket_counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    type_name = 'histogram'
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = sorted(buckets) + [float('inf')]
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_child(self, key, child) -> List[str]:
+        with child.lock:
+            bucket_counts = list(child.bucket_counts)
+            total, count = child.sum, child.count
+
+        lines = []
+        cumulative = 0
+        for upper_bound, bucket_count in zip(self.upper_bounds, bucket_counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(upper_bound)}"'
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class MetricsRegistry:
+    """All metrics of the process, in registration order"""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.lock = Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Global metrics registry
+registry = MetricsRegistry()
+
+# Bot moves
+move_latency = registry.histogram(
+    'bot_move_seconds', 'Time to produce a bot move, by difficulty', ['difficulty'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0)
+)
+moves_total = registry.counter(
+    'bot_moves_total', 'Bot moves by source (book, cache or search)', ['source']
+)
+search_depth = registry.histogram(
+    'bot_search_depth', 'Completed iterative deepening depth per search', ['difficulty'],
+    buckets=(1, 2, 3, 4, 5, 6, 7, 8, 10, 12, 16, 20)
+)
+search_nps = registry.histogram(
+    'bot_search_nodes_per_second', 'Search speed per search',
+    buckets=(1000, 2500, 5000, 10000, 20000, 40000, 80000, 160000)
+)
+tt_probes = registry.counter('bot_tt_probes_total', 'Transposition table lookups')
+tt_hits = registry.counter('bot_tt_hits_total', 'Transposition table lookups returning a usable score')
+
+# Background move jobs
+job_queue_wait = registry.histogram(
+    'bot_job_queue_wait_seconds', 'Time bot move jobs wait for a worker thread',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+job_queue_depth = registry.gauge('bot_job_queue_depth', 'Bot move jobs waiting for a worker thread')
+jobs_running = registry.gauge('bot_jobs_running', 'Bot move jobs currently searching')
+
+# Sessions and bots
+sessions_alive = registry.gauge('bot_sessions', 'Game sessions in the session store')
+bots_alive = registry.gauge('bot_pool_bots', 'Bots assigned to games in this worker')
+bot_pool_evictions = registry.counter('bot_pool_evictions_total', 'Bots evicted from the pool')
+bot_pool_hits = registry.counter('bot_pool_hits_total', 'Bot lookups served by the game\'s existing bot')
+bot_pool_misses = registry.counter('bot_pool_misses_total', 'Bot lookups that had to assign a bot')
+analysis_cache_hits = registry.counter('bot_analysis_cache_hits_total', 'Moves and hints answered from the analysis cache')
+analysis_cache_misses = registry.counter('bot_analysis_cache_misses_total', 'Analysis cache lookups that found nothing usable')
@@ -0,0 +1,17 @@
+from .session_store import worker_id
+
+
+class WorkerAffinityMiddleware:
+    """
+    Adds an X-Bot-Worker header naming the worker that served the request.
+    Load balancers can use it as a sticky routing hint so a game keeps
+    hitting the worker whose bot already holds its search tables.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        response = self.get_response(request)
+        response['X-Bot-Worker'] = worker_id()
+        return response
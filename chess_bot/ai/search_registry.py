@@ -0,0 +1,138 @@
+"""
+Search Registry - tracks cancellation tokens of running bot searches per game,
+so searches can be aborted when the client disconnects, the game is deleted
+or the service shuts down.
+
+Under WSGI a view never learns that its client went away, so searches run
+for a request can be tracked with the request's client socket. A watcher
+thread polls those sockets and cancels a search when its client closes
+the connection.
+"""
+
+import os
+import selectors
+import socket
+import time
+from contextlib import contextmanager
+from threading import Lock, Thread
+from typing import Dict, Optional, Set
+
+from .engine.cancellation import CancellationToken
+
+
+class SearchRegistry:
+    """Running searches by game id"""
+
+    def __init__(self, poll_interval: float = 0.1):
+        self.tokens: Dict[str, Set[CancellationToken]] = {}
+        self.lock = Lock()
+        self.shutting_down = False
+
+        # Client sockets of requests waiting on a search, watched for disconnects
+        self.connections: Dict[CancellationToken, socket.socket] = {}
+        self.poll_interval = poll_interval
+        self.watcher_pid = None
+
+    @contextmanager
+    def track(self, game_id: str, token: Optional[CancellationToken] = None,
+              connection: Optional[socket.socket] = None):
+        """
+        Register a search for a game for the duration of the block.
+        With `connection` (the client socket of the request waiting on the
+        search) the search is cancelled if the client disconnects.
+        Yields the token to hand to Bot.think_timed.
+        """
+        token = token or CancellationToken()
+
+        with self.lock:
+            if self.shutting_down:
+                token.cancel('shutdown')
+            self.tokens.setdefault(game_id, set()).add(token)
+            if connection is not None:
+                self.connections[token] = connection
+
+        if connection is not None:
+            self._ensure_watcher()
+
+        try:
+            yield token
+        finally:
+            with self.lock:
+                self.connections.pop(token, None)
+                game_tokens = self.tokens.get(game_id)
+                if game_tokens is not None:
+                    game_tokens.discard(token)
+                    if not game_tokens:
+                        del self.tokens[game_id]
+
+    def cancel_game(self, game_id: str, reason: str = 'game_deleted') -> int:
+        """Cancel all searches of a game; returns number cancelled"""
+        with self.lock:
+            game_tokens = list(self.tokens.get(game_id, ()))
+
+        for token in game_tokens:
+            token.cancel(reason)
+        return len(game_tokens)
+
+    def cancel_all(self, reason: str = 'shutdown') -> int:
+        """Cancel every running search (service shutdown)"""
+        with self.lock:
+            self.shutting_down = reason == 'shutdown'
+            all_tokens = [token for game_tokens in self.tokens.values() for token in game_tokens]
+
+        for token in all_tokens:
+            token.cancel(reason)
+        return len(all_tokens)
+
+    def get_search_count(self) -> int:
+        with self.lock:
+            return sum(len(game_tokens) for game_tokens in self.tokens.values())
+
+    def _ensure_watcher(self):
+        """Start the connection watcher thread in this process (again after a fork)"""
+        if self.watcher_pid == os.getpid():
+            return
+        with self.lock:
+            if self.watcher_pid == os.getpid():
+                return
+            self.watcher_pid = os.getpid()
+            Thread(target=self._watch_connections, name='search-disconnects', daemon=True).start()
+
+    def _watch_connections(self):
+        while True:
+            with self.lock:
+                watched = list(self.connections.items())
+            if not watched:
+                time.sleep(self.poll_interval)
+                continue
+
+            # A socket turns readable when its client closes it (or sends more data)
+            with selectors.DefaultSelector() as selector:
+                for token, connection in watched:
+                    try:
+                        selector.register(connection, selectors.EVENT_READ, token)
+                    except (ValueError, OSError):
+                        pass  # Already closed by the server
+                ready = selector.select(self.poll_interval) if selector.get_map() else []
+
+            for key, _ in ready:
+                token = key.data
+                with self.lock:
+                    # Whatever the answer, stop watching: pending data would stay readable
+                    self.connections.pop(token, None)
+                if _peer_closed(key.fileobj):
+                    token.cancel('client_disconnected')
+
+
+def _peer_closed(connection: socket.socket) -> bool:
+    """Whether a readable socket was closed by its peer (rather than sent data)"""
+    try:
+        return connection.recv(1, socket.MSG_PEEK) == b''
+    except (BlockingIOError, InterruptedError, ValueError):
+        return False  # No data after all, or a TLS socket that can't peek
+    except OSError:
+        return True  # Connection reset
+
+
+# Global search registry instance
+search_registry = SearchRegistry()
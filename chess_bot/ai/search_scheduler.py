@@ -0,0 +1,132 @@
+"""
+Search Scheduler - runs the searches of many games on a single thread.
+
+Each search is a resumable generator (Bot.think_steps) that pauses every few
+hundred nodes. The scheduler resumes one search at a time, so searches never
+fight over the GIL, and picks the next one by weighted fair share (stride
+scheduling on CPU time, weighted by difficulty). A search close to its
+deadline runs first, so easy games still answer on time when many hard games
+are thinking.
+"""
+
+import os
+import time
+from concurrent.futures import Future
+from threading import Condition, Thread
+from typing import Generator, List, Optional
+
+
+# Share of CPU time a game gets relative to others, by difficulty
+DIFFICULTY_WEIGHTS = {
+    'easy': 1.0,
+    'medium': 1.5,
+    'hard': 2.0,
+}
+
+
+class ScheduledSearch:
+    """A search waiting for or receiving CPU slices"""
+    
+    def __init__(self, steps: Generator, weight: float, deadline: Optional[float], pass_value: float):
+        self.steps = steps
+        self.weight = weight
+        self.deadline = deadline
+        self.pass_value = pass_value  # CPU seconds used / weight
+        self.future = Future()
+        self.slices = 0
+
+
+class SearchScheduler:
+    """Multiplexes resumable searches on one thread"""
+    
+    def __init__(self, slice_nodes: int = 50, urgent_ms: int = 150):
+        self.slice_nodes = slice_nodes  # Nodes searched before yielding to another game
+        self.urgent_s = urgent_ms / 1000  # Searches this close to their deadline run first
+        self.tasks: List[ScheduledSearch] = []
+        self.changed = Condition()
+        self.thread = None
+        self.thread_pid = None
+        
+        # Statistics
+        self.slices_run = 0
+        self.searches_done = 0
+        self.longest_slice_ms = 0.0
+    
+    def submit(self, steps: Generator, weight: float = 1.0, deadline: float = None) -> Future:
+        """
+        Schedule a resumable search. The future resolves to the generator's
+        return value. deadline (time.time()) marks when the search must finish.
+        """
+        with self.changed:
+            # Start level with the least served search so newcomers don't starve others
+            start_pass = min((task.pass_value for task in self.tasks), default=0.0)
+            task = ScheduledSearch(steps, weight, deadline, start_pass)
+            self.tasks.append(task)
+            self.changed.notify()
+        self._ensure_thread()
+        return task.future
+    
+    def run(self, steps: Generator, weight: float = 1.0, deadline: float = None):
+        """Schedule a search and wait for its result"""
+        return self.submit(steps, weight, deadline).result()
+    
+    def get_stats(self) -> dict:
+        with self.changed:
+            return {
+                'searches_queued': len(self.tasks),
+                'searches_done': self.searches_done,
+                'slices_run': self.slices_run,
+                'longest_slice_ms': round(self.longest_slice_ms, 1),
+            }
+    
+    def _next_task(self) -> ScheduledSearch:
+        """Most urgent search near its deadline, otherwise the least served (caller holds lock)"""
+        now = time.time()
+        urgent = [
+            task for task in self.tasks
+            if task.deadline is not None and task.deadline - now <= self.urgent_s
+        ]
+        if urgent:
+            return min(urgent, key=lambda task: task.deadline)
+        return min(self.tasks, key=lambda task: task.pass_value)
+    
+    def _ensure_thread(self):
+        """Start the scheduler thread in this process (again after a fork)"""
+        if self.thread_pid == os.getpid():
+            return
+        with self.changed:
+            if self.thread_pid == os.getpid():
+                return
+            self.thread_pid = os.getpid()
+            self.thread = Thread(target=self._loop, name='search-scheduler', daemon=True)
+            self.thread.start()
+    
+    def _loop(self):
+        while True:
+            with self.changed:
+                self.changed.wait_for(lambda: self.tasks)
+                task = self._next_task()
+            
+            start = time.perf_counter()
+            finished = True
+            try:
+                next(task.steps)
+                finished = False
+            except StopIteration as done:
+                task.future.set_result(done.value)
+            except Exception as e:
+                task.future.set_exception(e)
+            elapsed = time.perf_counter() - start
+            
+            with self.changed:
+                task.pass_value += elapsed / task.weight
+                task.slices += 1
+                self.slices_run += 1
+                self.longest_slice_ms = max(self.longest_slice_ms, elapsed * 1000)
+                if finished:
+                    self.tasks.remove(task)
+                    self.searches_done += 1
+
+
+# Global search scheduler instance (used when BOT_SEARCH_MODE is 'scheduler')
+search_scheduler = SearchScheduler()
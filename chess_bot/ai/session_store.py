@@ -0,0 +1,203 @@
+"""
+Session Stores - pluggable backends holding compact game session state
+(start FEN, move list and a few settings) so that any worker process,
+or a restarted one, can serve any game.
+
+Backends:
+    memory  - per-process dict (single worker, default)
+    sqlite  - SQLite file shared by workers on one host
+    redis   - Redis shared by workers on many hosts (needs the `redis` package)
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from threading import Lock
+from typing import Dict, List, Optional
+
+
+def worker_id() -> str:
+    """
+    Identifies this worker in sticky routing hints. Computed on use: with
+    gunicorn's preload_app this module is imported in the master, before
+    the workers are forked.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SessionStore:
+    """Interface for session backends. State is a JSON-serializable dict."""
+    
+    # Sessions may be created by other processes, whose expiry this process
+    # hasn't scheduled, so the manager also purges the store now and then
+    shared = True
+    
+    def load(self, game_id: str) -> Optional[dict]:
+        raise NotImplementedError
+    
+    def save(self, game_id: str, state: dict):
+        raise NotImplementedError
+    
+    def delete(self, game_id: str) -> bool:
+        raise NotImplementedError
+    
+    def count(self) -> int:
+        raise NotImplementedError
+    
+    def purge_expired(self, timeout: int) -> List[str]:
+        """Delete sessions not accessed for `timeout` seconds; returns their ids"""
+        raise NotImplementedError
+
+
+class InMemorySessionStore(SessionStore):
+    """Sessions in a process-local dict, locked per stripe of game ids"""
+    
+    # Every session is created here, so the manager's expiry heap covers them all
+    shared = False
+    
+    def __init__(self, lock_stripes: int = 64):
+        self.states: Dict[str, dict] = {}
+        self.locks = [Lock() for _ in range(lock_stripes)]
+    
+    def _lock_for(self, game_id: str) -> Lock:
+        return self.locks[hash(game_id) % len(self.locks)]
+    
+    def load(self, game_id):
+        with self._lock_for(game_id):
+            state = self.states.get(game_id)
+            return dict(state, moves=list(state['moves'])) if state else None
+    
+    def save(self, game_id, state):
+        with self._lock_for(game_id):
+            self.states[game_id] = dict(state, moves=list(state['moves']))
+    
+    def delete(self, game_id):
+        with self._lock_for(game_id):
+            return self.states.pop(game_id, None) is not None
+    
+    def count(self):
+        return len(self.states)
+    
+    def purge_expired(self, timeout):
+        cutoff = time.time() - timeout
+        expired = []
+        for game_id, state in list(self.states.items()):
+            if state['last_accessed'] < cutoff:
+                with self._lock_for(game_id):
+                    state = self.states.get(game_id)
+                    if state and state['last_accessed'] < cutoff:
+                        del self.states[game_id]
+                        expired.append(game_id)
+        return expired
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in an SQLite file, shared by all workers on the host"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.local = threading.local()
+        
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS bot_sessions ('
+                ' game_id TEXT PRIMARY KEY,'
+                ' state TEXT NOT NULL,'
+                ' last_accessed REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS bot_sessions_last_accessed'
+                ' ON bot_sessions (last_accessed)'
+            )
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+    
+    def load(self, game_id):
+        row = self._connection().execute(
+            'SELECT state FROM bot_sessions WHERE game_id = ?', (game_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def save(self, game_id, state):
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO bot_sessions (game_id, state, last_accessed)'
+                ' VALUES (?, ?, ?)',
+                (game_id, json.dumps(state), state['last_accessed'])
+            )
+    
+    def delete(self, game_id):
+        with self._connection() as conn:
+            cursor = conn.execute('DELETE FROM bot_sessions WHERE game_id = ?', (game_id,))
+            return cursor.rowcount > 0
+    
+    def count(self):
+        return self._connection().execute('SELECT COUNT(*) FROM bot_sessions').fetchone()[0]
+    
+    def purge_expired(self, timeout):
+        cutoff = time.time() - timeout
+        with self._connection() as conn:
+            expired = [
+                row[0] for row in conn.execute(
+                    'SELECT game_id FROM bot_sessions WHERE last_accessed < ?', (cutoff,)
+                )
+            ]
+            conn.execute('DELETE FROM bot_sessions WHERE last_accessed < ?', (cutoff,))
+        return expired
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions in Redis, shared by workers on any host. Expiry uses Redis TTLs."""
+    
+    def __init__(self, client, timeout: int = 3600, prefix: str = 'bot:game:'):
+        self.client = client
+        self.timeout = timeout
+        self.prefix = prefix
+    
+    @classmethod
+    def from_url(cls, url: str, timeout: int = 3600):
+        import redis
+        return cls(redis.Redis.from_url(url, decode_responses=True), timeout)
+    
+    def _key(self, game_id):
+        return f"{self.prefix}{game_id}"
+    
+    def load(self, game_id):
+        data = self.client.get(self._key(game_id))
+        return json.loads(data) if data else None
+    
+    def save(self, game_id, state):
+        self.client.set(self._key(game_id), json.dumps(state), ex=self.timeout)
+    
+    def delete(self, game_id):
+        return self.client.delete(self._key(game_id)) > 0
+    
+    def count(self):
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}*", count=1000))
+    
+    def purge_expired(self, timeout):
+        # Redis expires keys on its own
+        return []
+
+
+def create_session_store(backend: str = 'memory', sqlite_path: str = None,
+                         redis_url: str = None, timeout: int = 3600) -> SessionStore:
+    """Build a session store by backend name"""
+    if backend == 'memory':
+        return InMemorySessionStore()
+    if backend == 'sqlite':
+        return SQLiteSessionStore(sqlite_path or 'bot_sessions.sqlite3')
+    if backend == 'redis':
+        return RedisSessionStore.from_url(redis_url or 'redis://localhost:6379/2', timeout)
+    raise ValueError(f"Unknown session backend: {backend}")
@@ -1,3 +1,323 @@
-from django.test import TestCase
+import fnmatch
+import os
+import socket
+import tempfile
+import time
+from threading import Event
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .bot_pool import BotPool
+from .engine_pool import EnginePool, positions_from_moves
+from .metrics import MetricsRegistry
+from chess_core.board import Board
+from .engine.bot import Bot
+from .game_session import GameSessionManager
+from .jobs import BotJobManager, JobConflict
+from .search_registry import SearchRegistry
+from .session_store import InMemorySessionStore, SQLiteSessionStore, RedisSessionStore
+
+
+class FakeRedis:
+    """In-process stand-in for the few redis-py calls the session store uses"""
+    
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+    
+    def _alive(self, key):
+        if key in self.expiry and self.expiry[key] <= time.time():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return key in self.data
+    
+    def get(self, key):
+        return self.data[key] if self._alive(key) else None
+    
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        if ex is not None:
+            self.expiry[key] = time.time() + ex
+        return True
+    
+    def delete(self, *keys):
+        return sum(1 for key in keys if self._alive(key) and self.data.pop(key) is not None)
+    
+    def scan_iter(self, match='*', count=None):
+        return [key for key in list(self.data) if self._alive(key) and fnmatch.fnmatch(key, match)]
+
+
+class SessionStoreTests(SimpleTestCase):
+    """Every backend must round-trip sessions the same way"""
+    
+    def make_stores(self):
+        tmp_dir = tempfile.mkdtemp()
+        return [
+            InMemorySessionStore(),
+            SQLiteSessionStore(os.path.join(tmp_dir, 'sessions.sqlite3')),
+            RedisSessionStore(FakeRedis()),
+        ]
+    
+    def test_games_survive_manager_restart(self):
+        for store in self.make_stores():
+            with self.subTest(store=type(store).__name__):
+                manager = GameSessionManager(store)
+                game_id = manager.create_game('black', 'hard')
+                manager.update_game(game_id, 'ignored', 'e2e4')
+                
+                # A different worker (or a restarted one) sees the same game
+                other_worker = GameSessionManager(store)
+                session = other_worker.get_game(game_id)
+                
+                self.assertEqual(session.moves, ['e2e4'])
+                self.assertEqual(session.player_color, 'black')
+                self.assertEqual(session.difficulty, 'hard')
+                self.assertEqual(store.count(), 1)
+                
+                self.assertTrue(other_worker.delete_game(game_id))
+                self.assertIsNone(manager.get_game(game_id))
+    
+    def test_position_is_replayed_from_move_list(self):
+        store = InMemorySessionStore()
+        manager = GameSessionManager(store)
+        game_id = manager.create_game()
+        
+        state = store.load(game_id)
+        state['moves'] = ['e2e4', 'e7e5', 'g1f3']
+        state['fen'] = None
+        store.save(game_id, state)
+        
+        session = manager.get_game(game_id)
+        self.assertEqual(
+            session.fen,
+            'rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2'
+        )
+        self.assertEqual(session.start_fen, Board.START_FEN)
+    
+    def test_expired_sessions_are_removed(self):
+        for store in self.make_stores()[:2]:
+            with self.subTest(store=type(store).__name__):
+                manager = GameSessionManager(store, timeout=60)
+                game_id = manager.create_game()
+                
+                state = store.load(game_id)
+                state['last_accessed'] = time.time() - 120
+                store.save(game_id, state)
+                
+                self.assertEqual(store.purge_expired(60), [game_id])
+                self.assertIsNone(manager.get_game(game_id))
+
+
+class BotPoolTests(SimpleTestCase):
+    """Bots are evicted least recently used first and recycled"""
+    
+    def make_pool(self, **kwargs):
+        return BotPool(bot_factory=lambda: Bot(use_opening_book=False), **kwargs)
+    
+    def test_evicts_least_recently_used(self):
+        pool = self.make_pool(max_bots=2)
+        first = pool.get_bot('b-game')
+        pool.get_bot('a-game')
+        pool.get_bot('b-game')  # b is now most recently used
+        pool.get_bot('c-game')
+        
+        self.assertIs(pool.get_bot('b-game'), first)
+        self.assertNotIn('a-game', pool.bots)
+        stats = pool.get_stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 3)
+    
+    def test_bot_in_use_is_not_evicted_or_recycled(self):
+        pool = self.make_pool(max_bots=1)
+        with pool.use_bot('busy') as busy:
+            # Handed out but not yet searching
+            other = pool.get_bot('other')
+            self.assertIs(pool.bots['busy'], busy)
+            self.assertIsNot(other, busy)
+            
+            pool.remove_bot('busy')
+            self.assertNotIn(busy, pool.free_bots)
+        
+        # Recycled once its caller is done with it
+        self.assertIn(busy, pool.free_bots)
+        self.assertEqual(pool.in_use, {})
+    
+    def test_removed_bots_are_reset_and_reused(self):
+        pool = self.make_pool()
+        bot = pool.get_bot('old-game', 'hard')
+        bot.set_position('8/8/8/8/8/8/8/K6k w - - 0 1')
+        pool.remove_bot('old-game')
+        
+        reused = pool.get_bot('new-game', 'easy')
+        self.assertIs(reused, bot)
+        self.assertEqual(reused.get_board_fen(), Board.START_FEN)
+        self.assertEqual(reused.max_think_time_ms, 500)
+        self.assertEqual(pool.get_stats()['recycled'], 1)
+    
+    def test_session_expiry_releases_bot(self):
+        pool = self.make_pool()
+        manager = GameSessionManager(InMemorySessionStore(), timeout=60)
+        manager.add_expiry_listener(pool.remove_bot)
+        game_id = manager.create_game()
+        pool.get_bot(game_id)
+        
+        state = manager.store.load(game_id)
+        state['last_accessed'] = time.time() - 120
+        manager.store.save(game_id, state)
+        
+        self.assertIsNone(manager.get_game(game_id))
+        self.assertEqual(manager.sweep(now=time.time() + 60), [game_id])
+        self.assertEqual(pool.get_bot_count(), 0)
+
+
+class SessionSweeperTests(SimpleTestCase):
+    """Expiry is driven by the heap, without scanning the store"""
+    
+    def test_sweep_reschedules_games_still_in_use(self):
+        manager = GameSessionManager(InMemorySessionStore(), timeout=60)
+        active = manager.create_game()
+        idle = manager.create_game()
+        later = time.time() + 61  # Both heap entries are due
+        
+        # The active game was used 40s after it was scheduled
+        state = manager.store.load(active)
+        state['last_accessed'] += 40
+        manager.store.save(active, state)
+        
+        self.assertEqual(manager.sweep(now=later), [idle])
+        self.assertIsNone(manager.store.load(idle))
+        self.assertIsNotNone(manager.store.load(active))
+        self.assertEqual([game_id for _, game_id in manager.expiry_heap], [active])
+        self.assertGreater(manager.expiry_heap[0][0], later)
+    
+    def test_sweep_handles_many_sessions(self):
+        manager = GameSessionManager(InMemorySessionStore(), timeout=60)
+        game_ids = [manager.create_game() for _ in range(10000)]
+        
+        start = time.time()
+        manager.get_game(game_ids[0])
+        self.assertLess(time.time() - start, 0.05)
+        
+        self.assertEqual(len(manager.sweep(now=time.time() + 120)), 10000)
+        self.assertEqual(manager.get_game_count(), 0)
+
+
+    def test_reads_write_back_only_stale_access_times(self):
+        manager = GameSessionManager(InMemorySessionStore(), timeout=600, touch_interval=60)
+        game_id = manager.create_game()
+        saves = []
+        save = manager.store.save
+        manager.store.save = lambda game_id, state: saves.append(game_id) or save(game_id, state)
+        
+        for _ in range(10):
+            manager.get_game(game_id)
+        self.assertEqual(saves, [])
+        
+        state = manager.store.load(game_id)
+        state['last_accessed'] -= 61
+        save(game_id, state)
+        manager.get_game(game_id)
+        self.assertEqual(saves, [game_id])
+    
+    def test_process_local_store_is_never_scanned(self):
+        store = InMemorySessionStore()
+        store.purge_expired = lambda timeout: self.fail('full purge of an in-memory store')
+        manager = GameSessionManager(store, timeout=60)
+        manager.create_game()
+        manager.last_store_purge = 0
+        self.assertEqual(len(manager.sweep(now=time.time() + 120)), 1)
+
+
+class JobManagerTests(SimpleTestCase):
+    """One bot move at a time per game"""
+    
+    def test_reserved_slot_blocks_second_move_until_released(self):
+        manager = BotJobManager(max_workers=1)
+        job = manager.reserve('game')
+        with self.assertRaises(JobConflict):
+            manager.reserve('game')
+        self.assertEqual(manager.active_job_id('game'), job.job_id)
+        
+        manager.release(job)
+        self.assertIsNone(manager.active_job_id('game'))
+        self.assertIsNone(manager.get_job(job.job_id))
+        manager.reserve('game')
+    
+    def test_queue_depth_counts_only_jobs_handed_to_threads(self):
+        manager = BotJobManager(max_workers=1)
+        manager.reserve('inline')  # A synchronous move searching on its request thread
+        self.assertEqual(manager.get_queue_depth(), (0, 0))
+        
+        started, finish = Event(), Event()
+        manager.submit('first', lambda job: started.set() or finish.wait(5))
+        manager.submit('second', lambda job: {})
+        self.assertTrue(started.wait(5))
+        self.assertEqual(manager.get_queue_depth(), (1, 1))
+        finish.set()
+        manager.executor.shutdown(wait=True)
+        self.assertEqual(manager.get_queue_depth(), (0, 0))
+
+
+class SearchRegistryTests(SimpleTestCase):
+    """Searches of a request stop when its client disconnects"""
+    
+    def test_client_disconnect_cancels_search(self):
+        registry = SearchRegistry(poll_interval=0.02)
+        server_side, client_side = socket.socketpair()
+        with registry.track('game', connection=server_side) as token:
+            time.sleep(0.1)
+            self.assertFalse(token.is_cancelled)
+            
+            client_side.close()
+            deadline = time.time() + 2
+            while not token.is_cancelled and time.time() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(token.reason, 'client_disconnected')
+        server_side.close()
+
+
+class EnginePoolTests(SimpleTestCase):
+    """Batch analysis spreads games over worker processes"""
+    
+    def test_analyzes_every_position_of_a_game(self):
+        positions = positions_from_moves(Board.START_FEN, ['e2e4', 'e7e5'])
+        self.assertEqual([p['played_move'] for p in positions], ['e2e4', 'e7e5', None])
+        
+        pool = EnginePool(max_workers=2, chunk_size=2)
+        try:
+            tasks = [dict(p, index=i) for i, p in enumerate(positions)]
+            results = list(pool.analyze([tasks], time_ms=5000, max_depth=2))
+        finally:
+            pool.shutdown()
+        
+        self.assertEqual(sorted(r['index'] for r in results), [0, 1, 2])
+        for result in results:
+            self.assertEqual(result['depth'], 2)
+            self.assertEqual(result['pv'][0], result['best_move'])
+    
+    def test_illegal_move_is_rejected(self):
+        with self.assertRaises(ValueError):
+            positions_from_moves(Board.START_FEN, ['e2e4', 'e2e4'])
+
+
+class MetricsTests(SimpleTestCase):
+    """Metrics render in the Prometheus text format"""
+    
+    def test_render(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram('move_seconds', 'Move latency', ['difficulty'], buckets=(0.5, 1.0))
+        moves = registry.counter('moves_total', 'Moves', ['source'])
+        bots = registry.gauge('bots', 'Bots alive')
+        
+        latency.labels('easy').observe(0.3)
+        latency.labels('easy').observe(0.7)
+        moves.labels('book').inc()
+        bots.set_function(lambda: 3)
+        
+        text = registry.render()
+        self.assertIn('move_seconds_bucket{difficulty="easy",le="0.5"} 1', text)
+        self.assertIn('move_seconds_bucket{difficulty="easy",le="+Inf"} 2', text)
+        self.assertIn('move_seconds_count{difficulty="easy"} 2', text)
+        self.assertIn('moves_total{source="book"} 1', text)
+        self.assertIn('# TYPE bots gauge\nbots 3', text)
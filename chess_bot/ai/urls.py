@@ -9,6 +9,16 @@ urlpatterns = [
     path('games/<str:game_id>/', views.get_game, name='get_game'),
     path('games/<str:game_id>/move/', views.make_move, name='make_move'),
     path('games/<str:game_id>/delete/', views.delete_game, name='delete_game'),
+    path('games/<str:game_id>/hint/', views.get_hint, name='get_hint'),
+    
+    # Background bot move jobs
+    path('games/<str:game_id>/jobs/<str:job_id>/', views.get_job, name='get_job'),
+    path('games/<str:game_id>/jobs/<str:job_id>/stream/', views.stream_job, name='stream_job'),
+    path('games/<str:game_id>/jobs/<str:job_id>/stop/', views.stop_job, name='stop_job'),
+    path('games/<str:game_id>/jobs/<str:job_id>/cancel/', views.cancel_job, name='cancel_job'),
+    
+    # Analysis
+    path('analyze/batch/', views.analyze_batch, name='analyze_batch'),
     
     # Utility endpoints
     path('stats/', views.get_stats, name='stats'),
@@ -2,58 +2,77 @@
 Improved Django views with game session support and better bot configuration.
 """
 
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+import asyncio
 import json
+import time
 
-from .engine.move import Move
+from chess_core.move import Move
 from .engine.bot import Bot
-from .engine.board import Board
+from chess_core.board import Board
+from chess_core.move_generator import MoveGenerator
+from .engine.cancellation import CancellationToken
+from .engine.analysis_cache import AnalysisCache
 from .game_session import game_manager
+from .bot_pool import BotPool
+from .engine_pool import engine_pool, positions_from_moves
+from .jobs import job_manager, JobConflict
+from .search_registry import search_registry
+from .search_scheduler import search_scheduler, DIFFICULTY_WEIGHTS
+from .warmup import startup_report
+from . import metrics
 
 
-# Bot instances with different difficulty levels
-# We keep multiple bot instances to avoid conflicts between games
-class BotPool:
-    """Pool of bot instances for handling multiple games"""
+def _create_analysis_cache() -> AnalysisCache:
+    """Build the shared analysis cache from Django settings"""
+    from django.conf import settings
     
-    def __init__(self):
-        self.bots = {}
-        self.max_bots = 100  # Maximum concurrent games
-    
-    def get_bot(self, game_id: str, difficulty: str = 'medium') -> Bot:
-        """Get or create bot for game"""
-        if game_id not in self.bots:
-            if len(self.bots) >= self.max_bots:
-                # Remove oldest bot
-                oldest = min(self.bots.keys())
-                del self.bots[oldest]
-            
-            bot = Bot()
-            # Configure bot based on difficulty
-            if difficulty == 'easy':
-                bot.max_think_time_ms = 500
-                bot.use_max_think_time = True
-            elif difficulty == 'medium':
-                bot.max_think_time_ms = 2000
-                bot.use_max_think_time = True
-            elif difficulty == 'hard':
-                bot.max_think_time_ms = 5000
-                bot.use_max_think_time = False
-            
-            self.bots[game_id] = bot
-        
-        return self.bots[game_id]
+    return AnalysisCache(
+        max_entries=getattr(settings, 'BOT_ANALYSIS_CACHE_ENTRIES', 50000),
+        disk_path=getattr(settings, 'BOT_ANALYSIS_CACHE_PATH', None) or None,
+    )
+
+
+# Global analysis cache - search results shared by every game
+analysis_cache = _create_analysis_cache()
+
+
+def _create_bot_pool() -> BotPool:
+    """Build the bot pool from Django settings"""
+    from django.conf import settings
     
-    def remove_bot(self, game_id: str):
-        """Remove bot from pool"""
-        if game_id in self.bots:
-            del self.bots[game_id]
+    pool = BotPool(
+        max_bots=getattr(settings, 'BOT_POOL_MAX_BOTS', 100),
+        max_bytes=getattr(settings, 'BOT_POOL_MAX_MB', 2048) * 1024 * 1024,
+        idle_timeout=game_manager.timeout,
+        bot_factory=lambda: Bot(analysis_cache=analysis_cache),
+    )
+    # Free a game's bot as soon as its session expires
+    game_manager.add_expiry_listener(pool.remove_bot)
+    return pool
+
+
+# Global bot pool - one bot per game so searches don't share state
+bot_pool = _create_bot_pool()
+
 
+def _register_metric_callbacks():
+    """Metrics read from service state at scrape time"""
+    metrics.sessions_alive.set_function(game_manager.get_game_count)
+    metrics.bots_alive.set_function(bot_pool.get_bot_count)
+    metrics.bot_pool_evictions.set_function(lambda: bot_pool.evictions)
+    metrics.bot_pool_hits.set_function(lambda: bot_pool.hits)
+    metrics.bot_pool_misses.set_function(lambda: bot_pool.misses)
+    metrics.analysis_cache_hits.set_function(lambda: analysis_cache.hits + analysis_cache.disk_hits)
+    metrics.analysis_cache_misses.set_function(lambda: analysis_cache.misses)
+    metrics.job_queue_depth.set_function(lambda: job_manager.get_queue_depth()[0])
+    metrics.jobs_running.set_function(lambda: job_manager.get_queue_depth()[1])
 
-# Global bot pool
-bot_pool = BotPool()
+
+_register_metric_callbacks()
 
 
 @csrf_exempt
@@ -96,11 +115,10 @@ def create_game(request):
         # If player is black, bot makes first move
         first_move = None
         if player_color == 'black':
-            bot = bot_pool.get_bot(game_id, difficulty)
-            bot.set_position(starting_fen)
-            
             time_ms = 1000 if difficulty == 'easy' else 2000
-            move_uci, evaluation, nodes = bot.think_timed(time_ms)
+            with bot_pool.use_bot(game_id, difficulty) as bot:
+                bot.set_position(starting_fen)
+                move_uci, evaluation, nodes = bot.think_timed(time_ms)
             
             if move_uci:
                 move_obj = Move.from_uci(move_uci)
@@ -167,14 +185,192 @@ def get_game(request, game_id):
         }, status=400)
 
 
+def _search_mode() -> str:
+    """'threads' searches on the request/job thread, 'scheduler' on the shared scheduler"""
+    from django.conf import settings
+    return getattr(settings, 'BOT_SEARCH_MODE', 'threads')
+
+
+SEARCH_MODE = _search_mode()
+
+
+# Think time per difficulty
+THINK_TIME_MS = {
+    'easy': 500,
+    'medium': 2000,
+    'hard': 5000
+}
+
+
+def _find_legal_move(legal_moves, move_uci):
+    """Return the generated move matching UCI notation (keeps flags like en passant)"""
+    for legal_move in legal_moves:
+        if legal_move.to_uci() == move_uci:
+            return legal_move
+    return None
+
+
+def _is_bot_turn(session, board) -> bool:
+    """Check if it's the bot's turn in the given position"""
+    player_is_white = session.player_color == 'white'
+    return board.white_to_move != player_is_white
+
+
+def _request_deadline(request):
+    """
+    Absolute deadline (unix time in seconds) propagated by the caller
+    through the X-Request-Deadline header, if any.
+    """
+    header = request.headers.get('X-Request-Deadline')
+    if not header:
+        return None
+    try:
+        return float(header)
+    except ValueError:
+        return None
+
+
+def _client_connection(request):
+    """
+    Client socket of a WSGI request, when the server exposes it (gunicorn
+    does, runserver doesn't), so a search can be cancelled on disconnect.
+    """
+    return request.META.get('gunicorn.socket')
+
+
+def _record_move_metrics(bot, difficulty, elapsed, nodes, tt_probes, tt_hits):
+    """Record latency and search statistics of one bot move"""
+    metrics.move_latency.labels(difficulty).observe(elapsed)
+    
+    if bot.latest_move_is_book_move:
+        metrics.moves_total.labels('book').inc()
+    elif bot.latest_move_is_cached:
+        metrics.moves_total.labels('cache').inc()
+    else:
+        metrics.moves_total.labels('search').inc()
+        metrics.search_depth.labels(difficulty).observe(bot.searcher.current_depth)
+        if elapsed > 0:
+            metrics.search_nps.observe(nodes / elapsed)
+        metrics.tt_probes.inc(tt_probes)
+        metrics.tt_hits.inc(tt_hits)
+
+
+def _bot_reply(game_id, session, board, player_move=None, job=None,
+               cancel_token=None, deadline=None, connection=None):
+    """
+    Let the bot answer in the current position and record its move.
+    When run as a background job, progress is reported on the job;
+    otherwise `connection` is the waiting client's socket, if known.
+    A cancelled search (job cancel, client disconnect, game deletion,
+    shutdown) leaves the game untouched.
+    Returns: (response_payload, http_status)
+    """
+    gen = MoveGenerator()
+    
+    # Pinned so no other game can be handed this bot mid-search
+    with bot_pool.use_bot(game_id, session.difficulty) as bot:
+        bot.set_position(board.to_fen())
+        
+        progress_callback = None
+        if job:
+            cancel_token = job.cancel_token
+            
+            def progress_callback(depth, best_move, evaluation, nodes):
+                job.update_progress(depth, best_move, evaluation, nodes)
+                if job.stop_requested:
+                    bot.stop_thinking()
+            
+            job.interrupt = bot.stop_thinking
+        
+        time_ms = THINK_TIME_MS.get(session.difficulty, 2000)
+        
+        tt = bot.searcher.transposition_table
+        tt_probes, tt_hits = tt.probes, tt.hits
+        start = time.perf_counter()
+        try:
+            with search_registry.track(game_id, cancel_token, connection) as token:
+                if SEARCH_MODE == 'scheduler':
+                    # Interleave with other games' searches on the scheduler thread
+                    bot_move_uci, evaluation, nodes = search_scheduler.run(
+                        bot.think_steps(time_ms, progress_callback, cancel_token=token,
+                                        deadline=deadline, slice_nodes=search_scheduler.slice_nodes),
+                        weight=DIFFICULTY_WEIGHTS.get(session.difficulty, 1.0),
+                        deadline=min(time.time() + time_ms / 1000, deadline or float('inf'))
+                    )
+                else:
+                    bot_move_uci, evaluation, nodes = bot.think_timed(
+                        time_ms, progress_callback, cancel_token=token, deadline=deadline
+                    )
+        finally:
+            if job:
+                job.interrupt = None
+        elapsed = time.perf_counter() - start
+        
+        if token.is_cancelled:
+            return {
+                'success': False,
+                'error': 'Search cancelled',
+                'reason': token.reason
+            }, 409
+        
+        if not bot_move_uci:
+            return {
+                'success': False,
+                'error': 'Bot failed to find a move'
+            }, 500
+        
+        _record_move_metrics(bot, session.difficulty, elapsed, nodes,
+                             tt.probes - tt_probes, tt.hits - tt_hits)
+        search_info = {
+            'is_book_move': bot.latest_move_is_book_move,
+            'is_cached_move': bot.latest_move_is_cached,
+            'pv': bot.latest_analysis.pv if bot.latest_analysis else None,
+        }
+    
+    # Apply bot's move
+    bot_move = _find_legal_move(gen.generate_moves(board), bot_move_uci) or Move.from_uci(bot_move_uci)
+    board.make_move(bot_move)
+    game_manager.update_game(game_id, board.to_fen(), bot_move_uci)
+    
+    # Check if game is over after bot's move
+    legal_moves_final = gen.generate_moves(board)
+    
+    game_over = False
+    result = None
+    winner = None
+    
+    if len(legal_moves_final) == 0:
+        game_over = True
+        in_check = gen.is_in_check(board)
+        result = 'checkmate' if in_check else 'stalemate'
+        winner = 'bot' if in_check else None
+    elif board.fifty_move_counter >= 100:
+        game_over = True
+        result = 'draw'
+    
+    return {
+        'success': True,
+        'player_move': player_move,
+        'bot_move': bot_move_uci,
+        'new_fen': board.to_fen(),
+        'evaluation': evaluation,
+        'nodes_searched': nodes,
+        **search_info,
+        'game_over': game_over,
+        'result': result,
+        'winner': winner
+    }, 200
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
-def make_move(request, game_id):
+async def make_move(request, game_id):
     """
     Make a move in a specific game and get bot's response.
     
     Request body: {
-        "move": "e2e4"  // UCI notation
+        "move": "e2e4",  // UCI notation
+        "async": false   // optional, see below
     }
     
     Returns: {
@@ -186,45 +382,107 @@ def make_move(request, game_id):
         "game_over": false,
         "result": null
     }
+    
+    With "async": true (or ?async=1) the player's move is applied and the
+    bot's reply runs as a background job. Responds 202 with:
+    {
+        "success": true,
+        "job_id": "uuid-here",
+        "job_url": "/api/bot/games/{game_id}/jobs/{job_id}/",
+        "stream_url": "/api/bot/games/{game_id}/jobs/{job_id}/stream/"
+    }
+    In async mode "move" may be omitted to let the bot move when it is its turn
+    (e.g. after a cancelled job).
     """
+    # Search in a worker thread so this coroutine notices a client disconnect
+    # under ASGI (the server cancels it) and can abort the search instead of
+    # finishing it. Under WSGI the search watches the client socket instead.
+    cancel_token = CancellationToken()
     try:
-        # Get game session
-        session = game_manager.get_game(game_id)
-        if not session:
+        return await sync_to_async(_make_move, thread_sensitive=False)(
+            request, game_id, cancel_token
+        )
+    except asyncio.CancelledError:
+        cancel_token.cancel('client_disconnected')
+        raise
+
+
+def _make_move(request, game_id, cancel_token):
+    """Synchronous part of make_move"""
+    try:
+        if not game_manager.get_game(game_id):
             return JsonResponse({
                 'success': False,
                 'error': 'Game not found or expired'
             }, status=404)
         
         # Parse request
-        data = json.loads(request.body)
+        data = json.loads(request.body) if request.body else {}
         player_move = data.get('move')
+        run_async = bool(data.get('async')) or request.GET.get('async') in ('1', 'true')
         
-        if not player_move:
+        if not player_move and not run_async:
             return JsonResponse({
                 'success': False,
                 'error': 'No move provided'
             }, status=400)
         
-        # Load current position
-        board = Board(session.fen)
-        
-        # Make player's move
-        from .engine.move import Move
-        from .engine.move_generator import MoveGenerator
-        
-        move = Move.from_uci(player_move)
+        # Hold the game's job slot while its session changes, so a concurrent
+        # request can't apply a second move; the bot's reply runs under it too
+        try:
+            job = job_manager.reserve(game_id)
+        except JobConflict:
+            return JsonResponse({
+                'success': False,
+                'error': 'Bot move already in progress',
+                'job_id': job_manager.active_job_id(game_id)
+            }, status=409)
         
+        started = False
+        try:
+            response = _apply_move(request, game_id, job, player_move, run_async, cancel_token)
+            started = response.status_code == 202
+            return response
+        finally:
+            if not started:
+                job_manager.release(job)
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
+
+def _apply_move(request, game_id, job, player_move, run_async, cancel_token):
+    """
+    Apply the player's move and get (or start) the bot's reply, holding the
+    game's reserved job slot. Responds 202 once the job has been started.
+    """
+    # Read the session only now that no other move can be in flight
+    session = game_manager.get_game(game_id)
+    if not session:
+        return JsonResponse({
+            'success': False,
+            'error': 'Game not found or expired'
+        }, status=404)
+    
+    # Load current position
+    board = Board(session.fen)
+    gen = MoveGenerator()
+    
+    if player_move:
         # Validate move is legal
-        gen = MoveGenerator()
         legal_moves = gen.generate_moves(board)
-        legal_move_ucis = [m.to_uci() for m in legal_moves]
+        move = _find_legal_move(legal_moves, player_move)
         
-        if player_move not in legal_move_ucis:
+        if move is None:
             return JsonResponse({
                 'success': False,
                 'error': 'Illegal move',
-                'legal_moves': legal_move_ucis
+                'legal_moves': [m.to_uci() for m in legal_moves]
             }, status=400)
         
         # Apply player's move
@@ -261,66 +519,333 @@ def make_move(request, game_id):
                 'result': 'draw',
                 'reason': 'fifty_move_rule'
             })
+    elif not _is_bot_turn(session, board):
+        return JsonResponse({
+            'success': False,
+            'error': 'No move provided and it is not the bot\'s turn'
+        }, status=400)
+    
+    if run_async:
+        def run_job(job):
+            payload, status = _bot_reply(game_id, session, board, player_move, job)
+            if status >= 500:
+                raise RuntimeError(payload['error'])
+            return payload
         
-        # Get bot's move
-        bot = bot_pool.get_bot(game_id, session.difficulty)
-        bot.set_position(board.to_fen())
-        
-        # Calculate think time based on difficulty
-        time_ms = {
-            'easy': 500,
-            'medium': 2000,
-            'hard': 5000
-        }.get(session.difficulty, 2000)
+        job_manager.start(job, run_job)
         
-        bot_move_uci, evaluation, nodes = bot.think_timed(time_ms)
+        return JsonResponse({
+            'success': True,
+            'player_move': player_move,
+            'new_fen': board.to_fen(),
+            'job_id': job.job_id,
+            'job_url': f'/api/bot/games/{game_id}/jobs/{job.job_id}/',
+            'stream_url': f'/api/bot/games/{game_id}/jobs/{job.job_id}/stream/'
+        }, status=202)
+    
+    # Get bot's move (cancelling the reserved job cancels this search)
+    job.cancel_token = cancel_token
+    payload, status = _bot_reply(
+        game_id, session, board, player_move,
+        cancel_token=cancel_token, deadline=_request_deadline(request),
+        connection=_client_connection(request)
+    )
+    return JsonResponse(payload, status=status)
+
+
+def _get_game_job(game_id, job_id):
+    """Look up a job and make sure it belongs to the game"""
+    job = job_manager.get_job(job_id)
+    if job and job.game_id == game_id:
+        return job
+    return None
+
+
+@require_http_methods(["GET"])
+def get_job(request, game_id, job_id):
+    """
+    Poll a bot move job.
+    
+    Returns: {
+        "success": true,
+        "job_id": "...",
+        "status": "pending" | "running" | "done" | "cancelled" | "failed",
+        "progress": {"depth": 6, "evaluation": 35, "best_move": "g1f3", "nodes_searched": 48211},
+        "result": {...same payload as the synchronous move endpoint...} or null,
+        "elapsed_ms": 1530
+    }
+    """
+    job = _get_game_job(game_id, job_id)
+    if not job:
+        return JsonResponse({
+            'success': False,
+            'error': 'Job not found'
+        }, status=404)
+    
+    return JsonResponse({'success': True, **job.to_dict()})
+
+
+@require_http_methods(["GET"])
+def stream_job(request, game_id, job_id):
+    """
+    Stream job progress as Server-Sent Events.
+    Emits "progress" events while the bot thinks and a final "done",
+    "cancelled" or "failed" event with the job state.
+    """
+    job = _get_game_job(game_id, job_id)
+    if not job:
+        return JsonResponse({
+            'success': False,
+            'error': 'Job not found'
+        }, status=404)
+    
+    def event_stream():
+        version = -1
+        while True:
+            new_version = job.wait_for_change(version, timeout=15)
+            if new_version == version:
+                # Keep the connection alive through proxies
+                yield ': keep-alive\n\n'
+                continue
+            version = new_version
+            
+            state = job.to_dict()
+            event = state['status'] if job.is_finished else 'progress'
+            yield f'event: {event}\ndata: {json.dumps(state)}\n\n'
+            
+            if job.is_finished:
+                break
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def stop_job(request, game_id, job_id):
+    """Tell the bot to move now with the best move found so far"""
+    job = _get_game_job(game_id, job_id)
+    if not job or not job_manager.stop(job_id):
+        return JsonResponse({
+            'success': False,
+            'error': 'Job not found or already finished'
+        }, status=404)
+    
+    return JsonResponse({'success': True, **job.to_dict()})
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def cancel_job(request, game_id, job_id):
+    """Abort the bot's search without playing a move"""
+    job = _get_game_job(game_id, job_id)
+    if not job or not job_manager.cancel(job_id):
+        return JsonResponse({
+            'success': False,
+            'error': 'Job not found or already finished'
+        }, status=404)
+    
+    return JsonResponse({'success': True, **job.to_dict()})
+
+
+@require_http_methods(["GET"])
+def get_hint(request, game_id):
+    """
+    Suggest a move for the side to move in a game.
+    Answered from the shared analysis cache without searching when the
+    position has been analysed before; otherwise runs a short search.
+    
+    Query params:
+        min_depth - accept cached analysis at least this deep (default 1)
+        time_ms   - search time on a cache miss (default 1000, max 5000)
+    
+    Returns: {
+        "success": true,
+        "best_move": "e2e4",
+        "evaluation": 25,
+        "depth": 8,
+        "pv": ["e2e4", "e7e5", ...],
+        "cached": true
+    }
+    """
+    try:
+        session = game_manager.get_game(game_id)
+        if not session:
+            return JsonResponse({
+                'success': False,
+                'error': 'Game not found or expired'
+            }, status=404)
         
-        if not bot_move_uci:
+        try:
+            min_depth = max(1, int(request.GET.get('min_depth', 1)))
+            time_ms = min(5000, max(50, int(request.GET.get('time_ms', 1000))))
+        except ValueError:
             return JsonResponse({
                 'success': False,
-                'error': 'Bot failed to find a move'
-            }, status=500)
+                'error': 'min_depth and time_ms must be integers'
+            }, status=400)
         
-        # Apply bot's move
-        bot_move = Move.from_uci(bot_move_uci)
-        board.make_move(bot_move)
-        game_manager.update_game(game_id, board.to_fen(), bot_move_uci)
+        board = Board(session.fen)
+        budget_ms = THINK_TIME_MS.get(session.difficulty, 2000)
         
-        # Check if game is over after bot's move
-        legal_moves_final = gen.generate_moves(board)
+        cached = analysis_cache.lookup(board.zobrist_key, budget_ms, min_depth)
+        if cached:
+            return JsonResponse(dict(cached.to_dict(), success=True, cached=True))
         
-        game_over = False
-        result = None
-        winner = None
+        if not MoveGenerator().generate_moves(board):
+            return JsonResponse({
+                'success': False,
+                'error': 'No legal moves available'
+            }, status=400)
         
-        if len(legal_moves_final) == 0:
-            game_over = True
-            in_check = gen.is_in_check(board)
-            result = 'checkmate' if in_check else 'stalemate'
-            winner = 'bot' if in_check else None
-        elif board.fifty_move_counter >= 100:
-            game_over = True
-            result = 'draw'
+        # Hold the game's job slot so no bot move (or other hint) searches on its bot meanwhile
+        try:
+            job = job_manager.reserve(game_id)
+        except JobConflict:
+            return JsonResponse({
+                'success': False,
+                'error': 'Bot is thinking in this game, try again shortly',
+                'job_id': job_manager.active_job_id(game_id)
+            }, status=409)
         
+        try:
+            with bot_pool.use_bot(game_id, session.difficulty) as bot:
+                bot.set_position(session.fen)
+                with search_registry.track(game_id, job.cancel_token, _client_connection(request)) as token:
+                    move_uci, evaluation, nodes = bot.think_timed(
+                        time_ms, cancel_token=token, deadline=_request_deadline(request)
+                    )
+                
+                if token.is_cancelled:
+                    return JsonResponse({
+                        'success': False,
+                        'error': 'Search cancelled',
+                        'reason': token.reason
+                    }, status=409)
+                
+                if bot.latest_analysis:
+                    analysis = bot.latest_analysis.to_dict()
+                else:
+                    # Opening book move
+                    analysis = {'best_move': move_uci, 'evaluation': evaluation, 'depth': 0,
+                                'pv': [move_uci], 'nodes': nodes, 'budget_ms': 0}
+                
+                return JsonResponse(dict(
+                    analysis,
+                    success=True,
+                    cached=bot.latest_move_is_cached,
+                    is_book_move=bot.latest_move_is_book_move
+                ))
+        finally:
+            job_manager.release(job)
+    
+    except Exception as e:
         return JsonResponse({
-            'success': True,
-            'player_move': player_move,
-            'bot_move': bot_move_uci,
-            'new_fen': board.to_fen(),
-            'evaluation': evaluation,
-            'nodes_searched': nodes,
-            'game_over': game_over,
-            'result': result,
-            'winner': winner
-        })
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
+
+# Per-position limits for batch analysis
+BATCH_MAX_TIME_MS = 10000
+BATCH_MAX_DEPTH = 30
+BATCH_MAX_NODES = 5_000_000
+
+
+def _parse_batch_request(data):
+    """
+    Turn a batch analysis request into position groups (one per game) and
+    search limits. Raises on invalid input.
+    """
+    from django.conf import settings
+    
+    groups = []
     
+    fens = data.get('positions') or []
+    if fens:
+        groups.append([{'fen': fen} for fen in fens])
+    
+    games = list(data.get('games') or [])
+    if data.get('moves'):
+        games.append({'start_fen': data.get('start_fen'), 'moves': data['moves']})
+    for game_index, game in enumerate(games):
+        positions = positions_from_moves(game.get('start_fen') or Board.START_FEN, game.get('moves') or [])
+        groups.append([dict(position, game=game_index) for position in positions])
+    
+    tasks = [task for group in groups for task in group]
+    if not tasks:
+        raise ValueError('Provide "positions" (FENs), "moves" or "games"')
+    
+    max_positions = getattr(settings, 'BOT_BATCH_MAX_POSITIONS', 1000)
+    if len(tasks) > max_positions:
+        raise ValueError(f'At most {max_positions} positions per request')
+    
+    for index, task in enumerate(tasks):
+        task['index'] = index
+        Board(task['fen'])  # Reject malformed FENs before any work is queued
+    
+    time_ms = min(int(data.get('time_ms', 1000)), BATCH_MAX_TIME_MS)
+    max_depth = data.get('depth')
+    max_nodes = data.get('nodes')
+    if max_depth is not None:
+        max_depth = max(1, min(int(max_depth), BATCH_MAX_DEPTH))
+    if max_nodes is not None:
+        max_nodes = max(1, min(int(max_nodes), BATCH_MAX_NODES))
+    
+    return groups, time_ms, max_depth, max_nodes
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def analyze_batch(request):
+    """
+    Analyse many positions in parallel on the engine process pool.
+    
+    Request body: {
+        "positions": ["fen", ...],                      // independent positions, and/or
+        "moves": ["e2e4", ...], "start_fen": "...",     // every position of one game, and/or
+        "games": [{"start_fen": "...", "moves": [...]}],
+        "depth": 8,        // per-position limits: depth and/or nodes,
+        "nodes": 200000,   // and time_ms (default 1000, max 10000)
+        "time_ms": 1000
+    }
+    
+    Streams NDJSON, one line per position as it completes (any order):
+        {"index": 0, "fen": "...", "best_move": "e2e4", "evaluation": 30,
+         "depth": 8, "nodes": 15234, "pv": [...], "game": 0, "ply": 0, "played_move": "d2d4"}
+    followed by {"done": true, "count": N, "elapsed_ms": ...}.
+    Evaluations are in centipawns from the side to move.
+    """
+    try:
+        data = json.loads(request.body) if request.body else {}
+        groups, time_ms, max_depth, max_nodes = _parse_batch_request(data)
     except Exception as e:
-        import traceback
-        traceback.print_exc()
         return JsonResponse({
             'success': False,
             'error': str(e)
         }, status=400)
+    
+    def result_stream():
+        start = time.time()
+        count = 0
+        try:
+            for result in engine_pool.analyze(groups, time_ms, max_depth, max_nodes):
+                count += 1
+                yield json.dumps(result) + '\n'
+        except Exception as e:
+            yield json.dumps({'error': str(e)}) + '\n'
+        yield json.dumps({
+            'done': True,
+            'count': count,
+            'elapsed_ms': int((time.time() - start) * 1000)
+        }) + '\n'
+    
+    response = StreamingHttpResponse(result_stream(), content_type='application/x-ndjson')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @csrf_exempt
@@ -328,6 +853,12 @@ def make_move(request, game_id):
 def delete_game(request, game_id):
     """Delete a game session"""
     try:
+        # Stop any bot search still running for this game
+        active_job_id = job_manager.active_job_id(game_id)
+        if active_job_id:
+            job_manager.cancel(active_job_id)
+        search_registry.cancel_game(game_id, 'game_deleted')
+        
         success = game_manager.delete_game(game_id)
         bot_pool.remove_bot(game_id)
         
@@ -355,10 +886,25 @@ def get_stats(request):
     return JsonResponse({
         'success': True,
         'active_games': game_manager.get_game_count(),
-        'total_bots': len(bot_pool.bots)
+        'total_bots': bot_pool.get_bot_count(),
+        'bot_pool': bot_pool.get_stats(),
+        'active_jobs': job_manager.get_job_count(),
+        'running_searches': search_registry.get_search_count(),
+        'analysis_cache': analysis_cache.get_stats(),
+        'search_scheduler': search_scheduler.get_stats() if SEARCH_MODE == 'scheduler' else None,
+        'startup': startup_report
     })
 
 
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """Service metrics in the Prometheus text format"""
+    return HttpResponse(
+        metrics.registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 @require_http_methods(["GET"])
 def health_check(request):
     """Health check endpoint"""
@@ -0,0 +1,73 @@
+"""
+Warm-up - builds the engine's immutable tables (Zobrist keys, move generator
+tables, opening book) and a few ready-to-use bots when the service starts,
+instead of on the first game.
+
+Run by the WSGI/ASGI entry points (bot/wsgi.py, bot/asgi.py), so only
+processes that serve requests pay for it, not manage.py commands such as
+migrate or test. With gunicorn's preload_app (see gunicorn.conf.py) this
+happens once in the master process and forked workers share the tables
+copy-on-write.
+"""
+
+import importlib
+import os
+import time
+
+
+# Timings of the last warm-up, shown by /api/bot/stats/
+startup_report = {}
+
+
+def warm_up(bots: int = 2) -> dict:
+    """Build engine tables and `bots` pooled bots; returns timings in ms"""
+    report = {'pid': os.getpid()}
+    start = time.perf_counter()
+    
+    # Engine and view modules (also creates the session manager and bot pool)
+    step = time.perf_counter()
+    views = importlib.import_module('ai.views')
+    report['import_ms'] = _elapsed_ms(step)
+    
+    from chess_core.zobrist import Zobrist
+    from .engine.book_loader import load_opening_book
+    
+    step = time.perf_counter()
+    if Zobrist.pieces_array is None:
+        Zobrist.initialize()
+    report['zobrist_ms'] = _elapsed_ms(step)
+    
+    step = time.perf_counter()
+    book_data = load_opening_book()
+    report['opening_book_ms'] = _elapsed_ms(step)
+    report['opening_book_positions'] = len(book_data) if book_data else 0
+    
+    # Bots need their own transposition tables, so only these are per bot
+    step = time.perf_counter()
+    report['bots_built'] = views.bot_pool.prewarm(bots)
+    report['bots_ms'] = _elapsed_ms(step)
+    
+    report['total_ms'] = _elapsed_ms(start)
+    
+    startup_report.clear()
+    startup_report.update(report)
+    
+    print(
+        f"Bot warm-up in {report['total_ms']}ms "
+        f"(imports {report['import_ms']}ms, zobrist {report['zobrist_ms']}ms, "
+        f"opening book {report['opening_book_ms']}ms / {report['opening_book_positions']} positions, "
+        f"{report['bots_built']} bots {report['bots_ms']}ms)"
+    )
+    return report
+
+
+def warm_up_for_serving():
+    """Warm up as configured in settings (BOT_WARMUP, BOT_WARMUP_BOTS)"""
+    from django.conf import settings
+    
+    if getattr(settings, 'BOT_WARMUP', True):
+        warm_up(bots=getattr(settings, 'BOT_WARMUP_BOTS', 2))
+
+
+def _elapsed_ms(since: float) -> float:
+    return round((time.perf_counter() - since) * 1000, 1)
@@ -39,6 +39,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'ai.middleware.WorkerAffinityMiddleware',
 ]
 
 # CORS Settings - Allow main server and frontend to communicate
@@ -88,6 +89,35 @@ DATABASES = {
     }
 }
 
+# Bot game sessions
+# 'memory' keeps games in each worker process; use 'sqlite' (one host) or
+# 'redis' (many hosts) to share games between workers and survive restarts.
+BOT_SESSION_BACKEND = os.environ.get('BOT_SESSION_BACKEND', 'memory')
+BOT_SESSION_SQLITE_PATH = os.environ.get('BOT_SESSION_SQLITE_PATH', str(BASE_DIR / 'bot_sessions.sqlite3'))
+BOT_REDIS_URL = os.environ.get('BOT_REDIS_URL', 'redis://localhost:6379/2')
+BOT_SESSION_TIMEOUT = int(os.environ.get('BOT_SESSION_TIMEOUT', 3600))  # seconds
+
+# Bot pool: at most this many per-game bots (least recently used are recycled)
+BOT_POOL_MAX_BOTS = int(os.environ.get('BOT_POOL_MAX_BOTS', 100))
+BOT_POOL_MAX_MB = int(os.environ.get('BOT_POOL_MAX_MB', 2048))  # estimated bot memory budget
+
+# Search results shared by all games (set a path to also keep them on disk)
+BOT_ANALYSIS_CACHE_ENTRIES = int(os.environ.get('BOT_ANALYSIS_CACHE_ENTRIES', 50000))
+BOT_ANALYSIS_CACHE_PATH = os.environ.get('BOT_ANALYSIS_CACHE_PATH', '')
+
+# Batch analysis runs on a process pool (defaults to one worker per CPU)
+BOT_ENGINE_WORKERS = int(os.environ['BOT_ENGINE_WORKERS']) if os.environ.get('BOT_ENGINE_WORKERS') else None
+BOT_BATCH_MAX_POSITIONS = int(os.environ.get('BOT_BATCH_MAX_POSITIONS', 1000))
+
+# 'threads': each bot move searches on its own request/job thread.
+# 'scheduler': all searches are interleaved on one thread in small slices,
+# giving predictable latency when many (mostly easy/medium) games run at once.
+BOT_SEARCH_MODE = os.environ.get('BOT_SEARCH_MODE', 'threads')
+
+# Build engine tables and a few bots at startup (see ai/warmup.py)
+BOT_WARMUP = os.environ.get('BOT_WARMUP', 'True') == 'True'
+BOT_WARMUP_BOTS = int(os.environ.get('BOT_WARMUP_BOTS', 2))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
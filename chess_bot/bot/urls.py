@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from ai import views as ai_views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/bot/', include('ai.urls')),
+    path('metrics/', ai_views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bot.settings')
 
 application = get_wsgi_application()
+
+# Build engine tables and a few bots before serving (not for manage.py commands)
+from ai.warmup import warm_up_for_serving  # noqa: E402
+
+warm_up_for_serving()
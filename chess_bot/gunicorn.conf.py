@@ -0,0 +1,38 @@
+"""
+Gunicorn configuration for the bot service.
+
+    gunicorn -c gunicorn.conf.py bot.wsgi:application
+
+The app is preloaded so the warm-up in bot/wsgi.py (engine tables,
+opening book, pooled bots) runs once in the master. Forked workers then
+share those objects copy-on-write instead of each building their own.
+"""
+
+import gc
+import multiprocessing
+import os
+
+
+bind = os.environ.get('BOT_BIND', '0.0.0.0:8001')
+workers = int(os.environ.get('BOT_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('BOT_THREADS', 4))
+timeout = 120  # Hard difficulty thinks for 5 seconds, batch analysis streams longer
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Move everything built so far out of the garbage collector's generations,
+    # so collections in the workers don't write to (and copy) the shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from ai.warmup import startup_report
+    server.log.info(f"Worker {worker.pid} forked from warm master ({startup_report.get('total_ms')}ms warm-up)")
+
+
+def worker_exit(server, worker):
+    # Stop searches of background jobs still running, so the worker exits now
+    # instead of waiting for each to use its full think time
+    from ai.search_registry import search_registry
+    search_registry.cancel_all()
@@ -0,0 +1,248 @@
+"""
+Load test for the bot HTTP API.
+
+Simulates concurrent players against a running bot service: each player
+creates a game, plays random legal moves (with a think time between them)
+until the game ends or a move limit is reached, deletes the game and
+starts another one until the test duration is over.
+
+Usage (from the chess_bot directory, with the bot server running):
+    python loadtest.py --players 20 --duration 60 --difficulty easy medium
+    python loadtest.py --players 50 --output results/v1.2.json --baseline results/v1.1.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+from chess_core.board import Board
+from chess_core.move_generator import MoveGenerator
+
+
+class Recorder:
+    """Collects request latencies and errors from all players"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)   # endpoint -> [seconds]
+        self.errors = defaultdict(lambda: defaultdict(int))  # endpoint -> reason -> count
+        self.games_finished = 0
+        self.bot_moves = 0
+
+    def record(self, endpoint, elapsed, error=None):
+        with self.lock:
+            self.latencies[endpoint].append(elapsed)
+            if error:
+                self.errors[endpoint][error] += 1
+
+    def finish_game(self, bot_moves):
+        with self.lock:
+            self.games_finished += 1
+            self.bot_moves += bot_moves
+
+
+class Player(threading.Thread):
+    """One simulated player playing games back to back"""
+
+    def __init__(self, index, args, recorder, stop_at):
+        super().__init__(name=f'player-{index}', daemon=True)
+        self.args = args
+        self.recorder = recorder
+        self.stop_at = stop_at
+        self.rng = random.Random(args.seed + index if args.seed is not None else None)
+        self.gen = MoveGenerator()
+
+    def request(self, endpoint, method, path, body=None):
+        """Send a request; returns parsed JSON or None on failure"""
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(
+            self.args.url.rstrip('/') + path, data=data, method=method,
+            headers={'Content-Type': 'application/json'}
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.args.timeout) as response:
+                payload = json.loads(response.read() or b'{}')
+            self.recorder.record(endpoint, time.perf_counter() - start)
+            return payload
+        except urllib.error.HTTPError as e:
+            self.recorder.record(endpoint, time.perf_counter() - start, f'http_{e.code}')
+        except Exception as e:
+            self.recorder.record(endpoint, time.perf_counter() - start, type(e).__name__)
+        return None
+
+    def run(self):
+        while time.time() < self.stop_at:
+            self.play_game()
+
+    def play_game(self):
+        difficulty = self.rng.choice(self.args.difficulty)
+        color = self.rng.choice(['white', 'black'])
+        created = self.request('create', 'POST', '/api/bot/games/create/',
+                               {'player_color': color, 'difficulty': difficulty})
+        if not created or not created.get('success'):
+            time.sleep(1)  # Don't hammer a failing server
+            return
+
+        game_id = created['game_id']
+        board = Board(created['starting_fen'])
+        bot_moves = 1 if created.get('bot_first_move') else 0
+
+        for _ in range(self.args.max_moves):
+            if time.time() >= self.stop_at:
+                break
+
+            legal_moves = self.gen.generate_moves(board)
+            if not legal_moves:
+                break
+            move = self.rng.choice(legal_moves).to_uci()
+
+            time.sleep(self.rng.uniform(self.args.think_min, self.args.think_max))
+
+            result = self.request('move', 'POST', f'/api/bot/games/{game_id}/move/', {'move': move})
+            if not result or not result.get('success'):
+                break
+            bot_moves += 1 if result.get('bot_move') else 0
+            board = Board(result['new_fen'])
+            if result.get('game_over'):
+                break
+
+        self.request('delete', 'DELETE', f'/api/bot/games/{game_id}/delete/')
+        self.recorder.finish_game(bot_moves)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(recorder, elapsed):
+    """Throughput, latency percentiles (ms) and error rates per endpoint"""
+    endpoints = {}
+    total_requests = 0
+    total_errors = 0
+
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        latencies = sorted(latencies)
+        errors = sum(recorder.errors[endpoint].values())
+        total_requests += len(latencies)
+        total_errors += errors
+        endpoints[endpoint] = {
+            'requests': len(latencies),
+            'throughput_rps': round(len(latencies) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+            'max_ms': round(latencies[-1] * 1000, 1),
+            'error_rate': round(errors / len(latencies), 4),
+            'errors': dict(recorder.errors[endpoint]),
+        }
+
+    return {
+        'duration_s': round(elapsed, 1),
+        'requests': total_requests,
+        'throughput_rps': round(total_requests / elapsed, 2),
+        'bot_moves_per_s': round(recorder.bot_moves / elapsed, 2),
+        'games_finished': recorder.games_finished,
+        'error_rate': round(total_errors / total_requests, 4) if total_requests else 0,
+        'endpoints': endpoints,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def print_summary(summary, baseline=None):
+    print(f"\nDuration {summary['duration_s']}s, {summary['requests']} requests "
+          f"({summary['throughput_rps']} req/s), {summary['bot_moves_per_s']} bot moves/s, "
+          f"{summary['games_finished']} games, error rate {summary['error_rate']:.2%}")
+    print(f"{'endpoint':<10}{'requests':>10}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}")
+    for endpoint, stats in summary['endpoints'].items():
+        print(f"{endpoint:<10}{stats['requests']:>10}{stats['throughput_rps']:>9}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['error_rate']:>9.2%}")
+
+    if baseline:
+        print("\nChange vs baseline:")
+        for endpoint, stats in summary['endpoints'].items():
+            old = baseline['summary']['endpoints'].get(endpoint)
+            if not old:
+                continue
+            changes = [
+                f"{key} {old[key]} -> {stats[key]} ({(stats[key] - old[key]) / old[key]:+.1%})"
+                for key in ('throughput_rps', 'p95_ms', 'p99_ms') if old[key]
+            ]
+            print(f"  {endpoint}: " + ', '.join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the bot HTTP API with simulated players')
+    parser.add_argument('--url', default='http://localhost:8001', help='Bot service base URL')
+    parser.add_argument('--players', type=int, default=10, help='Concurrent simulated players')
+    parser.add_argument('--duration', type=float, default=60, help='Test duration in seconds')
+    parser.add_argument('--difficulty', nargs='+', default=['easy', 'medium'],
+                        choices=['easy', 'medium', 'hard'], help='Difficulties to pick from')
+    parser.add_argument('--think-min', type=float, default=0.5, help='Minimum player think time (s)')
+    parser.add_argument('--think-max', type=float, default=2.0, help='Maximum player think time (s)')
+    parser.add_argument('--max-moves', type=int, default=40, help='Player moves per game before resigning')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which players start')
+    parser.add_argument('--timeout', type=float, default=30, help='Request timeout (s)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible runs')
+    parser.add_argument('--output', default=None, help='Write results JSON here')
+    parser.add_argument('--baseline', default=None, help='Earlier results JSON to compare against')
+    args = parser.parse_args()
+
+    print(f"Load testing {args.url} with {args.players} players for {args.duration}s "
+          f"(difficulty {', '.join(args.difficulty)}, think {args.think_min}-{args.think_max}s)")
+
+    recorder = Recorder()
+    start = time.time()
+    stop_at = start + args.duration
+    players = [Player(i, args, recorder, stop_at) for i in range(args.players)]
+    for i, player in enumerate(players):
+        player.start()
+        if args.ramp_up and args.players > 1:
+            time.sleep(args.ramp_up / args.players)
+
+    # Players finish their current request after the deadline
+    for player in players:
+        player.join(timeout=max(0, stop_at - time.time()) + args.timeout + 5)
+
+    summary = summarize(recorder, time.time() - start)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_summary(summary, baseline)
+
+    output = args.output or os.path.join('loadtest-results', time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'config': vars(args),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'host': platform.node(),
+            'started_at': start,
+            'summary': summary,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == '__main__':
+    main()
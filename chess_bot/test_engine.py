@@ -4,11 +4,12 @@ Run this to verify all components work correctly.
 """
 
 import time
-from chess_bot.ai.engine.board import Board
-from chess_bot.ai.engine.move import Move
-from chess_bot.ai.engine.move_generator import MoveGenerator
+from chess_core.board import Board
+from chess_core.move import Move
+from chess_core.move_generator import MoveGenerator
+from chess_core.piece import Piece
 from chess_bot.ai.engine.searcher import Searcher
-from chess_bot.ai.engine.zobrist import Zobrist
+from chess_core.zobrist import Zobrist
 
 
 def test_board_setup():
@@ -37,6 +38,32 @@ def test_zobrist_hashing():
     print("✓ Zobrist hashing works")
 
 
+def test_packed_position():
+    """Test the fixed-size binary position encoding"""
+    print("\n=== Test: Packed Position ===")
+    from chess_core.packed_position import PACKED_SIZE, pack_fen, position_key
+    
+    board = Board()
+    gen = MoveGenerator()
+    # Walk a game with castling rights, en passant files and captures
+    for move_uci in ['e2e4', 'd7d5', 'e4d5', 'c7c5', 'd5c6', 'b8c6', 'g1f3', 'e7e5', 'f1b5']:
+        packed = board.to_packed()
+        assert len(packed) == PACKED_SIZE
+        assert packed == pack_fen(board.to_fen()), "FEN and Board encodings should agree"
+        
+        restored = Board.from_packed(packed)
+        assert restored.to_fen() == board.to_fen()
+        assert restored.zobrist_key == board.zobrist_key
+        
+        move = next(m for m in gen.generate_moves(board) if m.to_uci() == move_uci)
+        board.make_move(move)
+    
+    # Keys ignore the move clocks, like the opening book's FENs
+    assert position_key(Board.START_FEN) == position_key(Board.START_FEN.replace(' 0 1', ' 5 9'))
+    assert len({board.to_packed(), Board().to_packed()}) == 2, "Packed positions are hashable keys"
+    print(f"✓ Packed position works ({PACKED_SIZE} bytes)")
+
+
 def test_make_unmake():
     """Test make and unmake move"""
     print("\n=== Test: Make/Unmake Move ===")
@@ -91,6 +118,27 @@ def test_check_detection():
     print("✓ Check detection works")
 
 
+def test_gives_check():
+    """Test check prediction and cached check status"""
+    print("\n=== Test: Gives Check ===")
+    from chess_core.attacks import gives_check
+    
+    # Discovered check (Nd4 uncovers the e-file rook), a quiet king move, direct check (Bb5+)
+    board = Board("4k3/8/8/8/8/8/4N3/4RKB1 w - - 0 1")
+    assert gives_check(board, Move.from_uci("e2d4").value), "Discovered check"
+    assert not gives_check(board, Move.from_uci("f1f2").value)
+    assert gives_check(Board("4k3/8/8/8/8/8/8/4KB2 w - - 0 1"), Move.from_uci("f1b5").value), "Direct check"
+    
+    # Check status is cached per position and restored on unmake
+    board = Board("4k3/8/8/8/8/8/8/4KB2 w - - 0 1")
+    move = Move.from_uci("f1b5")
+    board.make_move(move, in_search=True)
+    assert board.is_in_check() and board.get_checkers() == 1 << 33
+    board.unmake_move(move, in_search=True)
+    assert not board.is_in_check()
+    print("✓ Gives check works")
+
+
 def test_move_generation():
     """Test move generation"""
     print("\n=== Test: Move Generation ===")
@@ -157,6 +205,102 @@ def test_search_basic():
     print("✓ Search works")
 
 
+def test_search_cancellation():
+    """Test external cancellation and absolute deadlines"""
+    print("\n=== Test: Search Cancellation ===")
+    import threading
+    from chess_bot.ai.engine.cancellation import CancellationToken
+    
+    searcher = Searcher(Board())
+    
+    # Deadline earlier than the time budget wins
+    start = time.time()
+    best_move, _, _ = searcher.start_search(5000, deadline=time.time() + 0.2)
+    elapsed = time.time() - start
+    print(f"Deadline search took {elapsed:.2f}s")
+    assert elapsed < 1.0, "Search should stop at the deadline"
+    assert best_move is not None, "Should still return a move"
+    
+    # Cancelling from another thread stops the search promptly
+    token = CancellationToken()
+    threading.Timer(0.2, token.cancel, args=('client_disconnected',)).start()
+    start = time.time()
+    searcher.start_search(5000, cancel_token=token)
+    elapsed = time.time() - start
+    print(f"Cancelled search took {elapsed:.2f}s ({token.reason})")
+    assert elapsed < 1.0, "Search should stop when cancelled"
+    assert token.reason == 'client_disconnected'
+    
+    print("✓ Search cancellation works")
+
+
+def test_analysis_cache():
+    """Test that finished searches are reused across bots"""
+    print("\n=== Test: Analysis Cache ===")
+    import os
+    import tempfile
+    from chess_bot.ai.engine.bot import Bot
+    from chess_bot.ai.engine.analysis_cache import AnalysisCache
+    
+    fen = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+    disk_path = os.path.join(tempfile.mkdtemp(), 'analysis.sqlite3')
+    cache = AnalysisCache(disk_path=disk_path)
+    
+    first = Bot(use_opening_book=False, analysis_cache=cache)
+    first.set_position(fen)
+    move, evaluation, nodes = first.think_timed(300)
+    assert nodes > 0 and not first.latest_move_is_cached
+    assert first.latest_analysis.pv[0] == move, "PV should start with the best move"
+    
+    # Another game reaching the position gets the answer without searching
+    second = Bot(use_opening_book=False, analysis_cache=cache)
+    second.set_position(fen)
+    start = time.time()
+    cached_move, cached_eval, cached_nodes = second.think_timed(300)
+    print(f"Cached answer in {(time.time() - start) * 1000:.1f}ms: {cached_move}")
+    assert (cached_move, cached_eval, cached_nodes) == (move, evaluation, 0)
+    assert second.latest_move_is_cached
+    
+    # A bigger budget needs a deeper search, unless its depth is enough
+    assert cache.lookup(Board(fen).zobrist_key, 2000) is None
+    assert cache.lookup(Board(fen).zobrist_key, 2000, min_depth=1) is not None
+    
+    # The disk tier survives a restart
+    restarted = AnalysisCache(disk_path=disk_path)
+    assert restarted.lookup(Board(fen).zobrist_key, 300).best_move == move
+    
+    print("✓ Analysis cache works")
+
+
+def test_search_scheduler():
+    """Test that searches of several games interleave on one scheduler thread"""
+    print("\n=== Test: Search Scheduler ===")
+    from chess_bot.ai.engine.bot import Bot
+    from chess_bot.ai.search_scheduler import SearchScheduler
+    
+    fens = [
+        "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+        "rnbqkb1r/pp2pppp/3p1n2/8/3NP3/8/PPP2PPP/RNB1KB1R w KQkq - 1 5",
+    ]
+    scheduler = SearchScheduler(slice_nodes=50)
+    futures = []
+    for weight, fen in zip((1.0, 2.0), fens):
+        bot = Bot(use_opening_book=False)
+        bot.set_position(fen)
+        futures.append(scheduler.submit(bot.think_steps(300, slice_nodes=50), weight=weight))
+    
+    for future in futures:
+        move, evaluation, nodes = future.result(timeout=10)
+        print(f"Scheduled search: {move} ({nodes} nodes)")
+        assert move is not None and nodes > 0
+    
+    stats = scheduler.get_stats()
+    assert stats['searches_done'] == 2 and stats['searches_queued'] == 0
+    assert stats['slices_run'] > 2, "Searches should have been split into slices"
+    
+    print("✓ Search scheduler works")
+
+
 def test_transposition_table():
     """Test transposition table"""
     print("\n=== Test: Transposition Table ===")
@@ -207,6 +351,37 @@ def test_move_ordering():
     print("✓ Move ordering works")
 
 
+def test_quiet_move_statistics():
+    """Test counter moves and bounded history updates"""
+    print("\n=== Test: Quiet Move Statistics ===")
+    from chess_core.move_generator import new_move_buffer
+    from chess_bot.ai.engine.move_ordering import MoveOrdering, MAX_HISTORY, continuation_key
+    
+    board = Board()
+    gen = MoveGenerator()
+    ordering = MoveOrdering()
+    buffer = new_move_buffer()
+    count = gen.generate_move_values(board, buffer)
+    moves = list(buffer[:count])
+    
+    # g1f3 refuted the previous move; a3, tried first, failed to cut
+    previous_key = continuation_key(Piece.BLACK | Piece.PAWN, 36)
+    g1f3 = Move.from_uci("g1f3").value
+    a2a3 = Move.from_uci("a2a3").value
+    for _ in range(200):
+        ordering.update_quiet_stats(g1f3, [a2a3], board, 10, 1, previous_key)
+    
+    ordered = ordering.order_move_values(buffer, count, board, 0, 1, previous_key)
+    assert ordered[0] == g1f3, "Killer / counter move should come first"
+    assert ordered[-1] == a2a3, "Penalized move should come last"
+    assert sorted(ordered) == sorted(moves)
+    assert all(abs(value) <= MAX_HISTORY for value in ordering.history), "History should stay bounded"
+    
+    ordering.age_history()
+    assert max(ordering.history) <= MAX_HISTORY // 2
+    print("✓ Quiet move statistics work")
+
+
 def test_repetition_detection():
     """Test repetition detection"""
     print("\n=== Test: Repetition Detection ===")
@@ -292,14 +467,20 @@ def run_all_tests():
     tests = [
         test_board_setup,
         test_zobrist_hashing,
+        test_packed_position,
         test_make_unmake,
         test_check_detection,
         test_move_generation,
+        test_gives_check,
         test_checkmate_detection,
         test_transposition_table,
         test_move_ordering,
+        test_quiet_move_statistics,
         test_repetition_detection,
         test_search_basic,
+        test_search_cancellation,
+        test_analysis_cache,
+        test_search_scheduler,
         test_performance,
     ]
     
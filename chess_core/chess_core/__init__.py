@@ -0,0 +1,11 @@
+"""
+chess_core - the board, move generator and Zobrist hashing shared by the
+game server (move validation) and the chess bot (search).
+"""
+
+from .piece import Piece
+from .move import Move, SQUARE_NAMES
+from .board import Board, GameState
+from .move_generator import MoveGenerator, new_move_buffer, MAX_MOVES
+from .zobrist import Zobrist
+from .perft import perft, PERFT_POSITIONS
@@ -0,0 +1,229 @@
+"""
+Attack tables - precomputed knight, king, pawn and ray squares, and the check
+queries built on them: attacked squares, checkers, pinned pieces and whether
+a move gives check (without making it).
+
+Bitmasks use bit n for square n. Directions follow MoveGenerator's
+direction_offsets: 0-3 are orthogonal (N, S, W, E), 4-7 diagonal
+(NW, SE, NE, SW).
+"""
+
+from .piece import Piece
+from .move import Move
+
+
+DIRECTION_OFFSETS = [8, -8, -1, 1, 7, -7, 9, -9]
+_DIRECTION_STEPS = [(1, 0), (-1, 0), (0, -1), (0, 1), (1, -1), (-1, 1), (1, 1), (-1, -1)]
+_KNIGHT_STEPS = [(2, -1), (2, 1), (-2, -1), (-2, 1), (1, 2), (-1, 2), (1, -2), (-1, -2)]
+
+
+def _squares_at(square, steps):
+    rank, file = divmod(square, 8)
+    return [
+        (rank + rank_step) * 8 + file + file_step
+        for rank_step, file_step in steps
+        if 0 <= rank + rank_step < 8 and 0 <= file + file_step < 8
+    ]
+
+
+def _ray(square, direction):
+    rank, file = divmod(square, 8)
+    rank_step, file_step = _DIRECTION_STEPS[direction]
+    squares = []
+    rank += rank_step
+    file += file_step
+    while 0 <= rank < 8 and 0 <= file < 8:
+        squares.append(rank * 8 + file)
+        rank += rank_step
+        file += file_step
+    return squares
+
+
+def _mask(squares):
+    mask = 0
+    for square in squares:
+        mask |= 1 << square
+    return mask
+
+
+KNIGHT_SQUARES = [_squares_at(square, _KNIGHT_STEPS) for square in range(64)]
+KING_SQUARES = [_squares_at(square, _DIRECTION_STEPS) for square in range(64)]
+KNIGHT_MASKS = [_mask(squares) for squares in KNIGHT_SQUARES]
+
+# Squares a pawn of each color (0 = white, 1 = black) attacks a square from
+PAWN_ATTACKER_SQUARES = [
+    [_squares_at(square, [(-1, -1), (-1, 1)]) for square in range(64)],
+    [_squares_at(square, [(1, -1), (1, 1)]) for square in range(64)],
+]
+PAWN_ATTACKER_MASKS = [[_mask(squares) for squares in table] for table in PAWN_ATTACKER_SQUARES]
+
+# RAYS[square][direction]: squares from square to the edge, nearest first
+RAYS = [[_ray(square, direction) for direction in range(8)] for square in range(64)]
+
+# DIRECTION_BETWEEN[a * 64 + b]: direction from a towards b, -1 if not on a line
+DIRECTION_BETWEEN = [-1] * 4096
+for _square in range(64):
+    for _direction in range(8):
+        for _target in RAYS[_square][_direction]:
+            DIRECTION_BETWEEN[_square * 64 + _target] = _direction
+
+# Slider type (besides the queen) that attacks along a direction
+_RAY_SLIDER = [Piece.ROOK] * 4 + [Piece.BISHOP] * 4
+
+
+def attackers_of(squares, square, by_white):
+    """Bitmask of the pieces of one color attacking a square"""
+    color = Piece.WHITE if by_white else Piece.BLACK
+    attackers = 0
+    
+    pawn = Piece.PAWN | color
+    for origin in PAWN_ATTACKER_SQUARES[0 if by_white else 1][square]:
+        if squares[origin] == pawn:
+            attackers |= 1 << origin
+    
+    knight = Piece.KNIGHT | color
+    for origin in KNIGHT_SQUARES[square]:
+        if squares[origin] == knight:
+            attackers |= 1 << origin
+    
+    king = Piece.KING | color
+    for origin in KING_SQUARES[square]:
+        if squares[origin] == king:
+            attackers |= 1 << origin
+    
+    queen = Piece.QUEEN | color
+    rays = RAYS[square]
+    for direction in range(8):
+        slider = _RAY_SLIDER[direction] | color
+        for origin in rays[direction]:
+            piece = squares[origin]
+            if piece:
+                if piece == queen or piece == slider:
+                    attackers |= 1 << origin
+                break
+    
+    return attackers
+
+
+def is_square_attacked(squares, square, by_white):
+    """True if any piece of one color attacks a square"""
+    color = Piece.WHITE if by_white else Piece.BLACK
+    
+    pawn = Piece.PAWN | color
+    for origin in PAWN_ATTACKER_SQUARES[0 if by_white else 1][square]:
+        if squares[origin] == pawn:
+            return True
+    
+    knight = Piece.KNIGHT | color
+    for origin in KNIGHT_SQUARES[square]:
+        if squares[origin] == knight:
+            return True
+    
+    king = Piece.KING | color
+    for origin in KING_SQUARES[square]:
+        if squares[origin] == king:
+            return True
+    
+    queen = Piece.QUEEN | color
+    rays = RAYS[square]
+    for direction in range(8):
+        slider = _RAY_SLIDER[direction] | color
+        for origin in rays[direction]:
+            piece = squares[origin]
+            if piece:
+                if piece == queen or piece == slider:
+                    return True
+                break
+    
+    return False
+
+
+def checkers(board):
+    """Bitmask of the pieces giving check to the side to move"""
+    king_square = board.king_square[0 if board.white_to_move else 1]
+    return attackers_of(board.square, king_square, not board.white_to_move)
+
+
+def pinned_pieces(board):
+    """Bitmask of the side to move's pieces pinned to its king"""
+    squares = board.square
+    color = Piece.WHITE if board.white_to_move else Piece.BLACK
+    enemy_queen = Piece.QUEEN | (color ^ Piece.BLACK)
+    rays = RAYS[board.king_square[0 if board.white_to_move else 1]]
+    pinned = 0
+    
+    for direction in range(8):
+        enemy_slider = _RAY_SLIDER[direction] | (color ^ Piece.BLACK)
+        blocker = -1
+        for square in rays[direction]:
+            piece = squares[square]
+            if not piece:
+                continue
+            if blocker < 0:
+                if Piece.piece_color(piece) != color:
+                    break
+                blocker = square
+            else:
+                if piece == enemy_queen or piece == enemy_slider:
+                    pinned |= 1 << blocker
+                break
+    
+    return pinned
+
+
+def gives_check(board, move):
+    """
+    True if a legal move (16-bit value) checks the opponent. Direct and
+    discovered checks are found from the tables; castling, en passant and
+    promotions fall back to making the move.
+    """
+    start_square = move & 0x3F
+    target_square = (move >> 6) & 0x3F
+    move_flag = move >> 12
+    
+    if move_flag == Move.CASTLE_FLAG or move_flag == Move.EN_PASSANT_FLAG or move_flag >= Move.PROMOTE_TO_QUEEN_FLAG:
+        board.make_move(move, in_search=True)
+        in_check = board.is_in_check()
+        board.unmake_move(move, in_search=True)
+        return in_check
+    
+    squares = board.square
+    mover_index = 0 if board.white_to_move else 1
+    king_square = board.king_square[1 - mover_index]
+    piece = squares[start_square]
+    piece_type = piece & 0b0111
+    
+    # Direct check
+    if piece_type == Piece.PAWN:
+        if PAWN_ATTACKER_MASKS[mover_index][king_square] >> target_square & 1:
+            return True
+    elif piece_type == Piece.KNIGHT:
+        if KNIGHT_MASKS[king_square] >> target_square & 1:
+            return True
+    elif piece_type != Piece.KING:
+        direction = DIRECTION_BETWEEN[king_square * 64 + target_square]
+        if direction >= 0 and (piece_type == Piece.QUEEN or piece_type == _RAY_SLIDER[direction]):
+            for square in RAYS[king_square][direction]:
+                if square == target_square:
+                    return True
+                if squares[square] and square != start_square:
+                    break
+    
+    # Discovered check: the piece leaves the line between the king and a slider
+    direction = DIRECTION_BETWEEN[king_square * 64 + start_square]
+    if direction < 0 or DIRECTION_BETWEEN[king_square * 64 + target_square] == direction:
+        return False
+    
+    color = Piece.piece_color(piece)
+    queen = Piece.QUEEN | color
+    slider = _RAY_SLIDER[direction] | color
+    passed_start = False
+    for square in RAYS[king_square][direction]:
+        if square == start_square:
+            passed_start = True
+            continue
+        occupant = squares[square]
+        if occupant:
+            return passed_start and (occupant == queen or occupant == slider)
+    
+    return False
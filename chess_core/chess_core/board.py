@@ -1,13 +1,39 @@
 from .piece import Piece
 from .move import Move
 from .zobrist import Zobrist
+from .packed_position import pack_board, unpack
+from .attacks import checkers
+
+
+# Promotion flag -> piece type (index by flag)
+PROMOTION_PIECE_TYPES = [0, 0, 0, 0, Piece.QUEEN, Piece.KNIGHT, Piece.ROOK, Piece.BISHOP]
+
+# FEN letter <-> piece lookups (digits expand to runs of empty squares)
+FEN_PIECES = {
+    'P': Piece.PAWN, 'N': Piece.KNIGHT, 'B': Piece.BISHOP,
+    'R': Piece.ROOK, 'Q': Piece.QUEEN, 'K': Piece.KING,
+}
+FEN_PIECES.update({letter.lower(): piece | Piece.BLACK for letter, piece in FEN_PIECES.items()})
+FEN_EMPTY_RUNS = str.maketrans({str(count): '.' * count for count in range(1, 9)})
+PIECE_LETTERS = ['.'] * 16
+for _letter, _piece in FEN_PIECES.items():
+    PIECE_LETTERS[_piece] = _letter
+CASTLING_FEN = [
+    ''.join(letter for letter, mask in zip('KQkq', (1, 2, 4, 8)) if rights & mask) or '-'
+    for rights in range(16)
+]
 
 
 class GameState:
     """
     Stores all the state information needed to unmake a move.
     This allows fast unmake without FEN reload.
+    in_check / checkers are filled in on first use (None until then), so
+    each position's check status is computed once and restored by unmake.
     """
+    __slots__ = ('captured_piece_type', 'en_passant_file', 'castling_rights',
+                 'fifty_move_counter', 'zobrist_key', 'in_check', 'checkers')
+    
     def __init__(self, captured_piece_type=0, en_passant_file=0, 
                  castling_rights=0, fifty_move_counter=0, zobrist_key=0):
         self.captured_piece_type = captured_piece_type
@@ -15,6 +41,8 @@ class GameState:
         self.castling_rights = castling_rights
         self.fifty_move_counter = fifty_move_counter
         self.zobrist_key = zobrist_key
+        self.in_check = None
+        self.checkers = None
 
 
 class Board:
@@ -63,31 +91,14 @@ class Board:
         
         parts = fen.split()
         
-        # Parse piece placement
-        rank = 7
-        file = 0
-        for char in parts[0]:
-            if char == '/':
-                rank -= 1
-                file = 0
-            elif char.isdigit():
-                file += int(char)
-            else:
-                piece_type = {
-                    'p': Piece.PAWN, 'n': Piece.KNIGHT, 'b': Piece.BISHOP,
-                    'r': Piece.ROOK, 'q': Piece.QUEEN, 'k': Piece.KING
-                }[char.lower()]
-                
-                color = Piece.WHITE if char.isupper() else Piece.BLACK
-                piece = Piece.make_piece(piece_type, color)
-                
-                square_index = rank * 8 + file
+        # Parse piece placement (rank 8 first, so reverse the ranks)
+        placement = ''.join(reversed(parts[0].translate(FEN_EMPTY_RUNS).split('/')))
+        for square_index, char in enumerate(placement):
+            if char != '.':
+                piece = FEN_PIECES[char]
                 self.square[square_index] = piece
-                
-                if piece_type == Piece.KING:
-                    self.king_square[0 if color == Piece.WHITE else 1] = square_index
-                
-                file += 1
+                if piece & 0b0111 == Piece.KING:
+                    self.king_square[piece >> 3] = square_index
         
         # Parse side to move
         self.white_to_move = parts[1] == 'w'
@@ -115,6 +126,27 @@ class Board:
         if len(parts) > 5:
             self.move_count = int(parts[5])
         
+        self._start_history()
+    
+    @classmethod
+    def from_packed(cls, data: bytes) -> 'Board':
+        """Build a board from a packed position (see packed_position) without FEN parsing"""
+        board = cls.__new__(cls)
+        (board.square, board.white_to_move, board.castling_rights, board.en_passant_file,
+         board.fifty_move_counter, board.move_count) = unpack(data)
+        board.king_square = [0, 0]
+        for index, piece in enumerate(board.square):
+            if Piece.piece_type(piece) == Piece.KING:
+                board.king_square[0 if Piece.is_white(piece) else 1] = index
+        board._start_history()
+        return board
+    
+    def to_packed(self) -> bytes:
+        """Fixed-size binary encoding of the position (see packed_position)"""
+        return pack_board(self)
+    
+    def _start_history(self):
+        """Reset ply count, zobrist key and histories for a freshly loaded position"""
         self.ply_count = (self.move_count - 1) * 2 + (0 if self.white_to_move else 1)
         
         # Calculate initial zobrist key
@@ -134,11 +166,14 @@ class Board:
     def make_move(self, move, in_search=False):
         """
         Make a move on the board with proper state tracking.
+        move: Move or 16-bit move value
         in_search: if True, don't update repetition history (for search)
         """
-        start_square = move.start_square
-        target_square = move.target_square
-        move_flag = move.flag
+        if move.__class__ is not int:
+            move = move.value
+        start_square = move & 0x3F
+        target_square = (move >> 6) & 0x3F
+        move_flag = move >> 12
         
         moved_piece = self.square[start_square]
         moved_piece_type = Piece.piece_type(moved_piece)
@@ -210,14 +245,8 @@ class Board:
             new_zobrist_key ^= Zobrist.pieces_array[rook_piece][rook_target]
         
         # Handle promotion
-        if move.is_promotion:
-            promo_map = {
-                Move.PROMOTE_TO_QUEEN_FLAG: Piece.QUEEN,
-                Move.PROMOTE_TO_KNIGHT_FLAG: Piece.KNIGHT,
-                Move.PROMOTE_TO_ROOK_FLAG: Piece.ROOK,
-                Move.PROMOTE_TO_BISHOP_FLAG: Piece.BISHOP
-            }
-            promo_type = promo_map.get(move_flag, Piece.QUEEN)
+        if move_flag >= Move.PROMOTE_TO_QUEEN_FLAG:
+            promo_type = PROMOTION_PIECE_TYPES[move_flag]
             color = Piece.piece_color(moved_piece)
             promo_piece = Piece.make_piece(promo_type, color)
             
@@ -235,14 +264,14 @@ class Board:
         
         # Update castling rights based on rook/king movement
         if prev_castling_state != 0:
-            # Moving to/from rook squares removes castling
+            # Moving to/from rook squares removes castling (both ends, e.g. Rxa8 from a1)
             if target_square == 7 or start_square == 7:  # h1
                 new_castling_rights &= self.CLEAR_WHITE_KINGSIDE_MASK
-            elif target_square == 0 or start_square == 0:  # a1
+            if target_square == 0 or start_square == 0:  # a1
                 new_castling_rights &= self.CLEAR_WHITE_QUEENSIDE_MASK
-            elif target_square == 63 or start_square == 63:  # h8
+            if target_square == 63 or start_square == 63:  # h8
                 new_castling_rights &= self.CLEAR_BLACK_KINGSIDE_MASK
-            elif target_square == 56 or start_square == 56:  # a8
+            if target_square == 56 or start_square == 56:  # a8
                 new_castling_rights &= self.CLEAR_BLACK_QUEENSIDE_MASK
         
         # Update zobrist for state changes
@@ -267,7 +296,8 @@ class Board:
         
         self.fifty_move_counter = new_fifty_move_counter
         
-        if not self.white_to_move:
+        # Full move number increases after black's move
+        if self.white_to_move:
             self.move_count += 1
         
         # Save state for unmake
@@ -292,11 +322,13 @@ class Board:
         # Restore side to move first
         self.white_to_move = not self.white_to_move
         
-        start_square = move.start_square
-        target_square = move.target_square
-        move_flag = move.flag
+        if move.__class__ is not int:
+            move = move.value
+        start_square = move & 0x3F
+        target_square = (move >> 6) & 0x3F
+        move_flag = move >> 12
         
-        is_promotion = move.is_promotion
+        is_promotion = move_flag >= Move.PROMOTE_TO_QUEEN_FLAG
         is_en_passant = move_flag == Move.EN_PASSANT_FLAG
         
         # Get captured piece type from saved state
@@ -357,7 +389,7 @@ class Board:
         self.fifty_move_counter = self.current_game_state.fifty_move_counter
         
         self.ply_count -= 1
-        if self.white_to_move:
+        if not self.white_to_move:
             self.move_count -= 1
         
         if not in_search and self.repetition_position_history:
@@ -365,42 +397,12 @@ class Board:
     
     def to_fen(self):
         """Convert current position to FEN string"""
-        fen_parts = []
-        
-        # Piece placement
-        for rank in range(7, -1, -1):
-            empty = 0
-            rank_str = ""
-            for file in range(8):
-                square = rank * 8 + file
-                piece = self.square[square]
-                if piece == 0:
-                    empty += 1
-                else:
-                    if empty > 0:
-                        rank_str += str(empty)
-                        empty = 0
-                    rank_str += Piece.get_symbol(piece)
-            if empty > 0:
-                rank_str += str(empty)
-            fen_parts.append(rank_str)
-        
-        fen = '/'.join(fen_parts)
-        
-        # Side to move
-        fen += ' w' if self.white_to_move else ' b'
-        
-        # Castling rights
-        castling = ''
-        if self.castling_rights & self.WHITE_KINGSIDE_MASK:
-            castling += 'K'
-        if self.castling_rights & self.WHITE_QUEENSIDE_MASK:
-            castling += 'Q'
-        if self.castling_rights & self.BLACK_KINGSIDE_MASK:
-            castling += 'k'
-        if self.castling_rights & self.BLACK_QUEENSIDE_MASK:
-            castling += 'q'
-        fen += ' ' + (castling if castling else '-')
+        letters = [PIECE_LETTERS[piece] for piece in self.square]
+        placement = '/'.join(''.join(letters[rank * 8:rank * 8 + 8]) for rank in range(7, -1, -1))
+        for count in range(8, 0, -1):
+            placement = placement.replace('.' * count, str(count))
+        
+        fen = placement + (' w ' if self.white_to_move else ' b ') + CASTLING_FEN[self.castling_rights]
         
         # En passant
         if self.en_passant_file > 0:
@@ -415,6 +417,23 @@ class Board:
         
         return fen
     
+    def is_in_check(self):
+        """Check if the side to move is in check (cached per position)"""
+        state = self.current_game_state
+        in_check = state.in_check
+        if in_check is None:
+            state.checkers = checkers(self)
+            in_check = state.in_check = state.checkers != 0
+        return in_check
+    
+    def get_checkers(self):
+        """Bitmask of the squares of the pieces giving check (cached per position)"""
+        state = self.current_game_state
+        if state.checkers is None:
+            state.checkers = checkers(self)
+            state.in_check = state.checkers != 0
+        return state.checkers
+    
     @property
     def zobrist_key(self):
         """Get current zobrist key"""
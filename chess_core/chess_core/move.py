@@ -1,5 +1,17 @@
+SQUARE_NAMES = [f"{'abcdefgh'[square % 8]}{square // 8 + 1}" for square in range(64)]
+
+# Promotion flag -> UCI suffix (index by flag)
+PROMOTION_SUFFIXES = ['', '', '', '', 'q', 'n', 'r', 'b']
+
+
 class Move:
-    """Compact 16-bit move representation"""
+    """
+    Compact 16-bit move representation.
+    The search works on the raw `value` ints (start | target << 6 | flag << 12);
+    Move objects are for the API boundary.
+    """
+    __slots__ = ('start_square', 'target_square', 'flag', 'value')
+    
     NO_FLAG = 0
     EN_PASSANT_FLAG = 1
     CASTLE_FLAG = 2
@@ -15,6 +27,11 @@ class Move:
         self.flag = flag
         self.value = start_square | (target_square << 6) | (flag << 12)
     
+    @classmethod
+    def from_value(cls, value):
+        """Move object for a 16-bit move value"""
+        return cls(value & 0x3F, (value >> 6) & 0x3F, value >> 12)
+    
     @property
     def is_promotion(self):
         return self.flag >= Move.PROMOTE_TO_QUEEN_FLAG
@@ -25,26 +42,7 @@ class Move:
     
     def to_uci(self):
         """Convert to UCI notation"""
-        files = 'abcdefgh'
-        ranks = '12345678'
-        
-        start_file = files[self.start_square % 8]
-        start_rank = ranks[self.start_square // 8]
-        target_file = files[self.target_square % 8]
-        target_rank = ranks[self.target_square // 8]
-        
-        move_str = f"{start_file}{start_rank}{target_file}{target_rank}"
-        
-        if self.is_promotion:
-            promotion_map = {
-                Move.PROMOTE_TO_QUEEN_FLAG: 'q',
-                Move.PROMOTE_TO_KNIGHT_FLAG: 'n',
-                Move.PROMOTE_TO_ROOK_FLAG: 'r',
-                Move.PROMOTE_TO_BISHOP_FLAG: 'b'
-            }
-            move_str += promotion_map.get(self.flag, 'q')
-        
-        return move_str
+        return value_to_uci(self.value)
     
     @staticmethod
     def from_uci(uci_str):
@@ -71,4 +69,9 @@ class Move:
             }
             flag = promotion_map.get(uci_str[4].lower(), Move.PROMOTE_TO_QUEEN_FLAG)
         
-        return Move(start_square, target_square, flag)
\ No newline at end of file
+        return Move(start_square, target_square, flag)
+
+
+def value_to_uci(value):
+    """UCI notation of a 16-bit move value"""
+    return SQUARE_NAMES[value & 0x3F] + SQUARE_NAMES[(value >> 6) & 0x3F] + PROMOTION_SUFFIXES[value >> 12]
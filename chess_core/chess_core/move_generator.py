@@ -0,0 +1,241 @@
+from array import array
+
+from .piece import Piece
+from .move import Move
+from .attacks import (
+    DIRECTION_BETWEEN, KING_SQUARES, KNIGHT_SQUARES, PAWN_ATTACKER_SQUARES, RAYS,
+    is_square_attacked, pinned_pieces,
+)
+
+
+# Indexes into RAYS per slider
+ROOK_DIRECTIONS = (0, 1, 2, 3)
+BISHOP_DIRECTIONS = (4, 5, 6, 7)
+QUEEN_DIRECTIONS = (0, 1, 2, 3, 4, 5, 6, 7)
+
+# More than the most legal moves in any chess position (218)
+MAX_MOVES = 256
+
+
+def new_move_buffer():
+    """Preallocated buffer of 16-bit move values for generate_move_values"""
+    return array('H', bytes(2 * MAX_MOVES))
+
+
+class MoveGenerator:
+    """Generates legal moves with proper check detection"""
+    
+    def __init__(self):
+        # Scratch buffer for generate_moves
+        self.move_buffer = new_move_buffer()
+    
+    def generate_moves(self, board, captures_only=False):
+        """Generate all legal moves as Move objects"""
+        count = self.generate_move_values(board, self.move_buffer, captures_only)
+        return [Move.from_value(value) for value in self.move_buffer[:count]]
+    
+    def generate_move_values(self, board, buffer, captures_only=False, start_square=None):
+        """
+        Generate legal moves as 16-bit move values into buffer (an
+        array('H') of MAX_MOVES, see new_move_buffer). Returns the count.
+        With start_square, only the moves of the piece on that square.
+        """
+        moves = []  # Pseudo-legal
+        color = Piece.WHITE if board.white_to_move else Piece.BLACK
+        pieces = enumerate(board.square) if start_square is None else ((start_square, board.square[start_square]),)
+        
+        for square, piece in pieces:
+            if piece == 0 or piece & 0b1000 != color:
+                continue
+            
+            piece_type = piece & 0b0111
+            
+            if piece_type == Piece.PAWN:
+                self._gen_pawn_moves(board, square, moves, captures_only)
+            elif piece_type == Piece.KNIGHT:
+                self._gen_knight_moves(board, square, moves, captures_only)
+            elif piece_type == Piece.BISHOP:
+                self._gen_sliding_moves(board, square, moves, BISHOP_DIRECTIONS, captures_only)
+            elif piece_type == Piece.ROOK:
+                self._gen_sliding_moves(board, square, moves, ROOK_DIRECTIONS, captures_only)
+            elif piece_type == Piece.QUEEN:
+                self._gen_sliding_moves(board, square, moves, QUEEN_DIRECTIONS, captures_only)
+            elif piece_type == Piece.KING:
+                self._gen_king_moves(board, square, moves, captures_only)
+        
+        # Filter out illegal moves (that leave king in check). Out of check,
+        # only king moves, en passant and pinned pieces leaving their pin
+        # line can be illegal, so the rest skip make/unmake.
+        squares = board.square
+        king_square = board.king_square[0 if board.white_to_move else 1]
+        in_check = board.is_in_check()
+        pinned = 0 if in_check else pinned_pieces(board)
+        count = 0
+        for move in moves:
+            start_square = move & 0x3F
+            if not in_check:
+                if start_square == king_square:
+                    if move >> 12 == Move.CASTLE_FLAG:
+                        legal = True  # Squares passed through were checked in _gen_castling_moves
+                    else:
+                        # Lift the king so it can't shield the target from a slider
+                        king = squares[king_square]
+                        squares[king_square] = 0
+                        legal = not is_square_attacked(squares, (move >> 6) & 0x3F, not board.white_to_move)
+                        squares[king_square] = king
+                    if legal:
+                        buffer[count] = move
+                        count += 1
+                    continue
+                
+                if move >> 12 != Move.EN_PASSANT_FLAG:
+                    if not (pinned >> start_square) & 1:
+                        buffer[count] = move
+                        count += 1
+                    elif DIRECTION_BETWEEN[king_square * 64 + start_square] == DIRECTION_BETWEEN[king_square * 64 + ((move >> 6) & 0x3F)]:
+                        buffer[count] = move  # Moves along the pin line
+                        count += 1
+                    continue
+            
+            board.make_move(move, in_search=True)
+            if not is_square_attacked(squares, board.king_square[1 if board.white_to_move else 0], board.white_to_move):
+                buffer[count] = move
+                count += 1
+            board.unmake_move(move, in_search=True)
+        
+        return count
+    
+    def is_in_check(self, board):
+        """
+        Check if current side to move is in check.
+        """
+        return board.is_in_check()
+    
+    def is_square_attacked(self, board, square, by_white):
+        """Check if a square is attacked by given color"""
+        return is_square_attacked(board.square, square, by_white)
+    
+    def _gen_pawn_moves(self, board, square, moves, captures_only):
+        """Generate pawn moves"""
+        direction = 1 if board.white_to_move else -1
+        start_rank = 1 if board.white_to_move else 6
+        promo_rank = 7 if board.white_to_move else 0
+        
+        rank = square // 8
+        
+        # Single push
+        if not captures_only:
+            target = square + direction * 8
+            if 0 <= target < 64 and board.square[target] == 0:
+                if rank + direction == promo_rank:
+                    moves.append(square | (target << 6) | (Move.PROMOTE_TO_QUEEN_FLAG << 12))
+                    moves.append(square | (target << 6) | (Move.PROMOTE_TO_KNIGHT_FLAG << 12))
+                    moves.append(square | (target << 6) | (Move.PROMOTE_TO_ROOK_FLAG << 12))
+                    moves.append(square | (target << 6) | (Move.PROMOTE_TO_BISHOP_FLAG << 12))
+                else:
+                    moves.append(square | (target << 6))
+                    
+                    # Double push
+                    if rank == start_rank:
+                        target2 = square + direction * 16
+                        if board.square[target2] == 0:
+                            moves.append(square | (target2 << 6) | (Move.PAWN_TWO_UP_FLAG << 12))
+        
+        # Captures (a white pawn attacks the squares black pawns attack it from, and vice versa)
+        enemy_color = Piece.BLACK if board.white_to_move else Piece.WHITE
+        for target in PAWN_ATTACKER_SQUARES[1 if board.white_to_move else 0][square]:
+            target_piece = board.square[target]
+            
+            if target_piece != 0 and Piece.piece_color(target_piece) == enemy_color:
+                if rank + direction == promo_rank:
+                    moves.append(square | (target << 6) | (Move.PROMOTE_TO_QUEEN_FLAG << 12))
+                    moves.append(square | (target << 6) | (Move.PROMOTE_TO_KNIGHT_FLAG << 12))
+                    moves.append(square | (target << 6) | (Move.PROMOTE_TO_ROOK_FLAG << 12))
+                    moves.append(square | (target << 6) | (Move.PROMOTE_TO_BISHOP_FLAG << 12))
+                else:
+                    moves.append(square | (target << 6))
+            
+            # En passant
+            elif board.en_passant_file > 0:
+                ep_file = board.en_passant_file - 1
+                ep_rank = 5 if board.white_to_move else 2
+                ep_square = ep_rank * 8 + ep_file
+                
+                if target == ep_square:
+                    moves.append(square | (target << 6) | (Move.EN_PASSANT_FLAG << 12))
+    
+    def _gen_knight_moves(self, board, square, moves, captures_only):
+        """Generate knight moves"""
+        enemy_color = Piece.BLACK if board.white_to_move else Piece.WHITE
+        
+        for target in KNIGHT_SQUARES[square]:
+            target_piece = board.square[target]
+            if target_piece == 0:
+                if not captures_only:
+                    moves.append(square | (target << 6))
+            elif Piece.piece_color(target_piece) == enemy_color:
+                moves.append(square | (target << 6))
+    
+    def _gen_sliding_moves(self, board, square, moves, directions, captures_only):
+        """Generate sliding piece moves (rook, bishop, queen)"""
+        enemy_color = Piece.BLACK if board.white_to_move else Piece.WHITE
+        rays = RAYS[square]
+        
+        for dir_idx in directions:
+            for target in rays[dir_idx]:
+                target_piece = board.square[target]
+                if target_piece == 0:
+                    if not captures_only:
+                        moves.append(square | (target << 6))
+                elif Piece.piece_color(target_piece) == enemy_color:
+                    moves.append(square | (target << 6))
+                    break
+                else:
+                    break
+    
+    def _gen_king_moves(self, board, square, moves, captures_only):
+        """Generate king moves"""
+        enemy_color = Piece.BLACK if board.white_to_move else Piece.WHITE
+        
+        for target in KING_SQUARES[square]:
+            target_piece = board.square[target]
+            if target_piece == 0:
+                if not captures_only:
+                    moves.append(square | (target << 6))
+            elif Piece.piece_color(target_piece) == enemy_color:
+                moves.append(square | (target << 6))
+        
+        # Castling
+        if not captures_only and not self.is_in_check(board):
+            self._gen_castling_moves(board, square, moves)
+    
+    def _gen_castling_moves(self, board, square, moves):
+        """Generate castling moves"""
+        if board.white_to_move:
+            # White kingside
+            if board.castling_rights & board.WHITE_KINGSIDE_MASK:
+                if (board.square[5] == 0 and board.square[6] == 0 and
+                    not self.is_square_attacked(board, 5, False) and
+                    not self.is_square_attacked(board, 6, False)):
+                    moves.append(square | (6 << 6) | (Move.CASTLE_FLAG << 12))
+            
+            # White queenside
+            if board.castling_rights & board.WHITE_QUEENSIDE_MASK:
+                if (board.square[1] == 0 and board.square[2] == 0 and board.square[3] == 0 and
+                    not self.is_square_attacked(board, 2, False) and
+                    not self.is_square_attacked(board, 3, False)):
+                    moves.append(square | (2 << 6) | (Move.CASTLE_FLAG << 12))
+        else:
+            # Black kingside
+            if board.castling_rights & board.BLACK_KINGSIDE_MASK:
+                if (board.square[61] == 0 and board.square[62] == 0 and
+                    not self.is_square_attacked(board, 61, True) and
+                    not self.is_square_attacked(board, 62, True)):
+                    moves.append(square | (62 << 6) | (Move.CASTLE_FLAG << 12))
+            
+            # Black queenside
+            if board.castling_rights & board.BLACK_QUEENSIDE_MASK:
+                if (board.square[57] == 0 and board.square[58] == 0 and board.square[59] == 0 and
+                    not self.is_square_attacked(board, 58, True) and
+                    not self.is_square_attacked(board, 59, True)):
+                    moves.append(square | (58 << 6) | (Move.CASTLE_FLAG << 12))
\ No newline at end of file
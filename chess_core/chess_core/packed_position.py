@@ -0,0 +1,136 @@
+"""
+Packed positions - a fixed-size binary encoding of a chess position.
+
+Layout (30 bytes, little-endian):
+    0-7    occupancy bitboard (bit n set = square n holds a piece)
+    8-23   piece codes (Piece values, 4 bits each) of the occupied squares in
+           square order, low nibble first; unused nibbles are zero
+    24     side to move (bit 0, set = white) and castling rights (bits 1-4)
+    25     en passant file (0 = none, 1-8 = a-h)
+    26-27  fifty move counter
+    28-29  full move number
+
+The first KEY_SIZE bytes identify the position for book and cache lookups
+(like the first four FEN fields); the clocks follow. Being plain bytes, a
+packed position is hashable, can be sent to worker processes without
+pickling a Board, and fits a fixed-width BLOB/BinaryField column.
+"""
+
+import struct
+
+from .piece import Piece
+
+
+_LAYOUT = struct.Struct('<QQQBBHH')
+
+PACKED_SIZE = _LAYOUT.size  # 30
+KEY_SIZE = 26               # Without the move clocks
+
+_PIECE_CODES = {
+    'P': Piece.PAWN, 'N': Piece.KNIGHT, 'B': Piece.BISHOP,
+    'R': Piece.ROOK, 'Q': Piece.QUEEN, 'K': Piece.KING,
+    'p': Piece.PAWN | Piece.BLACK, 'n': Piece.KNIGHT | Piece.BLACK, 'b': Piece.BISHOP | Piece.BLACK,
+    'r': Piece.ROOK | Piece.BLACK, 'q': Piece.QUEEN | Piece.BLACK, 'k': Piece.KING | Piece.BLACK,
+}
+_CASTLING_BITS = {'K': 0b0001, 'Q': 0b0010, 'k': 0b0100, 'q': 0b1000}
+
+
+def _pack(occupancy: int, nibbles: int, piece_count: int, white_to_move: bool, castling_rights: int,
+          en_passant_file: int, fifty_move_counter: int, move_count: int) -> bytes:
+    if piece_count > 32:
+        raise ValueError("Cannot pack a position with more than 32 pieces")
+    
+    return _LAYOUT.pack(
+        occupancy,
+        nibbles & 0xFFFFFFFFFFFFFFFF,
+        nibbles >> 64,
+        (1 if white_to_move else 0) | (castling_rights << 1),
+        en_passant_file,
+        min(fifty_move_counter, 0xFFFF),
+        min(move_count, 0xFFFF),
+    )
+
+
+def pack_board(board) -> bytes:
+    """Encode a Board"""
+    occupancy = 0
+    nibbles = 0
+    piece_count = 0
+    for index, piece in enumerate(board.square):
+        if piece:
+            occupancy |= 1 << index
+            nibbles |= piece << (piece_count * 4)
+            piece_count += 1
+    
+    return _pack(occupancy, nibbles, piece_count, board.white_to_move, board.castling_rights,
+                 board.en_passant_file, board.fifty_move_counter, board.move_count)
+
+
+def pack_fen(fen: str) -> bytes:
+    """Encode a FEN string without building a Board (missing clocks default to 0 and 1)"""
+    parts = fen.split()
+    occupancy = 0
+    nibbles = 0
+    piece_count = 0
+    
+    # Ranks from 1 to 8 so squares come in index order
+    for rank, rank_text in enumerate(reversed(parts[0].split('/'))):
+        index = rank * 8
+        for char in rank_text:
+            code = _PIECE_CODES.get(char)
+            if code is None:
+                index += int(char)  # Run of empty squares
+            else:
+                occupancy |= 1 << index
+                nibbles |= code << (piece_count * 4)
+                piece_count += 1
+                index += 1
+    
+    castling_rights = 0
+    for char in parts[2] if len(parts) > 2 else '':
+        castling_rights |= _CASTLING_BITS.get(char, 0)
+    
+    en_passant = parts[3] if len(parts) > 3 else '-'
+    en_passant_file = ord(en_passant[0]) - ord('a') + 1 if en_passant != '-' else 0
+    
+    return _pack(
+        occupancy,
+        nibbles,
+        piece_count,
+        len(parts) < 2 or parts[1] == 'w',
+        castling_rights,
+        en_passant_file,
+        int(parts[4]) if len(parts) > 4 else 0,
+        int(parts[5]) if len(parts) > 5 else 1,
+    )
+
+
+def unpack(data: bytes):
+    """
+    Decode a packed position.
+    Returns: (squares, white_to_move, castling_rights, en_passant_file,
+              fifty_move_counter, move_count)
+    """
+    if len(data) != PACKED_SIZE:
+        raise ValueError(f"Packed position must be {PACKED_SIZE} bytes, got {len(data)}")
+    
+    occupancy, low, high, state, en_passant_file, fifty_move_counter, move_count = _LAYOUT.unpack(data)
+    nibbles = low | (high << 64)
+    
+    squares = [0] * 64
+    while occupancy:
+        lowest_bit = occupancy & -occupancy
+        squares[lowest_bit.bit_length() - 1] = nibbles & 0xF
+        nibbles >>= 4
+        occupancy ^= lowest_bit
+    
+    return squares, bool(state & 1), state >> 1, en_passant_file, fifty_move_counter, move_count
+
+
+def position_key(position) -> bytes:
+    """Clock-independent key of a Board, FEN string or packed position"""
+    if isinstance(position, (bytes, bytearray)):
+        return bytes(position[:KEY_SIZE])
+    if isinstance(position, str):
+        return pack_fen(position)[:KEY_SIZE]
+    return pack_board(position)[:KEY_SIZE]
@@ -0,0 +1,42 @@
+"""
+Perft - counts the leaf nodes of the legal move tree to a fixed depth.
+The counts for the reference positions are known, so any move generation
+or make/unmake bug shows up as a wrong number.
+"""
+
+from .board import Board
+from .move_generator import MoveGenerator, new_move_buffer
+
+
+# (name, FEN, leaf counts for depth 1, 2, ...) - from the Chess Programming Wiki
+PERFT_POSITIONS = [
+    ('start', Board.START_FEN, [20, 400, 8902, 197281]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', [48, 2039, 97862]),
+    ('position 3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812, 43238]),
+    ('position 4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', [6, 264, 9467]),
+    ('position 5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', [44, 1486, 62379]),
+    ('position 6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10', [46, 2079, 89890]),
+]
+
+
+def perft(board, depth, generator=None, buffers=None):
+    """Number of leaf positions depth plies below board"""
+    if depth == 0:
+        return 1
+    if generator is None:
+        generator = MoveGenerator()
+    if buffers is None:
+        buffers = [new_move_buffer() for _ in range(depth)]
+    
+    buffer = buffers[depth - 1]
+    count = generator.generate_move_values(board, buffer)
+    if depth == 1:
+        return count
+    
+    nodes = 0
+    for index in range(count):
+        move = buffer[index]
+        board.make_move(move, in_search=True)
+        nodes += perft(board, depth - 1, generator, buffers)
+        board.unmake_move(move, in_search=True)
+    return nodes
@@ -12,20 +12,21 @@ class Zobrist:
     @classmethod
     def initialize(cls):
         """Initialize Zobrist random numbers with fixed seed"""
-        random.seed(29426028)  # Same seed as C# implementation
+        # Own generator so importing the engine doesn't reseed the global one
+        rng = random.Random(29426028)  # Same seed as C# implementation
         
         # Piece array: 15 piece types (including color) x 64 squares
-        cls.pieces_array = [[cls._random_64bit() for _ in range(64)] 
+        cls.pieces_array = [[cls._random_64bit(rng) for _ in range(64)] 
                            for _ in range(15)]
         
         # Castling rights: 16 possible states (4 bits)
-        cls.castling_rights = [cls._random_64bit() for _ in range(16)]
+        cls.castling_rights = [cls._random_64bit(rng) for _ in range(16)]
         
         # En passant file: 0 = none, 1-8 = files a-h
-        cls.en_passant_file = [0] + [cls._random_64bit() for _ in range(8)]
+        cls.en_passant_file = [0] + [cls._random_64bit(rng) for _ in range(8)]
         
         # Side to move
-        cls.side_to_move = cls._random_64bit()
+        cls.side_to_move = cls._random_64bit(rng)
     
     @classmethod
     def calculate_zobrist_key(cls, board):
@@ -58,9 +59,9 @@ class Zobrist:
         return zobrist_key
     
     @staticmethod
-    def _random_64bit():
+    def _random_64bit(rng):
         """Generate random 64-bit number"""
-        return random.randint(0, 2**64 - 1)
+        return rng.randint(0, 2**64 - 1)
 
 
 # Initialize on module load
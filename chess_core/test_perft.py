@@ -0,0 +1,45 @@
+"""
+Perft on the reference positions - run with pytest from chess_core/.
+Both the game server and the bot validate moves with this generator.
+"""
+
+import pytest
+
+from chess_core import Board, PERFT_POSITIONS, perft
+from chess_core.move_generator import MoveGenerator, new_move_buffer
+
+
+# Deepest count checked per position, kept to a few seconds in total
+MAX_NODES = 100000
+
+
+@pytest.mark.parametrize('name, fen, counts', PERFT_POSITIONS, ids=[position[0] for position in PERFT_POSITIONS])
+def test_perft(name, fen, counts):
+    board = Board(fen)
+    for depth, expected in enumerate(counts, start=1):
+        if expected > MAX_NODES:
+            break
+        assert perft(board, depth) == expected, f"{name} depth {depth}"
+    
+    # Make/unmake restores the position
+    assert board.to_fen() == Board(fen).to_fen()
+
+
+def test_fen_round_trip():
+    for _, fen, _ in PERFT_POSITIONS:
+        assert Board(fen).to_fen() == fen
+
+
+@pytest.mark.parametrize('name, fen, counts', PERFT_POSITIONS, ids=[position[0] for position in PERFT_POSITIONS])
+def test_moves_by_start_square(name, fen, counts):
+    board = Board(fen)
+    generator = MoveGenerator()
+    buffer = new_move_buffer()
+    count = generator.generate_move_values(board, buffer)
+    moves = sorted(buffer[:count])
+    
+    by_square = []
+    for square in range(64):
+        count = generator.generate_move_values(board, buffer, start_square=square)
+        by_square.extend(buffer[:count])
+    assert sorted(by_square) == moves
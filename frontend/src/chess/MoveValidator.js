@@ -1,6 +1,14 @@
 class MoveValidator {
-  constructor(board) {
+  // legalMoves: the server's legal moves for this board, { e2: 'e3e4', ... }
+  // (targets concatenated). When given, validation is a lookup.
+  constructor(board, legalMoves = null) {
     this.board = board;
+    this.legalTargets = null;
+    if (legalMoves) {
+      this.legalTargets = new Map(
+        Object.entries(legalMoves).map(([from, targets]) => [from, targets.match(/../g) || []])
+      );
+    }
   }
 
   isValidMove(from, to, promotion = null) {
@@ -9,6 +17,10 @@ class MoveValidator {
       return false;
     }
 
+    if (this.legalTargets) {
+      return (this.legalTargets.get(from) || []).includes(to);
+    }
+
     // ✅ FIX: Prevent capturing king
     const targetPiece = this.board.getPiece(to);
     if (targetPiece && targetPiece.type === 'king') {
@@ -41,6 +53,10 @@ class MoveValidator {
     const piece = this.board.getPiece(square);
     if (!piece) return [];
 
+    if (this.legalTargets && piece.color === this.board.turn) {
+      return this.legalTargets.get(square) || [];
+    }
+
     const moveFunctions = {
       'pawn': this.getPawnMoves.bind(this),
       'knight': this.getKnightMoves.bind(this),
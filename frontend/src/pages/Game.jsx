@@ -25,6 +25,8 @@ function Game() {
   // Core game state
   const [board, setBoard] = useState(new Board());
   const [validator, setValidator] = useState(new MoveValidator(board));
+  // Server-computed legal moves, tied to the board they were sent with
+  const [serverMoves, setServerMoves] = useState({ board: null, legalMoves: null });
   const [gameState, setGameState] = useState({
     status: 'ongoing',
     turn: 'white',
@@ -64,8 +66,9 @@ function Game() {
 
   // Update validator when board changes
   useEffect(() => {
-    setValidator(new MoveValidator(board));
-  }, [board]);
+    const legalMoves = serverMoves.board === board ? serverMoves.legalMoves : null;
+    setValidator(new MoveValidator(board, legalMoves));
+  }, [board, serverMoves]);
 
   useEffect(() => {
     preloadSounds();
@@ -117,6 +120,7 @@ function Game() {
     // Load board from FEN
     const newBoard = new Board(data.fen || data.current_fen);
     setBoard(newBoard);
+    setServerMoves({ board: newBoard, legalMoves: data.legal_moves || null });
 
     // Set clocks
     setWhiteTime(data.white_time || data.white_time_left);
@@ -198,6 +202,7 @@ function Game() {
     if (data.fen || moveData.fen) {
       const newBoard = new Board(data.fen || moveData.fen);
       setBoard(newBoard);
+      setServerMoves({ board: newBoard, legalMoves: data.legal_moves || null });
       console.log('📥 Board updated from server FEN, turn:', newBoard.turn);
     }
     
@@ -226,11 +231,6 @@ function Game() {
     setCurrentMoveIndex(prev => prev + 1);
   }, []);
 
-  const handleClockSync = useCallback((data) => {
-    setWhiteTime(data.white_time);
-    setBlackTime(data.black_time);
-  }, []);
-
   const handleStateSnapshot = useCallback((data) => {
     const newBoard = new Board(data.fen);
     setBoard(newBoard);
@@ -307,9 +307,6 @@ function Game() {
       case 'move_made':
         handleOpponentMove(data);
         break;
-      case 'clock_sync':
-        handleClockSync(data);
-        break;
       case 'state_snapshot':
         handleStateSnapshot(data);
         break;
@@ -336,7 +333,6 @@ function Game() {
   }, [
     handleGameState,
     handleOpponentMove,
-    handleClockSync,
     handleStateSnapshot,
     handleGameEnded,
     handleDrawOffer,
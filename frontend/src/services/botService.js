@@ -70,6 +70,81 @@ class BotService {
     }
   }
 
+  /**
+   * Submit a move and let the bot reply in the background
+   * @param {string} gameId - Game session ID
+   * @param {string|null} move - Move in UCI format, or null to let the bot move on its turn
+   * @returns {Promise<{success: boolean, job_id: string, job_url: string, stream_url: string, new_fen: string}>}
+   */
+  async startMoveJob(gameId, move = null) {
+    const response = await fetch(`${BOT_API_URL}/api/bot/games/${gameId}/move/`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ move, async: true })
+    });
+
+    const data = await response.json();
+    if (!response.ok) {
+      throw new Error(data.error || 'Move failed');
+    }
+    return data;
+  }
+
+  /**
+   * Poll a bot move job
+   * @param {string} gameId - Game session ID
+   * @param {string} jobId - Job ID returned by startMoveJob
+   * @returns {Promise<{status: string, progress: object, result: object|null}>}
+   */
+  async getMoveJob(gameId, jobId) {
+    const response = await fetch(`${BOT_API_URL}/api/bot/games/${gameId}/jobs/${jobId}/`);
+    const data = await response.json();
+    if (!response.ok) {
+      throw new Error(data.error || 'Job not found');
+    }
+    return data;
+  }
+
+  /**
+   * Subscribe to bot thinking progress (Server-Sent Events)
+   * @param {string} gameId - Game session ID
+   * @param {string} jobId - Job ID returned by startMoveJob
+   * @param {function} onProgress - Called with job state while the bot thinks
+   * @param {function} onFinished - Called with the final job state
+   * @returns {EventSource} Call close() to unsubscribe
+   */
+  streamMoveJob(gameId, jobId, onProgress, onFinished) {
+    const source = new EventSource(`${BOT_API_URL}/api/bot/games/${gameId}/jobs/${jobId}/stream/`);
+
+    source.addEventListener('progress', (event) => onProgress(JSON.parse(event.data)));
+    ['done', 'cancelled', 'failed'].forEach((type) => {
+      source.addEventListener(type, (event) => {
+        source.close();
+        onFinished(JSON.parse(event.data));
+      });
+    });
+
+    return source;
+  }
+
+  /**
+   * Tell the bot to play its best move so far
+   * @param {string} gameId - Game session ID
+   * @param {string} jobId - Job ID
+   */
+  async moveNow(gameId, jobId) {
+    await fetch(`${BOT_API_URL}/api/bot/games/${gameId}/jobs/${jobId}/stop/`, { method: 'POST' });
+  }
+
+  /**
+   * Abort the bot's search without playing a move
+   * @param {string} gameId - Game session ID
+   * @param {string} jobId - Job ID
+   */
+  async cancelMoveJob(gameId, jobId) {
+    await fetch(`${BOT_API_URL}/api/bot/games/${gameId}/jobs/${jobId}/cancel/`, { method: 'POST' });
+  }
+
   /**
    * Get game state
    * @param {string} gameId - Game session ID
@@ -0,0 +1,141 @@
+"""
+Benchmark the server move validator against the legacy dict-based engine.
+
+Replays games the way GameConsumer.make_move handles each move: build the
+engine from the stored FEN, is_valid_move(), make_move(). Reports time per
+move for both engines and any moves where their verdicts differ (validity,
+resulting FEN, check, checkmate, status).
+
+Games come from the database (recorded Move rows), a JSON file, or are
+generated as random legal games:
+    python bench_engine.py --from-db --limit 200 --export games.json
+    python bench_engine.py --games games.json
+    python bench_engine.py --random 100 --seed 1
+The JSON format is [{"initial_fen": "...", "moves": [["e2", "e4", null], ...]}, ...].
+"""
+
+import argparse
+import json
+import random
+import time
+
+from game.chess_engine import ChessEngine
+from legacy_chess_engine import LegacyChessEngine
+
+
+def load_db_games(limit):
+    """Recorded games with their moves, most recent first"""
+    import os
+    import django
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    django.setup()
+    
+    from game.models import Game
+    
+    games = []
+    for game in Game.objects.filter(move_count__gt=0).order_by('-created_at').prefetch_related('moves')[:limit]:
+        moves = sorted(game.moves.all(), key=lambda move: move.move_number)
+        games.append({
+            'initial_fen': game.initial_fen,
+            'moves': [[move.from_square, move.to_square, move.promotion or None] for move in moves],
+        })
+    return games
+
+
+def random_games(count, max_moves, seed):
+    """Random legal games played with the current engine"""
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        engine = ChessEngine()
+        moves = []
+        for _ in range(max_moves):
+            legal = engine.legal_moves()
+            if not legal:
+                break
+            from_sq, to_sq, promotion = rng.choice(legal)
+            moves.append([from_sq, to_sq, promotion])
+            if engine.make_move(from_sq, to_sq, promotion)['status'] != 'ongoing':
+                break
+        games.append({'initial_fen': ChessEngine().to_fen(), 'moves': moves})
+    return games
+
+
+def replay(engine_class, games):
+    """Per-game lists of move verdicts, and per-move timings (seconds), of one engine"""
+    verdicts = []
+    timings = []
+    for game in games:
+        game_verdicts = []
+        verdicts.append(game_verdicts)
+        fen = game['initial_fen']
+        for from_sq, to_sq, promotion in game['moves']:
+            start = time.perf_counter()
+            engine = engine_class(fen)
+            valid = engine.is_valid_move(from_sq, to_sq, promotion)
+            result = engine.make_move(from_sq, to_sq, promotion) if valid else None
+            timings.append(time.perf_counter() - start)
+            
+            if not valid:
+                game_verdicts.append((False,))
+                break
+            game_verdicts.append((True, result['fen'], result['is_check'], result['is_checkmate'], result['status']))
+            fen = result['fen']
+    return verdicts, timings
+
+
+def summarize(name, timings):
+    timings = sorted(timings)
+    total = sum(timings)
+    p95 = timings[int(0.95 * (len(timings) - 1))] if timings else 0
+    print(f"{name:<8}{len(timings):>8} moves {total:>8.2f}s  "
+          f"mean {total / max(len(timings), 1) * 1000:>7.2f}ms  p95 {p95 * 1000:>7.2f}ms")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the server move validator with the legacy engine')
+    parser.add_argument('--from-db', action='store_true', help='Replay recorded games from the database')
+    parser.add_argument('--limit', type=int, default=100, help='Games to load from the database')
+    parser.add_argument('--games', default=None, help='Replay games from a JSON file')
+    parser.add_argument('--random', type=int, default=50, help='Random games to generate otherwise')
+    parser.add_argument('--max-moves', type=int, default=120, help='Plies per random game')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible games')
+    parser.add_argument('--export', default=None, help='Write the replayed games to a JSON file')
+    args = parser.parse_args()
+    
+    if args.from_db:
+        games = load_db_games(args.limit)
+    elif args.games:
+        with open(args.games) as f:
+            games = json.load(f)
+    else:
+        games = random_games(args.random, args.max_moves, args.seed)
+    
+    if args.export:
+        with open(args.export, 'w') as f:
+            json.dump(games, f)
+    
+    print(f"Replaying {len(games)} games ({sum(len(game['moves']) for game in games)} moves)")
+    legacy_verdicts, legacy_timings = replay(LegacyChessEngine, games)
+    verdicts, timings = replay(ChessEngine, games)
+    
+    legacy_total = summarize('legacy', legacy_timings)
+    total = summarize('current', timings)
+    if total:
+        print(f"Speedup: {legacy_total / total:.1f}x")
+    
+    # First differing move of each game (later moves replay different positions)
+    mismatches = []
+    for game_index, (legacy_game, game) in enumerate(zip(legacy_verdicts, verdicts)):
+        for ply, (old, new) in enumerate(zip(legacy_game, game)):
+            if old != new:
+                mismatches.append((game_index, ply, old, new))
+                break
+    print(f"Games with differing verdicts: {len(mismatches)}")
+    for game_index, ply, old, new in mismatches[:10]:
+        print(f"  game {game_index} ply {ply}: legacy {old} / current {new}")
+
+
+if __name__ == '__main__':
+    main()
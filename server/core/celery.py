@@ -18,4 +18,8 @@ app.conf.beat_schedule = {
         'task': 'game.tasks.cleanup_stale_queues',
         'schedule': crontab(minute='*/5'),
     },
+    'replay-move-log': {
+        'task': 'game.tasks.replay_move_log',
+        'schedule': crontab(minute='*'),
+    },
 }
\ No newline at end of file
@@ -118,6 +118,21 @@ CACHES = {
     }
 }
 
+# Live game state kept in memory per server process (game/game_cache.py)
+GAME_CACHE_MAX_GAMES = int(os.environ.get('GAME_CACHE_MAX_GAMES', 5000))
+
+# Game pub/sub: one Redis pool per process, events fanned out to per-socket queues (game/game_subscriptions.py)
+GAME_REDIS_MAX_CONNECTIONS = int(os.environ.get('GAME_REDIS_MAX_CONNECTIONS', 50))
+GAME_EVENT_QUEUE_SIZE = int(os.environ.get('GAME_EVENT_QUEUE_SIZE', 256))
+# Seconds a process holds a game's clock lease without renewing it; another process takes over timeouts after this
+GAME_CLOCK_LEASE_SECONDS = float(os.environ.get('GAME_CLOCK_LEASE_SECONDS', 10))
+
+# Write-behind move persistence: moves are logged to a Redis stream and flushed in batches (game/write_behind.py)
+GAME_MOVE_FLUSH_INTERVAL = float(os.environ.get('GAME_MOVE_FLUSH_INTERVAL', 0.25))
+GAME_MOVE_FLUSH_BATCH = int(os.environ.get('GAME_MOVE_FLUSH_BATCH', 500))
+GAME_MOVE_LOG_CLAIM_IDLE = float(os.environ.get('GAME_MOVE_LOG_CLAIM_IDLE', 30))
+GAME_LIVE_STATE_TTL = int(os.environ.get('GAME_LIVE_STATE_TTL', 86400))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
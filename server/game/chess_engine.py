@@ -1,112 +1,204 @@
+"""
+Server-side move validation on the shared chess_core package - the same
+Board and MoveGenerator the bot searches with.
+
+ChessEngine keeps the API the consumers use (square names in, the
+make_move result dict out) and translates to chess_core's integer squares
+(a1 = 0 ... h8 = 63) and 16-bit move values. Moves are made in place and
+taken back with unmake_move.
+"""
+
+from chess_core.attacks import is_square_attacked
+from chess_core.board import Board, PROMOTION_PIECE_TYPES
+from chess_core.move import Move, SQUARE_NAMES
+from chess_core.move_generator import MoveGenerator, new_move_buffer
+from chess_core.piece import Piece
+
+PIECE_NAMES = [None, 'pawn', 'knight', 'bishop', 'rook', 'queen', 'king']
+PIECE_LETTERS = ' PNBRQK'
+COLORS = {'white': Piece.WHITE, 'black': Piece.BLACK}
+
+FILES = 'abcdefgh'
+SQUARE_INDEX = {name: index for index, name in enumerate(SQUARE_NAMES)}
+
+# Promotion choices as sent by clients ('queen') or as letters ('q')
+PROMOTION_FLAGS = {
+    'queen': Move.PROMOTE_TO_QUEEN_FLAG, 'rook': Move.PROMOTE_TO_ROOK_FLAG,
+    'bishop': Move.PROMOTE_TO_BISHOP_FLAG, 'knight': Move.PROMOTE_TO_KNIGHT_FLAG,
+    'q': Move.PROMOTE_TO_QUEEN_FLAG, 'r': Move.PROMOTE_TO_ROOK_FLAG,
+    'b': Move.PROMOTE_TO_BISHOP_FLAG, 'n': Move.PROMOTE_TO_KNIGHT_FLAG,
+}
+
+# Move generation keeps no state between calls, so engines share one generator
+_generator = MoveGenerator()
+
+
 class ChessEngine:
-    def __init__(self, fen='rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'):
-        self.board = {}
-        self.turn = 'white'
-        self.castling = {'K': True, 'Q': True, 'k': True, 'q': True}
-        self.en_passant = None
-        self.half_moves = 0
-        self.full_moves = 1
-        self.load_fen(fen)
+    def __init__(self, fen=Board.START_FEN):
+        self.core = Board(fen)
+        self.move_buffer = new_move_buffer()
+        self.undo_stack = []  # Move values made through this engine
+        self._legal = None  # Legal move values of the current position, once generated
+        self._legal_set = None
     
     def load_fen(self, fen):
-        parts = fen.split(' ')
-        position = parts[0]
-        
-        self.board = {}
-        ranks = position.split('/')
-        
-        for rank_idx, rank in enumerate(ranks):
-            file_idx = 0
-            for char in rank:
-                if char.isdigit():
-                    file_idx += int(char)
-                else:
-                    square = self.coord_to_square(file_idx, 7 - rank_idx)
-                    self.board[square] = self.parse_piece(char)
-                    file_idx += 1
-        
-        self.turn = 'white' if parts[1] == 'w' else 'black'
-        
-        castling_str = parts[2]
-        self.castling = {
-            'K': 'K' in castling_str,
-            'Q': 'Q' in castling_str,
-            'k': 'k' in castling_str,
-            'q': 'q' in castling_str
+        self.core = Board(fen)
+        self.undo_stack = []
+        self._forget_legal_moves()
+    
+    @property
+    def turn(self):
+        """Side to move, 'white' or 'black'"""
+        return 'white' if self.core.white_to_move else 'black'
+    
+    @property
+    def castling(self):
+        """Castling rights as {'K': bool, 'Q': bool, 'k': bool, 'q': bool}"""
+        rights = self.core.castling_rights
+        return {
+            'K': bool(rights & Board.WHITE_KINGSIDE_MASK),
+            'Q': bool(rights & Board.WHITE_QUEENSIDE_MASK),
+            'k': bool(rights & Board.BLACK_KINGSIDE_MASK),
+            'q': bool(rights & Board.BLACK_QUEENSIDE_MASK),
         }
-        
-        self.en_passant = parts[3] if parts[3] != '-' else None
-        self.half_moves = int(parts[4])
-        self.full_moves = int(parts[5])
     
-    def parse_piece(self, char):
-        is_white = char.isupper()
-        piece_map = {
-            'p': 'pawn', 'n': 'knight', 'b': 'bishop',
-            'r': 'rook', 'q': 'queen', 'k': 'king'
+    @property
+    def en_passant(self):
+        """En passant target square name, or None"""
+        if not self.core.en_passant_file:
+            return None
+        return FILES[self.core.en_passant_file - 1] + ('6' if self.core.white_to_move else '3')
+    
+    @property
+    def half_moves(self):
+        return self.core.fifty_move_counter
+    
+    @property
+    def full_moves(self):
+        return self.core.move_count
+    
+    @property
+    def board(self):
+        """Pieces by square name, e.g. {'e2': {'type': 'pawn', 'color': 'white'}} (built on demand)"""
+        return {
+            SQUARE_NAMES[index]: self._piece_dict(piece)
+            for index, piece in enumerate(self.core.square) if piece
         }
+    
+    def piece_at(self, square):
+        """Piece on a square name as {'type', 'color'}, or None"""
+        index = SQUARE_INDEX.get(square)
+        if index is None or not self.core.square[index]:
+            return None
+        return self._piece_dict(self.core.square[index])
+    
+    def _piece_dict(self, piece):
         return {
-            'type': piece_map[char.lower()],
-            'color': 'white' if is_white else 'black'
+            'type': PIECE_NAMES[Piece.piece_type(piece)],
+            'color': 'white' if Piece.is_white(piece) else 'black',
         }
     
-    def coord_to_square(self, file, rank):
-        files = 'abcdefgh'
-        return f"{files[file]}{rank + 1}"
+    def legal_move_values(self):
+        """Legal moves of the side to move as 16-bit move values (generated once per position)"""
+        if self._legal is None:
+            count = _generator.generate_move_values(self.core, self.move_buffer)
+            self._legal = self.move_buffer[:count]
+        return self._legal
     
-    def square_to_coord(self, square):
-        files = 'abcdefgh'
-        return files.index(square[0]), int(square[1]) - 1
+    def legal_move_set(self):
+        """Legal move values as a set, for constant-time validation"""
+        if self._legal_set is None:
+            self._legal_set = frozenset(self.legal_move_values())
+        return self._legal_set
+    
+    def encoded_legal_moves(self):
+        """
+        Legal moves in compact form for clients: origin square -> target
+        squares concatenated, e.g. {'e2': 'e3e4', 'g1': 'f3h3'}. A promotion
+        is listed once; the client picks the piece.
+        """
+        targets = {}
+        for value in self.legal_move_values():
+            start = SQUARE_NAMES[value & 0x3F]
+            target = SQUARE_NAMES[(value >> 6) & 0x3F]
+            if target not in targets.get(start, ''):
+                targets[start] = targets.get(start, '') + target
+        return targets
+    
+    def _forget_legal_moves(self):
+        self._legal = None
+        self._legal_set = None
+    
+    def legal_moves(self):
+        """Legal moves of the side to move as (from, to, promotion) with promotion None or a piece name"""
+        return [
+            (SQUARE_NAMES[value & 0x3F], SQUARE_NAMES[(value >> 6) & 0x3F],
+             PIECE_NAMES[PROMOTION_PIECE_TYPES[value >> 12]] if value >> 12 >= Move.PROMOTE_TO_QUEEN_FLAG else None)
+            for value in self.legal_move_values()
+        ]
     
     def is_valid_move(self, from_sq, to_sq, promotion=None):
         """Validate if a move is legal"""
-        piece = self.board.get(from_sq)
-        if not piece or piece['color'] != self.turn:
-            return False
-        
-        moves = self.get_piece_moves(from_sq)
-        if to_sq not in moves:
-            return False
-        
-        # CRITICAL: Check if move leaves king in check
-        # We need to simulate the move and check if OUR king is attacked
-        test_board = self.copy()
-        test_board.make_move_unsafe(from_sq, to_sq, promotion)
-        
-        # Find OUR king (the player making the move)
-        king_sq = test_board.find_king(self.turn)
-        if not king_sq:
+        start = SQUARE_INDEX.get(from_sq)
+        target = SQUARE_INDEX.get(to_sq)
+        if start is None or target is None:
             return False
         
-        # Check if OUR king is attacked after the move
-        if test_board.is_square_attacked(king_sq, self.turn):
+        piece = self.core.square[start]
+        if not piece or Piece.is_white(piece) != self.core.white_to_move:
             return False
         
-        return True
+        value = self._move_value(start, target, promotion)
+        if self._legal is not None:
+            return value in self.legal_move_set()
+
+        # Fresh position: only the moving piece's moves are needed
+        count = _generator.generate_move_values(self.core, self.move_buffer, start_square=start)
+        return value in self.move_buffer[:count]
+    
+    def _move_value(self, start, target, promotion=None):
+        """16-bit move value of a move given by squares (flags derived from the position)"""
+        squares = self.core.square
+        piece_type = Piece.piece_type(squares[start])
+        flag = Move.NO_FLAG
+        
+        if piece_type == Piece.PAWN:
+            if abs(target - start) == 16:
+                flag = Move.PAWN_TWO_UP_FLAG
+            elif target // 8 in (0, 7):
+                # Queen unless another piece is asked for
+                flag = PROMOTION_FLAGS.get(promotion or 'queen', Move.PROMOTE_TO_QUEEN_FLAG)
+            elif (target - start) % 8 and not squares[target]:
+                flag = Move.EN_PASSANT_FLAG
+        elif piece_type == Piece.KING and abs(target - start) == 2:
+            flag = Move.CASTLE_FLAG
+        
+        return start | (target << 6) | (flag << 12)
     
     def make_move(self, from_sq, to_sq, promotion=None):
         """
         Make a move and return game state info
-        CRITICAL FIX: Proper turn management and game state checking
+        (fen, piece, captured, notation, is_check, is_checkmate, status, winner)
         """
-        # Capture info BEFORE move
-        moving_piece = self.board[from_sq]
-        moving_color = moving_piece['color']  # Save who's moving
-        captured_piece_obj = self.board.get(to_sq)
-        captured_type = captured_piece_obj['type'] if captured_piece_obj else ''
-        
-        # Execute move (this will update board and switch turn)
-        self.make_move_unsafe(from_sq, to_sq, promotion)
-        
-        # AFTER move, the turn has switched to opponent
-        # So we need to check if OPPONENT is in check/checkmate/stalemate
-        opponent_color = self.turn  # Current turn is now the opponent
-        
-        is_check = self.is_in_check(opponent_color)
-        is_checkmate = is_check and self.is_checkmate(opponent_color)
-        is_stalemate = not is_check and self.is_stalemate(opponent_color)
+        start = SQUARE_INDEX[from_sq]
+        target = SQUARE_INDEX[to_sq]
+        moving_piece = self.core.square[start]
+        moving_color = 'white' if Piece.is_white(moving_piece) else 'black'
+        value = self._move_value(start, target, promotion)
+        flag = value >> 12
+        captured = Piece.PAWN if flag == Move.EN_PASSANT_FLAG else Piece.piece_type(self.core.square[target])
+        
+        self.core.make_move(value)
+        self.undo_stack.append(value)
+        self._forget_legal_moves()
+        
+        # The turn has passed to the opponent: check, checkmate or stalemate for them.
+        # The opponent's legal moves generated here stay cached for validating their reply.
+        is_check = self.core.is_in_check()
+        has_moves = len(self.legal_move_values()) > 0
+        is_checkmate = is_check and not has_moves
+        is_stalemate = not is_check and not has_moves
         
-        # Determine game status
         status = 'ongoing'
         winner = None
         
@@ -115,13 +207,12 @@ class ChessEngine:
             winner = moving_color  # Player who just moved wins
         elif is_stalemate:
             status = 'stalemate'
-            winner = None
         
         return {
             'fen': self.to_fen(),
-            'piece': moving_piece['type'],
-            'captured': captured_type,
-            'notation': self.to_algebraic(from_sq, to_sq, moving_piece, captured_piece_obj, promotion),
+            'piece': PIECE_NAMES[Piece.piece_type(moving_piece)],
+            'captured': PIECE_NAMES[captured] or '',
+            'notation': self._notation(value, moving_piece, captured),
             'is_check': is_check,
             'is_checkmate': is_checkmate,
             'status': status,
@@ -131,430 +222,89 @@ class ChessEngine:
     def make_move_unsafe(self, from_sq, to_sq, promotion=None):
         """
         Execute move without validation
-        Updates board state and switches turn
+        Updates board state and switches turn; returns the captured piece dict or None
         """
-        # FIX: Create a COPY of the piece dictionary
-        piece = self.board[from_sq].copy()
-        
-        # Handle promotion
-        if promotion and piece['type'] == 'pawn':
-            piece['type'] = promotion
-        
-        # Handle castling - move rook
-        if piece['type'] == 'king':
-            from_file, from_rank = self.square_to_coord(from_sq)
-            to_file, to_rank = self.square_to_coord(to_sq)
-            
-            if abs(to_file - from_file) == 2:
-                # Kingside
-                if to_file > from_file:
-                    rook_from = self.coord_to_square(7, from_rank)
-                    rook_to = self.coord_to_square(5, from_rank)
-                # Queenside
-                else:
-                    rook_from = self.coord_to_square(0, from_rank)
-                    rook_to = self.coord_to_square(3, from_rank)
-                
-                # FIX: Copy the rook too
-                rook = self.board[rook_from].copy()
-                del self.board[rook_from]
-                self.board[rook_to] = rook
-            
-            # Update castling rights when king moves
-            if piece['color'] == 'white':
-                self.castling['K'] = False
-                self.castling['Q'] = False
-            else:
-                self.castling['k'] = False
-                self.castling['q'] = False
-        
-        # Handle en passant capture
-        if piece['type'] == 'pawn' and to_sq == self.en_passant:
-            # Remove the captured pawn
-            capture_rank = 4 if piece['color'] == 'white' else 3
-            capture_sq = f"{to_sq[0]}{capture_rank + 1}"
-            if capture_sq in self.board:
-                del self.board[capture_sq]
-        
-        # Update en passant square for next move
-        self.en_passant = None
-        if piece['type'] == 'pawn':
-            from_file, from_rank = self.square_to_coord(from_sq)
-            to_file, to_rank = self.square_to_coord(to_sq)
-            
-            # Double pawn push sets en passant
-            if abs(to_rank - from_rank) == 2:
-                ep_rank = (from_rank + to_rank) // 2
-                self.en_passant = self.coord_to_square(from_file, ep_rank)
-        
-        # Update castling rights if rook moves
-        if piece['type'] == 'rook':
-            if from_sq == 'a1': self.castling['Q'] = False
-            if from_sq == 'h1': self.castling['K'] = False
-            if from_sq == 'a8': self.castling['q'] = False
-            if from_sq == 'h8': self.castling['k'] = False
-        
-        # FIX: Capture before moving (need for return value)
-        captured = self.board.get(to_sq)
-        
-        # Make the move
-        self.board[to_sq] = piece
-        del self.board[from_sq]
-        
-        # Switch turn
-        self.turn = 'black' if self.turn == 'white' else 'white'
-        
-        # Update move counters
-        if piece['type'] == 'pawn' or captured:
-            self.half_moves = 0
-        else:
-            self.half_moves += 1
-        
-        if self.turn == 'white':
-            self.full_moves += 1
-        
-        return captured
+        start = SQUARE_INDEX[from_sq]
+        target = SQUARE_INDEX[to_sq]
+        captured = self.core.square[target]
+        value = self._move_value(start, target, promotion)
+        self.core.make_move(value)
+        self.undo_stack.append(value)
+        self._forget_legal_moves()
+        return self._piece_dict(captured) if captured else None
+    
+    def unmake_move(self):
+        """Take back the last move made with make_move or make_move_unsafe"""
+        self.core.unmake_move(self.undo_stack.pop())
+        self._forget_legal_moves()
     
     def get_piece_moves(self, square):
-        """Get all pseudo-legal moves for a piece (doesn't check if king is in check)"""
-        piece = self.board.get(square)
-        if not piece:
+        """Legal target squares of the piece on a square (side to move only)"""
+        start = SQUARE_INDEX.get(square)
+        if start is None:
             return []
-        
-        move_funcs = {
-            'pawn': self.get_pawn_moves,
-            'knight': self.get_knight_moves,
-            'bishop': self.get_bishop_moves,
-            'rook': self.get_rook_moves,
-            'queen': self.get_queen_moves,
-            'king': self.get_king_moves
-        }
-        
-        return move_funcs[piece['type']](square, piece['color'])
-    
-    def get_pawn_moves(self, square, color):
-        moves = []
-        file, rank = self.square_to_coord(square)
-        direction = 1 if color == 'white' else -1
-        start_rank = 1 if color == 'white' else 6
-        
-        # Forward move
-        forward_rank = rank + direction
-        if 0 <= forward_rank < 8:
-            forward_sq = self.coord_to_square(file, forward_rank)
-            if forward_sq not in self.board:
-                moves.append(forward_sq)
-                
-                # Double push from starting position
-                if rank == start_rank:
-                    double_rank = rank + 2 * direction
-                    double_sq = self.coord_to_square(file, double_rank)
-                    if double_sq not in self.board:
-                        moves.append(double_sq)
-        
-        # Captures
-        for file_delta in [-1, 1]:
-            new_file = file + file_delta
-            if 0 <= new_file < 8:
-                capture_rank = rank + direction
-                if 0 <= capture_rank < 8:
-                    capture_sq = self.coord_to_square(new_file, capture_rank)
-                    target = self.board.get(capture_sq)
-                    
-                    # Regular capture
-                    if target and target['color'] != color:
-                        moves.append(capture_sq)
-                    
-                    # En passant
-                    if capture_sq == self.en_passant:
-                        moves.append(capture_sq)
-        
-        return moves
-    
-    def get_knight_moves(self, square, color):
-        moves = []
-        file, rank = self.square_to_coord(square)
-        deltas = [(2,1), (2,-1), (-2,1), (-2,-1), (1,2), (1,-2), (-1,2), (-1,-2)]
-        
-        for df, dr in deltas:
-            new_file, new_rank = file + df, rank + dr
-            if 0 <= new_file < 8 and 0 <= new_rank < 8:
-                target_sq = self.coord_to_square(new_file, new_rank)
-                target = self.board.get(target_sq)
-                if not target or target['color'] != color:
-                    moves.append(target_sq)
-        
-        return moves
-    
-    def get_sliding_moves(self, square, color, directions):
-        moves = []
-        file, rank = self.square_to_coord(square)
-        
-        for df, dr in directions:
-            new_file, new_rank = file + df, rank + dr
-            
-            while 0 <= new_file < 8 and 0 <= new_rank < 8:
-                target_sq = self.coord_to_square(new_file, new_rank)
-                target = self.board.get(target_sq)
-                
-                if not target:
-                    moves.append(target_sq)
-                else:
-                    if target['color'] != color:
-                        moves.append(target_sq)
-                    break
-                
-                new_file += df
-                new_rank += dr
-        
-        return moves
-    
-    def get_bishop_moves(self, square, color):
-        return self.get_sliding_moves(square, color, [(1,1), (1,-1), (-1,1), (-1,-1)])
-    
-    def get_rook_moves(self, square, color):
-        return self.get_sliding_moves(square, color, [(1,0), (-1,0), (0,1), (0,-1)])
-    
-    def get_queen_moves(self, square, color):
-        return self.get_sliding_moves(square, color, [
-            (1,1), (1,-1), (-1,1), (-1,-1),
-            (1,0), (-1,0), (0,1), (0,-1)
-        ])
-    
-    def get_king_moves(self, square, color):
-        """Get king moves including castling"""
-        moves = []
-        file, rank = self.square_to_coord(square)
-        
-        # Normal king moves (one square in any direction)
-        for df in [-1, 0, 1]:
-            for dr in [-1, 0, 1]:
-                if df == 0 and dr == 0:
-                    continue
-                
-                new_file, new_rank = file + df, rank + dr
-                if 0 <= new_file < 8 and 0 <= new_rank < 8:
-                    target_sq = self.coord_to_square(new_file, new_rank)
-                    target = self.board.get(target_sq)
-                    if not target or target['color'] != color:
-                        moves.append(target_sq)
-        
-        # Castling - only check if king is not in check
-        if not self.is_square_attacked(square, color):
-            start_rank = 0 if color == 'white' else 7
-            
-            # Kingside castling
-            if (color == 'white' and self.castling['K']) or (color == 'black' and self.castling['k']):
-                f_sq = self.coord_to_square(5, start_rank)
-                g_sq = self.coord_to_square(6, start_rank)
-                
-                # Check squares are empty and not attacked
-                if (f_sq not in self.board and g_sq not in self.board and
-                    not self.is_square_attacked(f_sq, color) and
-                    not self.is_square_attacked(g_sq, color)):
-                    moves.append(g_sq)
-            
-            # Queenside castling
-            if (color == 'white' and self.castling['Q']) or (color == 'black' and self.castling['q']):
-                d_sq = self.coord_to_square(3, start_rank)
-                c_sq = self.coord_to_square(2, start_rank)
-                b_sq = self.coord_to_square(1, start_rank)
-                
-                # Check squares are empty and not attacked
-                if (d_sq not in self.board and c_sq not in self.board and b_sq not in self.board and
-                    not self.is_square_attacked(d_sq, color) and
-                    not self.is_square_attacked(c_sq, color)):
-                    moves.append(c_sq)
-        
-        return moves
-    
-    def get_king_moves_simple(self, square, color):
-        """
-        King moves WITHOUT castling check
-        Used in is_square_attacked to prevent infinite recursion
-        """
-        moves = []
-        file, rank = self.square_to_coord(square)
-        
-        for df in [-1, 0, 1]:
-            for dr in [-1, 0, 1]:
-                if df == 0 and dr == 0:
-                    continue
-                
-                new_file, new_rank = file + df, rank + dr
-                if 0 <= new_file < 8 and 0 <= new_rank < 8:
-                    target_sq = self.coord_to_square(new_file, new_rank)
-                    target = self.board.get(target_sq)
-                    if not target or target['color'] != color:
-                        moves.append(target_sq)
-        
-        return moves
+        return [
+            SQUARE_NAMES[(value >> 6) & 0x3F]
+            for value in self.legal_move_values() if value & 0x3F == start
+        ]
     
     def is_square_attacked(self, square, defender_color):
-        """
-        Check if a square is attacked by opponent
-        CRITICAL: Uses simple king moves to avoid recursion
-        """
-        attacker_color = 'black' if defender_color == 'white' else 'white'
-        
-        for sq, piece in self.board.items():
-            if piece['color'] == attacker_color:
-                # For kings, use simple moves (no castling check)
-                if piece['type'] == 'king':
-                    moves = self.get_king_moves_simple(sq, piece['color'])
-                else:
-                    moves = self.get_piece_moves(sq)
-                
-                if square in moves:
-                    return True
-        
-        return False
+        """Check if a square is attacked by the opponent of defender_color"""
+        return is_square_attacked(self.core.square, SQUARE_INDEX[square], defender_color == 'black')
     
     def find_king(self, color):
         """Find king position for given color"""
-        for square, piece in self.board.items():
-            if piece['type'] == 'king' and piece['color'] == color:
-                return square
-        return None
+        index = self.core.king_square[0 if color == 'white' else 1]
+        return SQUARE_NAMES[index] if self.core.square[index] == Piece.KING | COLORS[color] else None
     
     def is_in_check(self, color):
         """Check if king of given color is in check"""
+        if color == self.turn:
+            return self.core.is_in_check()
         king_sq = self.find_king(color)
-        if not king_sq:
-            return False
-        return self.is_square_attacked(king_sq, color)
+        return king_sq is not None and self.is_square_attacked(king_sq, color)
     
     def is_checkmate(self, color):
-        """Check if given color is checkmated"""
-        if not self.is_in_check(color):
-            return False
-        
-        # Try all possible moves to see if any gets out of check
-        for square, piece in self.board.items():
-            if piece['color'] == color:
-                moves = self.get_piece_moves(square)
-                for move in moves:
-                    # Simulate move
-                    test_board = self.copy()
-                    test_board.make_move_unsafe(square, move, None)
-                    
-                    # Check if king is still in check after move
-                    # CRITICAL: Since turn switched, we need to check the PREVIOUS color
-                    king_sq = test_board.find_king(color)
-                    if not test_board.is_square_attacked(king_sq, color):
-                        return False  # Found a legal move
-        
-        return True  # No legal moves found
+        """Check if given color is checkmated (only the side to move can be)"""
+        return color == self.turn and self.core.is_in_check() and not len(self.legal_move_values())
     
     def is_stalemate(self, color):
-        """
-        Check if given color is stalemated
-        CRITICAL FIX: Ensure we're checking the right conditions
-        """
-        # Stalemate only if NOT in check
-        if self.is_in_check(color):
-            return False
-        
-        # Check if player has any legal moves
-        for square, piece in self.board.items():
-            if piece['color'] == color:
-                moves = self.get_piece_moves(square)
-                for move in moves:
-                    # Test if move is legal (doesn't leave king in check)
-                    test_board = self.copy()
-                    
-                    # CRITICAL: Save color before move
-                    moving_color = color
-                    test_board.make_move_unsafe(square, move, None)
-                    
-                    # Check if OUR king is safe after the move
-                    king_sq = test_board.find_king(moving_color)
-                    if not test_board.is_square_attacked(king_sq, moving_color):
-                        return False  # Found a legal move
-        
-        return True  # No legal moves and not in check = stalemate
+        """Check if given color is stalemated (side to move, not in check, no legal moves)"""
+        return color == self.turn and not self.core.is_in_check() and not len(self.legal_move_values())
     
     def to_fen(self):
         """Convert board to FEN string"""
-        fen = ''
-        
-        for rank in range(7, -1, -1):
-            empty = 0
-            for file in range(8):
-                square = self.coord_to_square(file, rank)
-                piece = self.board.get(square)
-                
-                if piece:
-                    if empty > 0:
-                        fen += str(empty)
-                        empty = 0
-                    fen += self.piece_to_char(piece)
-                else:
-                    empty += 1
-            
-            if empty > 0:
-                fen += str(empty)
-            if rank > 0:
-                fen += '/'
-        
-        fen += f" {'w' if self.turn == 'white' else 'b'}"
-        
-        castling = ''
-        if self.castling['K']: castling += 'K'
-        if self.castling['Q']: castling += 'Q'
-        if self.castling['k']: castling += 'k'
-        if self.castling['q']: castling += 'q'
-        fen += f" {castling or '-'}"
+        return self.core.to_fen()
+    
+    def _notation(self, value, piece, captured):
+        """Algebraic notation of a move (without disambiguation or check marks)"""
+        start = value & 0x3F
+        target = (value >> 6) & 0x3F
+        flag = value >> 12
+        piece_type = Piece.piece_type(piece)
         
-        fen += f" {self.en_passant or '-'}"
-        fen += f" {self.half_moves} {self.full_moves}"
+        if flag == Move.CASTLE_FLAG:
+            return 'O-O' if target > start else 'O-O-O'
         
-        return fen
-    
-    def piece_to_char(self, piece):
-        chars = {
-            'pawn': 'p', 'knight': 'n', 'bishop': 'b',
-            'rook': 'r', 'queen': 'q', 'king': 'k'
-        }
-        char = chars[piece['type']]
-        return char.upper() if piece['color'] == 'white' else char
-    
-    def to_algebraic(self, from_sq, to_sq, piece, captured, promotion):
-        """Convert move to algebraic notation"""
         notation = ''
         
-        # Castling
-        if piece['type'] == 'king' and abs(ord(from_sq[0]) - ord(to_sq[0])) == 2:
-            return 'O-O' if ord(to_sq[0]) > ord(from_sq[0]) else 'O-O-O'
-        
         # Piece prefix (except pawns)
-        if piece['type'] != 'pawn':
-            notation += piece['type'][0].upper()
+        if piece_type != Piece.PAWN:
+            notation += PIECE_LETTERS[piece_type]
         
         # Capture notation
         if captured:
-            if piece['type'] == 'pawn':
-                notation += from_sq[0]  # File of origin for pawn captures
+            if piece_type == Piece.PAWN:
+                notation += FILES[start % 8]  # File of origin for pawn captures
             notation += 'x'
         
-        notation += to_sq
+        notation += SQUARE_NAMES[target]
         
-        # Promotion
-        if promotion:
-            notation += '=' + promotion[0].upper()
+        if flag >= Move.PROMOTE_TO_QUEEN_FLAG:
+            notation += '=' + PIECE_LETTERS[PROMOTION_PIECE_TYPES[flag]]
         
         return notation
     
     def copy(self):
-        """Create a deep copy of the engine"""
-        new_engine = ChessEngine()
-        
-        # Deep copy each piece dictionary
-        new_engine.board = {k: v.copy() for k, v in self.board.items()}
-        new_engine.turn = self.turn
-        new_engine.castling = self.castling.copy()
-        new_engine.en_passant = self.en_passant
-        new_engine.half_moves = self.half_moves
-        new_engine.full_moves = self.full_moves
-        
-        return new_engine
\ No newline at end of file
+        """Create a copy of the engine (without the move history)"""
+        return ChessEngine(self.to_fen())
@@ -3,9 +3,25 @@ import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.utils import timezone
-from datetime import datetime
-import redis.asyncio as aioredis
+import time
 from django.conf import settings
+from django.db import transaction
+
+from .game_cache import game_state_cache
+from .game_clock import clock_scheduler
+from .event_bus import events_channel, game_event_bus
+from .game_subscriptions import game_subscriptions
+from .write_behind import game_row_fields, move_write_behind
+
+
+# Move fields sent to clients from both Move rows and logged moves
+MOVE_RECORD_FIELDS = (
+    'move_number', 'color', 'from_square', 'to_square', 'piece', 'captured_piece',
+    'algebraic_notation', 'fen_after', 'is_check', 'time_left',
+)
+
+# Events whose content the game_state snapshot already carries
+SNAPSHOT_EVENTS = ('move_made',)
 
 
 class GameConsumer(AsyncWebsocketConsumer):
@@ -13,50 +29,26 @@ class GameConsumer(AsyncWebsocketConsumer):
     
     async def connect(self):
         self.game_id = self.scope['url_route']['kwargs']['game_id']
-        self.room_group_name = f'game_{self.game_id}'
         self.user = self.scope['user']
         
-        # Redis pub/sub channels
-        self.game_channel = f"game:{self.game_id}:events"
-        self.clock_channel = f"game:{self.game_id}:clock"
+        # All game events (moves, clocks, draws, chat) arrive on one sequenced channel
+        self.game_channel = events_channel(self.game_id)
+        self.last_seq = None  # Sequence number of the last event handled for this socket
+        self.snapshot_seq = 0  # Sequence number the last game_state snapshot was taken at
         
-        # FIX: Better Redis connection with error handling
+        # Shared per-process Redis client; one pubsub per process fans events out to local queues
         try:
-            self.redis = await aioredis.from_url(
-                f"redis://{getattr(settings, 'REDIS_HOST', 'localhost')}:{getattr(settings, 'REDIS_PORT', 6379)}",
-                encoding="utf-8",
-                decode_responses=True,
-                socket_keepalive=True,  # Keep connection alive
-                socket_keepalive_options={
-                    1: 1,  # TCP_KEEPIDLE
-                    2: 1,  # TCP_KEEPINTVL
-                    3: 3,  # TCP_KEEPCNT
-                },
-            )
-            
-            # Subscribe to game events
-            self.pubsub = self.redis.pubsub()
-            await self.pubsub.subscribe(self.game_channel, self.clock_channel)
+            self.redis = await game_subscriptions.connect()
+            self.event_queue = game_subscriptions.new_queue()
+            await game_subscriptions.subscribe([self.game_channel], self.event_queue)
+            move_write_behind.start()
             
             # Start listening task
             self.listener_task = asyncio.create_task(self._redis_listener())
-            
-            print(f"Redis connected for game {self.game_id}")
         except Exception as e:
-            print(f"Redis connection failed: {e}. Falling back to channel layer only.")
+            print(f"Redis connection failed: {e}. Live game events are unavailable.")
             self.redis = None
-            self.pubsub = None
-        
-        # Join channel layer group for broadcasts (fallback)
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
-        
-        # Subscribe to clock manager
-        if self.redis:
-            self.clock_manager = GameClockManager.get_or_create(self.game_id, self.redis)
-            await self.clock_manager.subscribe(self.channel_name)
+            self.event_queue = None
         
         await self.accept()
         print(f"{self.user.username} connected to game {self.game_id}")
@@ -64,11 +56,10 @@ class GameConsumer(AsyncWebsocketConsumer):
     async def disconnect(self, close_code):
         print(f"🔌 {self.user.username} disconnecting from game {self.game_id} (code: {close_code})")
         
-        # Unsubscribe from Redis
-        if hasattr(self, 'pubsub') and self.pubsub:
+        # Unsubscribe from Redis (the shared connection stays open)
+        if getattr(self, 'event_queue', None) is not None:
             try:
-                await self.pubsub.unsubscribe(self.game_channel, self.clock_channel)
-                await self.pubsub.close()
+                await game_subscriptions.unsubscribe([self.game_channel], self.event_queue)
             except Exception as e:
                 print(f"Error unsubscribing from Redis: {e}")
         
@@ -80,61 +71,41 @@ class GameConsumer(AsyncWebsocketConsumer):
             except asyncio.CancelledError:
                 pass
         
-        # Unsubscribe from clock
-        if hasattr(self, 'clock_manager') and self.clock_manager:
-            await self.clock_manager.unsubscribe(self.channel_name)
-        
-        # Leave channel layer group
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
-        
-        # Close Redis connection
-        if hasattr(self, 'redis') and self.redis:
-            try:
-                await self.redis.close()
-            except Exception as e:
-                print(f"Error closing Redis: {e}")
-        
         print(f"{self.user.username} disconnected from game {self.game_id}")
     
     async def _redis_listener(self):
-        """Listen for Redis pub/sub messages"""
+        """Handle events the shared pubsub queued for this socket"""
         try:
-            async for message in self.pubsub.listen():
-                if message['type'] == 'message':
-                    try:
-                        data = json.loads(message['data'])
-                        await self._handle_redis_event(data)
-                    except json.JSONDecodeError as e:
-                        print(f"Failed to parse Redis message: {message['data']} - {e}")
-                    except Exception as e:
-                        print(f"Error handling Redis event: {e}")
-                        import traceback
-                        traceback.print_exc()
+            while True:
+                event = await self.event_queue.get()
+                try:
+                    await self._handle_redis_event(event)
+                except Exception as e:
+                    print(f"Error handling Redis event: {e}")
+                    import traceback
+                    traceback.print_exc()
         except asyncio.CancelledError:
             print("🔌 Redis listener cancelled")
-        except Exception as e:
-            print(f"Redis listener error: {e}")
-            # Don't crash, just log and exit gracefully
     
     async def _handle_redis_event(self, event):
         """Handle incoming Redis events"""
-        event_type = event.get('type')
-        
-        if event_type == 'move_made':
-            await self.send(json.dumps(event))
-        elif event_type == 'game_ended':
-            await self.send(json.dumps(event))
-        elif event_type == 'draw_offer':
-            await self.send(json.dumps(event))
-        elif event_type == 'draw_declined':
-            await self.send(json.dumps(event))
-        elif event_type == 'clock_sync':
-            await self.send(json.dumps(event))
-        else:
-            await self.send(json.dumps(event))
+        # Drop events already handled; resync the whole state after a gap
+        seq = event.get('seq')
+        if seq is not None:
+            if self.last_seq is not None:
+                if seq <= self.last_seq:
+                    game_event_bus.duplicates_dropped += 1
+                    return
+                if seq > self.last_seq + 1:
+                    game_event_bus.gaps += 1
+                    print(f"Event gap in game {self.game_id}: {self.last_seq} -> {seq}, resyncing")
+                    await self.join_game()
+            self.last_seq = seq
+            # Moves up to the snapshot are in it; chat, draw offers and endings are not
+            if seq <= self.snapshot_seq and event.get('type') in SNAPSHOT_EVENTS:
+                return
+        
+        await self.send(json.dumps(event))
     
     async def receive(self, text_data):
         """Handle incoming WebSocket messages"""
@@ -167,6 +138,10 @@ class GameConsumer(AsyncWebsocketConsumer):
     
     async def join_game(self):
         """Initialize game state for new connection"""
+        # Events up to here are part of the state sent below
+        if self.redis:
+            self.snapshot_seq = await game_event_bus.current_seq(self.redis, self.game_id)
+        
         game = await self.get_game()
         if not game:
             await self.send(json.dumps({
@@ -175,7 +150,18 @@ class GameConsumer(AsyncWebsocketConsumer):
             }))
             return
         
-        moves = await self.get_moves()
+        moves = await self.get_move_records()
+        live = await self.get_live_game()
+        
+        # Live state is ahead of the row while moves wait to be flushed
+        fen, status, current_turn = game.current_fen, game.status, game.current_turn
+        if live:
+            fen, status, current_turn = live.engine.to_fen(), live.status, live.current_turn
+        
+        # Clocks as of now; the client counts down from here
+        white_time, black_time = game.white_time_left, game.black_time_left
+        if live and live.status == 'ongoing':
+            white_time, black_time = live.clock()
         
         await self.send(json.dumps({
             'type': 'game_state',
@@ -190,22 +176,23 @@ class GameConsumer(AsyncWebsocketConsumer):
                 'username': game.black_player.username,
                 'rating': game.black_rating_before
             },
-            'fen': game.current_fen,
-            'status': game.status,
-            'white_time': game.white_time_left,
-            'black_time': game.black_time_left,
+            'fen': fen,
+            'status': status,
+            'white_time': white_time,
+            'black_time': black_time,
             'increment': game.increment * 1000,
             'moves': [
                 {
-                    'from': m.from_square,
-                    'to': m.to_square,
-                    'notation': m.algebraic_notation,
-                    'color': m.color,
-                    'piece': m.piece,
-                    'captured': m.captured_piece,
+                    'from': m['from_square'],
+                    'to': m['to_square'],
+                    'notation': m['algebraic_notation'],
+                    'color': m['color'],
+                    'piece': m['piece'],
+                    'captured': m['captured_piece'],
                 } for m in moves
             ],
-            'current_turn': game.current_turn,
+            'current_turn': current_turn,
+            'legal_moves': live.engine.encoded_legal_moves() if live and live.status == 'ongoing' else {},
         }))
     
     async def make_move(self, payload):
@@ -232,10 +219,10 @@ class GameConsumer(AsyncWebsocketConsumer):
                 return
         
         try:
-            game = await self.get_game()
+            live = await self.get_live_game()
             
-            if not game or game.status != 'ongoing':
-                print(f"❌ Invalid game state: status={game.status if game else 'None'}")
+            if not live or live.status != 'ongoing':
+                print(f"❌ Invalid game state: status={live.status if live else 'None'}")
                 await self.send(json.dumps({
                     'type': 'error',
                     'message': 'Invalid game state'
@@ -243,9 +230,8 @@ class GameConsumer(AsyncWebsocketConsumer):
                 return
             
             # Verify it's player's turn
-            if (game.current_turn == 'white' and game.white_player.id != self.user.id) or \
-               (game.current_turn == 'black' and game.black_player.id != self.user.id):
-                print(f"❌ Not player's turn: current={game.current_turn}, player={self.user.username}")
+            if live.player_color(self.user.id) != live.current_turn:
+                print(f"❌ Not player's turn: current={live.current_turn}, player={self.user.username}")
                 await self.send(json.dumps({
                     'type': 'error',
                     'message': 'Not your turn'
@@ -253,18 +239,12 @@ class GameConsumer(AsyncWebsocketConsumer):
                 return
             
             # CRITICAL: Capture color BEFORE engine changes state
-            moving_color = game.current_turn
-            
-            # Validate and execute move
-            from .chess_engine import ChessEngine
-            engine = ChessEngine(game.current_fen)
-            
-            # Add detailed validation logging
-            print(f"Board state: turn={engine.turn}, FEN={game.current_fen[:50]}...")
+            moving_color = live.current_turn
+            engine = live.engine
             
             if not engine.is_valid_move(from_square, to_square, promotion):
                 # Log WHY it's invalid
-                piece = engine.board.get(from_square)
+                piece = engine.piece_at(from_square)
                 print(f"   Invalid move rejected:")
                 print(f"   From: {from_square} -> To: {to_square}")
                 print(f"   Piece at source: {piece}")
@@ -278,28 +258,55 @@ class GameConsumer(AsyncWebsocketConsumer):
                 }))
                 return
             
-            # Execute move in engine
+            # Stop the mover's clock; a flag that has fallen ends the game instead
+            now = time.time()
+            time_spent = int((now - live.turn_started_at) * 1000)
+            white_time, black_time = live.clock(now)
+            if (white_time if moving_color == 'white' else black_time) <= 0:
+                clock_scheduler.check_now(self.game_id)
+                await self.send(json.dumps({
+                    'type': 'error',
+                    'message': 'Time is up'
+                }))
+                return
+            
+            # Execute move on the cached engine (taken back if the write fails)
             result = engine.make_move(from_square, to_square, promotion)
             
             print(f"Move executed: {moving_color} {from_square}->{to_square} = {result['notation']}")
             
             # Add time increment to player who just moved
             if moving_color == 'white':
-                game.white_time_left += game.increment * 1000
+                white_time += live.increment * 1000
             else:
-                game.black_time_left += game.increment * 1000
+                black_time += live.increment * 1000
             
-            # Save move to database
-            move = await self.save_move(game, from_square, to_square, result, moving_color)
-            
-            # Update game state in database
-            await self.update_game_state(
-                game.game_id,
-                result['fen'],
-                result.get('status'),
-                game.white_time_left,
-                game.black_time_left
+            # Commit the move to the Redis log (flushed to the database in the background),
+            # or write it to the database directly when Redis is unavailable
+            move_fields, game_fields = self.move_record(
+                live, from_square, to_square, result, moving_color, white_time, black_time, now, time_spent
             )
+            try:
+                if self.redis:
+                    version = await move_write_behind.commit_move(self.redis, live, move_fields, game_fields)
+                    if not version:
+                        raise RuntimeError('Game state changed in another process, please retry')
+                    live.version = version
+                else:
+                    await self.save_move(live, move_fields, game_fields)
+            except Exception:
+                engine.unmake_move()
+                game_state_cache.invalidate(self.game_id)
+                raise
+            
+            move_number = live.move_count
+            live.move_count += 1
+            live.white_time_left = white_time
+            live.black_time_left = black_time
+            live.turn_started_at = now
+            if result['status'] != 'ongoing':
+                live.status = result['status']
+            clock_scheduler.watch(live)
             
             # FIX: Publish move event to Redis (with fallback)
             move_event = {
@@ -316,27 +323,22 @@ class GameConsumer(AsyncWebsocketConsumer):
                     'is_check': result.get('is_check', False),
                     'color': moving_color,
                     'timestamp': timezone.now().isoformat(),
-                    'sequence': game.move_count,
+                    'sequence': move_number,
                 },
                 'fen': result['fen'],  # Add top-level FEN
-                'white_time': game.white_time_left,
-                'black_time': game.black_time_left,
+                'white_time': white_time,
+                'black_time': black_time,
+                # When the side to move flags (epoch seconds); clock schedulers in other processes follow it
+                'deadline': live.flag_deadline() if live.status == 'ongoing' else None,
+                # Legal replies (already generated by make_move), so clients don't recompute them
+                'legal_moves': engine.encoded_legal_moves(),
             }
             
             # Publish to Redis if available
             if self.redis:
-                await self.redis.publish(self.game_channel, json.dumps(move_event))
+                await game_event_bus.publish(self.redis, self.game_id, move_event)
                 print(f"Move published to Redis: {moving_color} {from_square}->{to_square}")
-            
-            # Also broadcast via channel layer (fallback)
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'broadcast_move',
-                    'event': move_event
-                }
-            )
-            
+        
         except Exception as e:
             print(f"Move error: {e}")
             import traceback
@@ -352,6 +354,9 @@ class GameConsumer(AsyncWebsocketConsumer):
     
     async def handle_chat(self, payload):
         """Broadcast chat message via Redis"""
+        if not await self.require_redis():
+            return
+        
         chat_event = {
             'type': 'chat_message',
             'message': {
@@ -362,20 +367,22 @@ class GameConsumer(AsyncWebsocketConsumer):
                 'is_system': payload.get('is_system', False),
             }
         }
-        await self.redis.publish(self.game_channel, json.dumps(chat_event))
+        await game_event_bus.publish(self.redis, self.game_id, chat_event)
     
     async def jump_to_move(self, payload):
         """Send state snapshot at specific move"""
         move_index = payload.get('move_index', -1)
-        game = await self.get_game()
-        moves = await self.get_moves()
+        live = await self.get_live_game()
+        moves = await self.get_move_records()
+        if not live:
+            return
         
         if move_index < 0 or move_index >= len(moves):
             await self.send(json.dumps({
                 'type': 'state_snapshot',
-                'fen': game.current_fen,
-                'white_time': game.white_time_left,
-                'black_time': game.black_time_left,
+                'fen': live.engine.to_fen(),
+                'white_time': live.white_time_left,
+                'black_time': live.black_time_left,
                 'move_index': len(moves) - 1,
                 'check': None,
                 'last_move': None,
@@ -385,22 +392,22 @@ class GameConsumer(AsyncWebsocketConsumer):
         target_move = moves[move_index]
         await self.send(json.dumps({
             'type': 'state_snapshot',
-            'fen': target_move.fen_after,
-            'white_time': target_move.time_left if target_move.color == 'white' else game.white_time_left,
-            'black_time': target_move.time_left if target_move.color == 'black' else game.black_time_left,
+            'fen': target_move['fen_after'],
+            'white_time': target_move['time_left'] if target_move['color'] == 'white' else live.white_time_left,
+            'black_time': target_move['time_left'] if target_move['color'] == 'black' else live.black_time_left,
             'move_index': move_index,
-            'check': target_move.is_check,
+            'check': target_move['is_check'],
             'last_move': {
-                'from': target_move.from_square,
-                'to': target_move.to_square,
+                'from': target_move['from_square'],
+                'to': target_move['to_square'],
             },
         }))
     
     async def resign(self):
         """Handle resignation via Redis event"""
-        game = await self.get_game()
+        live = await self.get_live_game()
         
-        if not game or game.status != 'ongoing':
+        if not live or live.status != 'ongoing':
             await self.send(json.dumps({
                 'type': 'error',
                 'message': 'Game is not ongoing'
@@ -408,12 +415,11 @@ class GameConsumer(AsyncWebsocketConsumer):
             return
         
         # Determine winner
-        if game.white_player.id == self.user.id:
-            winner = game.black_player
+        player_color = live.player_color(self.user.id)
+        if player_color == 'white':
             winner_color = 'black'
             result = '0-1'
-        elif game.black_player.id == self.user.id:
-            winner = game.white_player
+        elif player_color == 'black':
             winner_color = 'white'
             result = '1-0'
         else:
@@ -424,13 +430,15 @@ class GameConsumer(AsyncWebsocketConsumer):
             return
         
         # Update game in database
-        await self.end_game(
-            game.game_id,
+        ended = await self.end_game(
+            live,
             status='completed',
             result=result,
-            winner=winner,
+            winner_color=winner_color,
             termination='resignation'
         )
+        if not ended:
+            return
         
         # Publish game end event to Redis
         end_event = {
@@ -441,13 +449,16 @@ class GameConsumer(AsyncWebsocketConsumer):
             'result': result,
             'message': f'{self.user.username} resigned'
         }
-        await self.redis.publish(self.game_channel, json.dumps(end_event))
+        await self.publish_game_end(end_event)
     
     async def offer_draw(self):
         """Offer draw via Redis"""
-        game = await self.get_game()
+        if not await self.require_redis():
+            return
         
-        if not game or game.status != 'ongoing':
+        live = await self.get_live_game()
+        
+        if not live or live.status != 'ongoing':
             await self.send(json.dumps({
                 'type': 'error',
                 'message': 'Game is not ongoing'
@@ -455,11 +466,8 @@ class GameConsumer(AsyncWebsocketConsumer):
             return
         
         # Determine who made the offer
-        if game.white_player.id == self.user.id:
-            offer_from = 'white'
-        elif game.black_player.id == self.user.id:
-            offer_from = 'black'
-        else:
+        offer_from = live.player_color(self.user.id)
+        if offer_from is None:
             await self.send(json.dumps({
                 'type': 'error',
                 'message': 'You are not a player in this game'
@@ -472,13 +480,13 @@ class GameConsumer(AsyncWebsocketConsumer):
             'offer_from': offer_from,
             'username': self.user.username,
         }
-        await self.redis.publish(self.game_channel, json.dumps(draw_event))
+        await game_event_bus.publish(self.redis, self.game_id, draw_event)
     
     async def accept_draw(self):
         """Accept draw via Redis"""
-        game = await self.get_game()
+        live = await self.get_live_game()
         
-        if not game or game.status != 'ongoing':
+        if not live or live.status != 'ongoing':
             await self.send(json.dumps({
                 'type': 'error',
                 'message': 'Game is not ongoing'
@@ -486,13 +494,15 @@ class GameConsumer(AsyncWebsocketConsumer):
             return
         
         # Update game to draw
-        await self.end_game(
-            game.game_id,
+        ended = await self.end_game(
+            live,
             status='completed',
             result='1/2-1/2',
-            winner=None,
+            winner_color=None,
             termination='agreement'
         )
+        if not ended:
+            return
         
         # Publish game end to Redis
         end_event = {
@@ -503,24 +513,35 @@ class GameConsumer(AsyncWebsocketConsumer):
             'result': '1/2-1/2',
             'message': 'Draw by agreement'
         }
-        await self.redis.publish(self.game_channel, json.dumps(end_event))
+        await self.publish_game_end(end_event)
     
     async def decline_draw(self):
         """Decline draw offer via Redis"""
+        if not await self.require_redis():
+            return
+        
         decline_event = {
             'type': 'draw_declined',
             'message': 'Draw offer declined'
         }
-        await self.redis.publish(self.game_channel, json.dumps(decline_event))
+        await game_event_bus.publish(self.redis, self.game_id, decline_event)
     
-    # Channel layer handlers (for clock updates from manager)
-    async def clock_tick(self, event):
-        """Handle clock tick from clock manager"""
+    async def require_redis(self):
+        """True if events can be published; otherwise tells the client"""
+        if self.redis:
+            return True
         await self.send(json.dumps({
-            'type': 'clock_sync',
-            'white_time': event['white_time'],
-            'black_time': event['black_time'],
+            'type': 'error',
+            'message': 'Live game events are unavailable, please reconnect'
         }))
+        return False
+    
+    async def publish_game_end(self, end_event):
+        """Publish a game end; without Redis at least this client learns the game is over"""
+        if self.redis:
+            await game_event_bus.publish(self.redis, self.game_id, end_event)
+        else:
+            await self.send(json.dumps(end_event))
     
     # Database operations
     @database_sync_to_async
@@ -534,58 +555,123 @@ class GameConsumer(AsyncWebsocketConsumer):
     @database_sync_to_async
     def get_moves(self):
         from .models import Move
-        return list(Move.objects.filter(game_id=self.game_id).order_by('move_number', 'id'))
+        # White before black within a move number: rows of one game may be flushed out of order
+        return list(Move.objects.filter(game_id=self.game_id).order_by('move_number', '-color'))
     
-    @database_sync_to_async
-    def save_move(self, game, from_sq, to_sq, result, color):
-        from .models import Move
-        move_num = (game.move_count // 2) + 1
-        time_left = game.white_time_left if color == 'white' else game.black_time_left
-        
-        captured = result.get('captured', '')
-        
-        return Move.objects.create(
-            game=game,
-            move_number=move_num,
-            color=color,
-            from_square=from_sq,
-            to_square=to_sq,
-            piece=result['piece'],
-            captured_piece=captured,
-            promotion=result.get('promotion', ''),
-            algebraic_notation=result['notation'],
-            fen_after=result['fen'],
-            is_check=result.get('is_check', False),
-            is_checkmate=result.get('is_checkmate', False),
-            time_spent=0,
-            time_left=time_left,
-        )
+    async def get_move_records(self):
+        """Moves of this game as Move field dicts, including those logged in Redis and not flushed yet"""
+        records = {(m.move_number, m.color): {field: getattr(m, field) for field in MOVE_RECORD_FIELDS}
+                   for m in await self.get_moves()}
+        if self.redis:
+            for move in await move_write_behind.pending_moves(self.redis, self.game_id):
+                records.setdefault((move['move_number'], move['color']), move)
+        return [records[key] for key in sorted(records, key=lambda key: (key[0], key[1] != 'white'))]
+    
+    async def get_live_game(self):
+        """Cached live state of this game (loads the Game row on a miss or stale version)"""
+        live = await game_state_cache.get(self.game_id, self.redis, self.get_game)
+        if live:
+            clock_scheduler.watch(live)
+        return live
+    
+    def move_record(self, live, from_sq, to_sq, result, color, white_time, black_time, moved_at, time_spent):
+        """Move row fields and new Game row fields of a move made on live (times in epoch seconds)"""
+        move = {
+            'move_number': (live.move_count // 2) + 1,
+            'color': color,
+            'from_square': from_sq,
+            'to_square': to_sq,
+            'piece': result['piece'],
+            'captured_piece': result.get('captured', ''),
+            'promotion': result.get('promotion', ''),
+            'algebraic_notation': result['notation'],
+            'fen_after': result['fen'],
+            'is_check': result.get('is_check', False),
+            'is_checkmate': result.get('is_checkmate', False),
+            'time_spent': time_spent,
+            'time_left': white_time if color == 'white' else black_time,
+        }
+        game = {
+            'current_fen': result['fen'],
+            'move_count': live.move_count + 1,
+            'current_turn': 'black' if color == 'white' else 'white',
+            'white_time_left': white_time,
+            'black_time_left': black_time,
+            'turn_started_at': moved_at,
+            'status': result['status'],
+        }
+        if result['status'] != 'ongoing':
+            game['ended_at'] = moved_at
+        return move, game
     
     @database_sync_to_async
-    def update_game_state(self, game_id, fen, status, white_time, black_time):
-        from .models import Game
-        
-        game = Game.objects.get(game_id=game_id)
-        game.current_fen = fen
-        game.move_count += 1
-        game.current_turn = 'black' if game.current_turn == 'white' else 'white'
-        game.white_time_left = white_time
-        game.black_time_left = black_time
-        
-        if status and status != 'ongoing':
-            game.status = status
-            game.ended_at = timezone.now()
+    def save_move(self, live, move, game):
+        """
+        Insert the move and update the game row in one transaction, without
+        reading either (used when Redis is unavailable). The update only
+        matches if no other process has moved since the cached state was
+        loaded.
+        """
+        from .models import Game, Move
+        
+        with transaction.atomic():
+            updated = Game.objects.filter(
+                game_id=live.game_id, move_count=live.move_count, status='ongoing'
+            ).update(**game_row_fields(game))
+            if not updated:
+                raise RuntimeError('Game state changed in another process, please retry')
+            
+            Move.objects.create(game_id=live.game_id, **move)
+    
+    async def end_game(self, live, status, result, winner_color, termination):
+        """
+        End the game in Redis, the database and the cached state. Returns
+        False (and tells the player) if a move or another ending got there
+        first.
+        """
+        if self.redis:
+            version = await move_write_behind.end_game(self.redis, live, status)
+            if not version:
+                game_state_cache.invalidate(live.game_id)
+                await self.send(json.dumps({
+                    'type': 'error',
+                    'message': 'Game state changed in another process, please retry'
+                }))
+                return False
+            live.version = version
         
-        game.save()
+        try:
+            await self._save_game_end(live, status, result, winner_color, termination)
+        except Exception as e:
+            # Otherwise Redis would keep the game ended while the row stays ongoing
+            print(f"Saving the end of game {live.game_id} failed: {e}")
+            if self.redis:
+                await move_write_behind.reopen_game(self.redis, live, status)
+            game_state_cache.invalidate(live.game_id)
+            await self.send(json.dumps({
+                'type': 'error',
+                'message': 'Could not end the game, please retry'
+            }))
+            return False
+        live.status = status
+        clock_scheduler.cancel(live.game_id)
+        return True
     
     @database_sync_to_async
-    def end_game(self, game_id, status, result, winner, termination):
+    @transaction.atomic
+    def _save_game_end(self, live, status, result, winner_color, termination):
         from .models import Game
         
-        game = Game.objects.get(game_id=game_id)
+        game = Game.objects.select_for_update().select_related('white_player', 'black_player').get(game_id=live.game_id)
+        if game.status != 'ongoing':
+            return  # Already ended by an earlier attempt; ratings must not change twice
+        
+        # Bring the row up to the final position; moves still in the log will not overwrite it
+        for field, value in game_row_fields(live.state()).items():
+            setattr(game, field, value)
         game.status = status
         game.result = result
-        game.winner = winner
+        game.winner = {'white': game.white_player, 'black': game.black_player}.get(winner_color)
         game.termination = termination
         game.ended_at = timezone.now()
         
@@ -645,167 +731,6 @@ class GameConsumer(AsyncWebsocketConsumer):
         return white_change, black_change
 
 
-class GameClockManager:
-    """Redis-based clock manager"""
-    _instances = {}
-    
-    @classmethod
-    def get_or_create(cls, game_id, redis_client):
-        if game_id not in cls._instances:
-            cls._instances[game_id] = cls(game_id, redis_client)
-        return cls._instances[game_id]
-    
-    def __init__(self, game_id, redis_client):
-        self.game_id = game_id
-        self.redis = redis_client
-        self.task = None
-        self.last_tick = None
-        self.subscribers = set()
-    
-    async def subscribe(self, channel_name):
-        self.subscribers.add(channel_name)
-        if not self.task or self.task.done():
-            self.task = asyncio.create_task(self._tick_loop())
-    
-    async def unsubscribe(self, channel_name):
-        self.subscribers.discard(channel_name)
-        if not self.subscribers and self.task:
-            self.task.cancel()
-    
-    async def _tick_loop(self):
-        from channels.layers import get_channel_layer
-        from .models import Game
-        
-        channel_layer = get_channel_layer()
-        self.last_tick = datetime.now()
-        
-        try:
-            while self.subscribers:
-                await asyncio.sleep(1)
-                
-                try:
-                    game = await self._get_game()
-                except:
-                    break
-                
-                if game.status != 'ongoing':
-                    break
-                
-                now = datetime.now()
-                elapsed_ms = int((now - self.last_tick).total_seconds() * 1000)
-                self.last_tick = now
-                
-                if game.current_turn == 'white':
-                    game.white_time_left = max(0, game.white_time_left - elapsed_ms)
-                    time_out = game.white_time_left == 0
-                else:
-                    game.black_time_left = max(0, game.black_time_left - elapsed_ms)
-                    time_out = game.black_time_left == 0
-                
-                await self._save_time(game)
-                
-                # Publish clock to Redis
-                clock_event = {
-                    'type': 'clock_sync',
-                    'white_time': game.white_time_left,
-                    'black_time': game.black_time_left,
-                }
-                await self.redis.publish(f"game:{self.game_id}:clock", json.dumps(clock_event))
-                
-                # Also send via channel layer for direct subscribers
-                await channel_layer.group_send(
-                    f'game_{self.game_id}',
-                    {
-                        'type': 'clock_tick',
-                        'white_time': game.white_time_left,
-                        'black_time': game.black_time_left,
-                    }
-                )
-                
-                if time_out:
-                    await self._handle_timeout(game)
-                    break
-                    
-        except asyncio.CancelledError:
-            pass
-    
-    @database_sync_to_async
-    def _get_game(self):
-        from .models import Game
-        return Game.objects.get(game_id=self.game_id)
-    
-    @database_sync_to_async
-    def _save_time(self, game):
-        game.save(update_fields=['white_time_left', 'black_time_left'])
-    
-    async def _handle_timeout(self, game):
-        """Handle timeout"""
-        if game.white_time_left == 0:
-            winner = game.black_player
-            winner_color = 'black'
-            result = '0-1'
-        else:
-            winner = game.white_player
-            winner_color = 'white'
-            result = '1-0'
-        
-        await self._end_game_on_timeout(game.game_id, result, winner)
-        
-        # Publish timeout event to Redis
-        timeout_event = {
-            'type': 'game_ended',
-            'status': 'completed',
-            'winner': winner_color,
-            'termination': 'timeout',
-            'result': result,
-            'message': f'{winner.username} won on time'
-        }
-        await self.redis.publish(f"game:{self.game_id}:events", json.dumps(timeout_event))
-    
-    @database_sync_to_async
-    def _end_game_on_timeout(self, game_id, result, winner):
-        from .models import Game
-        
-        game = Game.objects.get(game_id=game_id)
-        game.status = 'completed'
-        game.result = result
-        game.winner = winner
-        game.termination = 'timeout'
-        game.ended_at = timezone.now()
-        
-        K = 32
-        expected_white = 1 / (1 + 10 ** ((game.black_rating_before - game.white_rating_before) / 400))
-        expected_black = 1 - expected_white
-        
-        if result == '1-0':
-            actual_white, actual_black = 1, 0
-        else:
-            actual_white, actual_black = 0, 1
-        
-        white_change = round(K * (actual_white - expected_white))
-        black_change = round(K * (actual_black - expected_black))
-        
-        game.white_rating_after = game.white_rating_before + white_change
-        game.black_rating_after = game.black_rating_before + black_change
-        
-        game.white_player.rating = game.white_rating_after
-        game.black_player.rating = game.black_rating_after
-        
-        if result == '1-0':
-            game.white_player.games_won += 1
-            game.black_player.games_lost += 1
-        else:
-            game.black_player.games_won += 1
-            game.white_player.games_lost += 1
-        
-        game.white_player.games_played += 1
-        game.black_player.games_played += 1
-        
-        game.white_player.save()
-        game.black_player.save()
-        game.save()
-
-
 class MatchmakingConsumer(AsyncWebsocketConsumer):
     """
     WebSocket consumer for matchmaking
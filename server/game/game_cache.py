@@ -0,0 +1,152 @@
+"""
+Per-process cache of live game state.
+
+GameConsumer keeps each ongoing game's engine, clocks and move count here
+instead of loading the Game row and rebuilding the engine from its FEN on
+every move. Each entry carries a version: a Redis counter bumped after
+every committed change (move, game end). A process whose cached version
+differs from Redis reloads the game from the database, so moves made
+through another daphne worker are picked up.
+
+Moves reach the database some time after they are made (see
+write_behind.py), so a game is loaded from its Game row overlaid with its
+live state hash in Redis whenever that hash is ahead of the row.
+"""
+
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .chess_engine import ChessEngine
+
+
+def version_key(game_id):
+    return f"game:{game_id}:version"
+
+
+def state_key(game_id):
+    return f"game:{game_id}:state"
+
+
+class LiveGame:
+    """State of an ongoing game needed to validate and apply moves"""
+    
+    def __init__(self, game, version, state=None):
+        self.game_id = game.game_id
+        self.white_player_id = game.white_player_id
+        self.black_player_id = game.black_player_id
+        self.increment = game.increment  # seconds
+        self.version = version
+        
+        state = state or {}
+        if int(state.get('move_count', -1)) >= game.move_count:
+            # Moves logged in Redis and not yet written to the row
+            self.engine = ChessEngine(state['current_fen'])
+            self.move_count = int(state['move_count'])
+            self.white_time_left = int(state['white_time_left'])
+            self.black_time_left = int(state['black_time_left'])
+            self.turn_started_at = float(state['turn_started_at'])
+        else:
+            self.engine = ChessEngine(game.current_fen)
+            self.move_count = game.move_count
+            self.white_time_left = game.white_time_left  # milliseconds, as of turn_started_at
+            self.black_time_left = game.black_time_left
+            # Epoch seconds when the side to move's clock started (game start before the first move)
+            started = game.turn_started_at or game.started_at or game.created_at
+            self.turn_started_at = started.timestamp()
+        # An ending written to the row is final; otherwise Redis may know of a newer one
+        self.status = game.status if game.status != 'ongoing' else state.get('status', game.status)
+    
+    @property
+    def current_turn(self):
+        return self.engine.turn
+    
+    def clock(self, now=None):
+        """Remaining (white, black) milliseconds at now, counting down the side to move"""
+        elapsed = int(((now or time.time()) - self.turn_started_at) * 1000)
+        if self.current_turn == 'white':
+            return max(0, self.white_time_left - elapsed), self.black_time_left
+        return self.white_time_left, max(0, self.black_time_left - elapsed)
+    
+    def flag_deadline(self):
+        """Epoch seconds when the side to move runs out of time"""
+        time_left = self.white_time_left if self.current_turn == 'white' else self.black_time_left
+        return self.turn_started_at + time_left / 1000
+    
+    def state(self):
+        """Game row fields of the live state (turn_started_at in epoch seconds)"""
+        return {
+            'current_fen': self.engine.to_fen(),
+            'move_count': self.move_count,
+            'current_turn': self.current_turn,
+            'white_time_left': self.white_time_left,
+            'black_time_left': self.black_time_left,
+            'turn_started_at': self.turn_started_at,
+            'status': self.status,
+        }
+    
+    def player_color(self, user_id):
+        """'white', 'black', or None for spectators"""
+        if user_id == self.white_player_id:
+            return 'white'
+        if user_id == self.black_player_id:
+            return 'black'
+        return None
+
+
+class GameStateCache:
+    """Live games by game_id, least recently used evicted first"""
+    
+    def __init__(self, max_games=None):
+        self.max_games = max_games or getattr(settings, 'GAME_CACHE_MAX_GAMES', 5000)
+        self.games = OrderedDict()
+        
+        # Statistics
+        self.hits = 0
+        self.loads = 0
+    
+    async def get(self, game_id, redis, load_game):
+        """
+        Live game for game_id. load_game is an async callable returning the
+        Game row (or None); it only runs on a miss or a stale version, and
+        the row is overlaid with the game's live state hash.
+        Without Redis there is no way to see other processes' writes, so
+        the game is loaded every time.
+        """
+        version = 0
+        if redis:
+            version = int(await redis.get(version_key(game_id)) or 0)
+            live = self.games.get(game_id)
+            if live is not None and live.version == version:
+                self.games.move_to_end(game_id)
+                self.hits += 1
+                return live
+        
+        game = await load_game()
+        if game is None:
+            self.games.pop(game_id, None)
+            return None
+        
+        state = await redis.hgetall(state_key(game_id)) if redis else None
+        live = LiveGame(game, version, state)
+        self.loads += 1
+        if redis:
+            self.games[game_id] = live
+            while len(self.games) > self.max_games:
+                self.games.popitem(last=False)
+        return live
+    
+    def invalidate(self, game_id):
+        self.games.pop(game_id, None)
+    
+    def get_stats(self):
+        return {
+            'games_cached': len(self.games),
+            'hits': self.hits,
+            'loads': self.loads,
+        }
+
+
+# Global game state cache instance (one per server process)
+game_state_cache = GameStateCache()
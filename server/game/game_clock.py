@@ -0,0 +1,415 @@
+"""
+Event-driven game clocks.
+
+A game's clocks are stored as the remaining times at the start of the
+current turn plus the turn start timestamp (Game.turn_started_at).
+Remaining time is computed on demand and written only with moves and game
+ends, so nothing polls the database while a player thinks.
+
+Flag falls are fired by one ClockScheduler per process: a heap of
+deadlines and a single asyncio task that sleeps until the earliest one.
+Before ending a game the timeout is re-checked against the live state
+(moves may not have reached the database yet), and the ending is claimed
+in Redis, so a deadline made stale by a move in another process is
+rescheduled instead. Each scheduler also follows the event channels of
+the games it watches: a move made in any process carries the new
+deadline, and a game end cancels the timing.
+
+Across daphne workers, each game's timeouts are driven by one process
+only: the holder of a Redis lease (game:<id>:clock_owner). Every process
+watching a game tries to take the lease; the holder renews it on a
+heartbeat, and when it stops (crash, restart) another watcher takes over
+once the lease expires.
+"""
+
+import asyncio
+import heapq
+import os
+import socket
+import time
+import uuid
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .event_bus import events_channel, game_event_bus
+from .game_cache import game_state_cache
+from .game_subscriptions import game_subscriptions
+from .write_behind import game_row_fields, move_write_behind
+
+
+# Renew the leases still held by this process; returns the indexes (1-based) of those renewed
+RENEW_SCRIPT = """
+local renewed = {}
+for i, key in ipairs(KEYS) do
+    if redis.call('GET', key) == ARGV[1] then
+        redis.call('PEXPIRE', key, ARGV[2])
+        renewed[#renewed + 1] = i
+    end
+end
+return renewed
+"""
+
+# Give up a lease if this process holds it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def lease_key(game_id):
+    return f"game:{game_id}:clock_owner"
+
+
+class ClockScheduler:
+    """Fires flag falls of watched games exactly when due, for the games whose lease this process holds"""
+    
+    def __init__(self, lease_seconds=None):
+        self.lease_ms = int((lease_seconds or getattr(settings, 'GAME_CLOCK_LEASE_SECONDS', 10)) * 1000)
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.heap = []  # (deadline, game_id), stale entries skipped lazily
+        self.deadlines = {}  # game_id -> scheduled deadline (epoch seconds), owned games only
+        self.watched = {}  # game_id -> latest known deadline of every ongoing game seen here
+        self.owned = set()  # games whose clock lease this process holds
+        self.followed = set()  # watched games whose events channel this scheduler is subscribed to
+        self.events = None
+        self.changed = None
+        self.leases_changed = None
+        self.task = None
+        self.lease_task = None
+        self.events_task = None
+        self.pid = None
+        
+        # Statistics
+        self.flags_checked = 0
+        self.timeouts = 0
+        self.leases_taken = 0
+        self.leases_lost = 0
+    
+    def watch(self, live):
+        """Schedule (or cancel) the flag fall of a cached live game"""
+        if live.status == 'ongoing':
+            self.schedule(live.game_id, live.flag_deadline())
+        else:
+            self.cancel(live.game_id)
+    
+    def schedule(self, game_id, deadline):
+        """Record a game's deadline; it is only timed here while this process owns the game"""
+        self._ensure_tasks()
+        if game_id not in self.watched:
+            self.leases_changed.set()  # Try to take the lease now rather than on the next heartbeat
+        self.watched[game_id] = deadline
+        if game_id in self.owned:
+            self._push(game_id, deadline)
+    
+    def cancel(self, game_id):
+        """Stop timing a game (it ended) and hand back its lease"""
+        self.watched.pop(game_id, None)
+        self.deadlines.pop(game_id, None)
+        if game_id in self.owned:
+            self.owned.discard(game_id)
+            asyncio.create_task(self._release(game_id))
+    
+    def check_now(self, game_id):
+        """Check a game's flag at once, whichever process owns it (ending is guarded by the row lock)"""
+        asyncio.create_task(self._check_flag(game_id))
+    
+    def _push(self, game_id, deadline):
+        if self.deadlines.get(game_id) == deadline:
+            return
+        self.deadlines[game_id] = deadline
+        heapq.heappush(self.heap, (deadline, game_id))
+        if self.heap[0] == (deadline, game_id):
+            self.changed.set()  # New earliest deadline: wake the task
+    
+    def _ensure_tasks(self):
+        """Start the scheduler and lease tasks in this process (again after a fork)"""
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.token = f"{socket.gethostname()}:{self.pid}:{uuid.uuid4().hex[:8]}"
+            self.heap = []
+            self.deadlines = {}
+            self.watched = {}
+            self.owned = set()
+            self.followed = set()
+            self.events = game_subscriptions.new_queue()
+            self.task = None
+            self.lease_task = None
+            self.events_task = None
+            self.changed = asyncio.Event()
+            self.leases_changed = asyncio.Event()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+        if self.lease_task is None or self.lease_task.done():
+            self.lease_task = asyncio.create_task(self._lease_loop())
+        if self.events_task is None or self.events_task.done():
+            self.events_task = asyncio.create_task(self._follow_events())
+    
+    async def _lease_loop(self):
+        """Heartbeat: renew held leases and try to take those of watched games"""
+        renew = None
+        while self.watched or self.owned:
+            self.leases_changed.clear()
+            try:
+                redis = await game_subscriptions.connect()
+                if renew is None:
+                    renew = redis.register_script(RENEW_SCRIPT)
+                await self._renew(redis, renew)
+                await self._acquire(redis)
+                await self._sync_followed()
+            except Exception as e:
+                # Without Redis nobody can hold a lease: time the games seen here rather than none.
+                # Ending a game is guarded by the row lock, so a second process timing it is harmless.
+                print(f"Clock lease heartbeat failed, timing watched games locally: {e}")
+                for game_id, deadline in self.watched.items():
+                    self.owned.add(game_id)
+                    self._push(game_id, deadline)
+            
+            try:
+                await asyncio.wait_for(self.leases_changed.wait(), self.lease_ms / 3000)
+            except asyncio.TimeoutError:
+                pass
+        
+        # Nothing left to time: stop following ended games
+        try:
+            await self._sync_followed()
+        except Exception as e:
+            print(f"Clock event unsubscribe failed: {e}")
+    
+    async def _renew(self, redis, renew):
+        owned = list(self.owned)
+        if not owned:
+            return
+        renewed = await renew(keys=[lease_key(game_id) for game_id in owned], args=[self.token, self.lease_ms])
+        renewed = {owned[index - 1] for index in renewed}
+        for game_id in owned:
+            if game_id not in renewed:
+                # Expired and taken by another process (e.g. after a long pause)
+                self.owned.discard(game_id)
+                self.deadlines.pop(game_id, None)
+                self.leases_lost += 1
+    
+    async def _acquire(self, redis):
+        candidates = [game_id for game_id in self.watched if game_id not in self.owned]
+        if not candidates:
+            return
+        async with redis.pipeline(transaction=False) as pipe:
+            for game_id in candidates:
+                pipe.set(lease_key(game_id), self.token, nx=True, px=self.lease_ms)
+            taken = await pipe.execute()
+        for game_id, ok in zip(candidates, taken):
+            if ok and game_id in self.watched:
+                self.owned.add(game_id)
+                self.leases_taken += 1
+                self._push(game_id, self.watched[game_id])
+    
+    async def _sync_followed(self):
+        """Subscribe to the events of newly watched games and unsubscribe from those no longer watched"""
+        new = [game_id for game_id in self.watched if game_id not in self.followed]
+        if new:
+            await game_subscriptions.subscribe([events_channel(game_id) for game_id in new], self.events)
+            self.followed.update(new)
+        gone = [game_id for game_id in self.followed if game_id not in self.watched]
+        if gone:
+            await game_subscriptions.unsubscribe([events_channel(game_id) for game_id in gone], self.events)
+            self.followed.difference_update(gone)
+    
+    async def _follow_events(self):
+        """Move deadlines with the moves and game ends published by any process"""
+        while True:
+            event = await self.events.get()
+            game_id = event.get('game_id')
+            if game_id not in self.watched:
+                continue
+            if event.get('type') == 'move_made':
+                if event.get('deadline') is None:
+                    self.cancel(game_id)  # The move ended the game
+                else:
+                    self.schedule(game_id, event['deadline'])
+            elif event.get('type') == 'game_ended':
+                self.cancel(game_id)
+    
+    async def _release(self, game_id):
+        try:
+            redis = await game_subscriptions.connect()
+            await redis.eval(RELEASE_SCRIPT, 1, lease_key(game_id), self.token)
+        except Exception as e:
+            print(f"Clock lease release failed for game {game_id}: {e}")
+    
+    async def _run(self):
+        while True:
+            # Drop entries replaced by a later schedule or cancelled
+            while self.heap and self.deadlines.get(self.heap[0][1]) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+            
+            self.changed.clear()
+            timeout = max(0.0, self.heap[0][0] - time.time()) if self.heap else None
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout)
+                continue
+            except asyncio.TimeoutError:
+                pass
+            
+            now = time.time()
+            while self.heap and self.heap[0][0] <= now:
+                deadline, game_id = heapq.heappop(self.heap)
+                if self.deadlines.get(game_id) == deadline and game_id in self.owned:
+                    del self.deadlines[game_id]
+                    asyncio.create_task(self._check_flag(game_id))
+    
+    async def _check_flag(self, game_id):
+        self.flags_checked += 1
+        try:
+            try:
+                redis = await game_subscriptions.connect()
+            except Exception:
+                redis = None  # The database alone is authoritative then
+            
+            live = await game_state_cache.get(game_id, redis, lambda: _load_game(game_id))
+            if live is None or live.status != 'ongoing':
+                self.cancel(game_id)
+                return
+            deadline = live.flag_deadline()
+            if deadline > time.time():
+                self.schedule(game_id, deadline)
+                return
+            
+            if redis and not await move_write_behind.end_game(redis, live, 'completed'):
+                # A move or another ending was committed first: check the new state
+                self.schedule(game_id, time.time())
+                return
+            try:
+                outcome = await _end_game_if_flagged(game_id, live.state())
+            except Exception:
+                # Otherwise Redis would keep the game ended while the row stays ongoing
+                if redis:
+                    await move_write_behind.reopen_game(redis, live, 'completed')
+                raise
+        except Exception as e:
+            print(f"Flag check failed for game {game_id}: {e}")
+            game_state_cache.invalidate(game_id)
+            self.schedule(game_id, time.time() + 1)  # Retry shortly
+            return
+        
+        game_state_cache.invalidate(game_id)
+        if outcome is None:
+            self.cancel(game_id)  # Game over already
+            return
+        if isinstance(outcome, float):
+            self.schedule(game_id, outcome)  # A move reset the clock: new deadline
+            return
+        
+        self.timeouts += 1
+        self.cancel(game_id)
+        winner_color, result, winner_name = outcome
+        if not redis:
+            return
+        await game_event_bus.publish(redis, game_id, {
+            'type': 'game_ended',
+            'status': 'completed',
+            'winner': winner_color,
+            'termination': 'timeout',
+            'result': result,
+            'message': f'{winner_name} won on time'
+        })
+    
+    def get_stats(self):
+        return {
+            'games_watched': len(self.watched),
+            'games_owned': len(self.owned),
+            'games_scheduled': len(self.deadlines),
+            'flags_checked': self.flags_checked,
+            'timeouts': self.timeouts,
+            'leases_taken': self.leases_taken,
+            'leases_lost': self.leases_lost,
+        }
+
+
+@database_sync_to_async
+def _load_game(game_id):
+    from .models import Game
+    return Game.objects.filter(game_id=game_id).first()
+
+
+@database_sync_to_async
+def _end_game_if_flagged(game_id, state):
+    """
+    End the game on time, writing the flagged live state (see
+    LiveGame.state) to the row. Returns (winner_color, result,
+    winner_username) when it ended the game, the current deadline if a
+    move was saved since state was read, or None if the game is not ongoing.
+    """
+    from .models import Game
+    
+    with transaction.atomic():
+        game = Game.objects.select_for_update().select_related('white_player', 'black_player').get(game_id=game_id)
+        if game.status != 'ongoing':
+            return None
+        
+        if game.move_count > state['move_count']:
+            # Only possible without Redis, where moves are written directly
+            started = (game.turn_started_at or game.started_at or game.created_at).timestamp()
+            time_left = game.white_time_left if game.current_turn == 'white' else game.black_time_left
+            return started + time_left / 1000
+        
+        for field, value in game_row_fields(state).items():
+            setattr(game, field, value)
+        
+        if game.current_turn == 'white':
+            game.white_time_left = 0
+            winner = game.black_player
+            winner_color = 'black'
+            result = '0-1'
+        else:
+            game.black_time_left = 0
+            winner = game.white_player
+            winner_color = 'white'
+            result = '1-0'
+        
+        game.status = 'completed'
+        game.result = result
+        game.winner = winner
+        game.termination = 'timeout'
+        game.ended_at = timezone.now()
+        
+        K = 32
+        expected_white = 1 / (1 + 10 ** ((game.black_rating_before - game.white_rating_before) / 400))
+        expected_black = 1 - expected_white
+        
+        if result == '1-0':
+            actual_white, actual_black = 1, 0
+        else:
+            actual_white, actual_black = 0, 1
+        
+        white_change = round(K * (actual_white - expected_white))
+        black_change = round(K * (actual_black - expected_black))
+        
+        game.white_rating_after = game.white_rating_before + white_change
+        game.black_rating_after = game.black_rating_before + black_change
+        
+        game.white_player.rating = game.white_rating_after
+        game.black_player.rating = game.black_rating_after
+        
+        if result == '1-0':
+            game.white_player.games_won += 1
+            game.black_player.games_lost += 1
+        else:
+            game.black_player.games_won += 1
+            game.white_player.games_lost += 1
+        
+        game.white_player.games_played += 1
+        game.black_player.games_played += 1
+        
+        game.white_player.save()
+        game.black_player.save()
+        game.save()
+    
+    return winner_color, result, winner.username
+
+
+# Global clock scheduler instance (one per server process)
+clock_scheduler = ClockScheduler()
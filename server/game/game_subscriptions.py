@@ -0,0 +1,141 @@
+"""
+Per-process Redis pub/sub multiplexer for game channels.
+
+Every GameConsumer used to open its own Redis connection, pubsub and
+listener task, so Redis connections grew with sockets. Here one pooled
+client serves all commands of the process and one pubsub subscribes to
+each game channel once, however many local sockets watch it. Incoming
+messages are parsed once and copied into the queue of every local
+consumer subscribed to the channel.
+"""
+
+import asyncio
+import json
+import os
+
+import redis.asyncio as aioredis
+from django.conf import settings
+
+
+class GameSubscriptions:
+    """One Redis client and pubsub per process, reference-counted per channel"""
+    
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or getattr(settings, 'GAME_EVENT_QUEUE_SIZE', 256)
+        self.redis = None
+        self.pubsub = None
+        self.listener_task = None
+        self.pid = None
+        self.lock = None
+        self.channels = {}  # channel -> set of local consumer queues
+        
+        # Statistics
+        self.messages_received = 0
+        self.messages_dropped = 0
+    
+    async def connect(self):
+        """Shared Redis client of this process (connected on first use)"""
+        if self.redis is not None and self.pid == os.getpid():
+            return self.redis
+        
+        # First use, or first use after a fork: nothing inherited is usable
+        self.pid = os.getpid()
+        self.lock = asyncio.Lock()
+        self.channels = {}
+        self.listener_task = None
+        self.redis = aioredis.from_url(
+            f"redis://{getattr(settings, 'REDIS_HOST', 'localhost')}:{getattr(settings, 'REDIS_PORT', 6379)}",
+            encoding="utf-8",
+            decode_responses=True,
+            socket_keepalive=True,
+            max_connections=getattr(settings, 'GAME_REDIS_MAX_CONNECTIONS', 50),
+        )
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            await self.redis.ping()
+        except Exception:
+            self.redis = None
+            self.pubsub = None
+            raise
+        print(f"Redis pub/sub connected (pid {self.pid})")
+        return self.redis
+    
+    def new_queue(self):
+        return asyncio.Queue(maxsize=self.queue_size)
+    
+    async def subscribe(self, channels, queue):
+        """Deliver messages of channels to queue (Redis subscribes on the first local subscriber)"""
+        async with self.lock:
+            new_channels = []
+            for channel in channels:
+                if channel not in self.channels:
+                    self.channels[channel] = set()
+                    new_channels.append(channel)
+                self.channels[channel].add(queue)
+            
+            if new_channels:
+                await self.pubsub.subscribe(*new_channels)
+            
+            # listen() returns once nothing is subscribed, so restart it on demand
+            if self.listener_task is None or self.listener_task.done():
+                self.listener_task = asyncio.create_task(self._listen())
+    
+    async def unsubscribe(self, channels, queue):
+        """Stop delivering to queue (Redis unsubscribes after the last local subscriber)"""
+        async with self.lock:
+            unused = []
+            for channel in channels:
+                queues = self.channels.get(channel)
+                if queues is None:
+                    continue
+                queues.discard(queue)
+                if not queues:
+                    del self.channels[channel]
+                    unused.append(channel)
+            
+            if unused:
+                await self.pubsub.unsubscribe(*unused)
+    
+    async def _listen(self):
+        while self.channels:
+            try:
+                async for message in self.pubsub.listen():
+                    if message['type'] == 'message':
+                        self._dispatch(message)
+                return  # Nothing subscribed any more
+            except asyncio.CancelledError:
+                return
+            except Exception as e:
+                # The pubsub reconnects and resubscribes on its next read
+                print(f"Redis listener error: {e}")
+                await asyncio.sleep(1)
+    
+    def _dispatch(self, message):
+        self.messages_received += 1
+        queues = self.channels.get(message['channel'])
+        if not queues:
+            return
+        try:
+            event = json.loads(message['data'])
+        except json.JSONDecodeError as e:
+            print(f"Failed to parse Redis message: {message['data']} - {e}")
+            return
+        
+        for queue in queues:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A stalled socket must not hold up the others
+                self.messages_dropped += 1
+    
+    def get_stats(self):
+        return {
+            'channels': len(self.channels),
+            'local_subscribers': sum(len(queues) for queues in self.channels.values()),
+            'messages_received': self.messages_received,
+            'messages_dropped': self.messages_dropped,
+        }
+
+
+# Global game subscriptions instance (one Redis connection pool per server process)
+game_subscriptions = GameSubscriptions()
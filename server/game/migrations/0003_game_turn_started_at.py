@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0002_gamechallenge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='turn_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -26,8 +26,9 @@ class Game(models.Model):
     initial_time = models.IntegerField()  # in seconds
     increment = models.IntegerField()  # in seconds
     
-    white_time_left = models.IntegerField()  # in milliseconds
-    black_time_left = models.IntegerField()  # in milliseconds
+    white_time_left = models.IntegerField()  # in milliseconds, as of turn_started_at
+    black_time_left = models.IntegerField()  # in milliseconds, as of turn_started_at
+    turn_started_at = models.DateTimeField(null=True, blank=True)  # when the side to move's clock started
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
     result = models.CharField(max_length=10, choices=RESULT_CHOICES, default='*')
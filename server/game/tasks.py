@@ -197,6 +197,26 @@ def cleanup_stale_queues():
     return cleaned
 
 
+@shared_task
+def replay_move_log():
+    """
+    Persist logged moves a crashed server process left unflushed
+    Run every minute
+    """
+    from .write_behind import replay_stale_entries
+    
+    # Game keys live in the default database, not the matchmaking one
+    game_redis = redis.Redis(
+        host=getattr(settings, 'REDIS_HOST', 'localhost'),
+        port=getattr(settings, 'REDIS_PORT', 6379),
+        decode_responses=True
+    )
+    replayed = replay_stale_entries(game_redis)
+    if replayed:
+        print(f"♻️ Replayed {replayed} logged moves")
+    return replayed
+
+
 # ============================================
 # HELPER FUNCTIONS
 # ============================================
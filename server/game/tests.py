@@ -1,3 +1,376 @@
-from django.test import TestCase
+import asyncio
+import json
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from chess_core import PERFT_POSITIONS
+from .chess_engine import ChessEngine
+from .consumers import GameConsumer
+from .event_bus import GameEventBus
+from .game_cache import LiveGame, game_state_cache, state_key
+from .game_clock import ClockScheduler, lease_key
+from .game_subscriptions import GameSubscriptions
+from .models import Game, Move
+from .write_behind import (
+    FLUSH_GROUP, MOVE_STREAM, MoveWriteBehind, decode_messages, pending_key, persist_entries, replay_stale_entries,
+)
+
+
+def adapter_perft(engine, depth):
+    """Leaf count through the ChessEngine API the consumers use"""
+    if depth == 0:
+        return 1
+    nodes = 0
+    for from_sq, to_sq, promotion in engine.legal_moves():
+        engine.make_move_unsafe(from_sq, to_sq, promotion)
+        nodes += adapter_perft(engine, depth - 1)
+        engine.unmake_move()
+    return nodes
+
+
+def create_game(game_id='g1', move_count=0, fen=None, turn_started_at=None, time_left=60000):
+    white = User.objects.create(email=f'{game_id}-white@example.com', username=f'{game_id}-white')
+    black = User.objects.create(email=f'{game_id}-black@example.com', username=f'{game_id}-black')
+    return Game.objects.create(
+        game_id=game_id, white_player=white, black_player=black,
+        time_control='1+0', initial_time=60, increment=0,
+        white_time_left=time_left, black_time_left=time_left,
+        turn_started_at=turn_started_at or timezone.now(), started_at=timezone.now(),
+        status='ongoing', move_count=move_count,
+        current_fen=fen or 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    )
+
+
+def log_entry(game_id, ply, move_number, color, fen, moved_at):
+    """A logged move as MoveWriteBehind.commit_move appends it to the stream"""
+    move = {
+        'move_number': move_number, 'color': color, 'from_square': 'a2', 'to_square': 'a3',
+        'piece': 'pawn', 'captured_piece': '', 'promotion': '', 'algebraic_notation': 'a3',
+        'fen_after': fen, 'is_check': False, 'is_checkmate': False, 'time_spent': 100, 'time_left': 59900,
+    }
+    game = {
+        'current_fen': fen, 'move_count': ply + 1, 'current_turn': 'black' if color == 'white' else 'white',
+        'white_time_left': 59900, 'black_time_left': 60000, 'turn_started_at': moved_at, 'status': 'ongoing',
+    }
+    return {'game_id': game_id, 'ply': ply, 'move': json.dumps(move), 'game': game}
+
+
+class FakeRedisMixin:
+    """Game Redis calls go to an in-process fakeredis server (Lua scripts included)"""
+    
+    def setUp(self):
+        super().setUp()
+        self.redis_server = fakeredis.FakeServer()
+        self.subscriptions = GameSubscriptions()
+        for patcher in (
+            mock.patch('game.game_subscriptions.aioredis.from_url', lambda *args, **kwargs: self.new_client()),
+            mock.patch('game.game_clock.game_subscriptions', self.subscriptions),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def new_client(self):
+        return fakeredis.aioredis.FakeRedis(server=self.redis_server, decode_responses=True)
+    
+    async def stop(self, *schedulers):
+        """Stop the background tasks started during the test (they must not outlive its event loop)"""
+        tasks = [self.subscriptions.listener_task]
+        for scheduler in schedulers:
+            tasks += [scheduler.task, scheduler.lease_task, scheduler.events_task]
+        for task in tasks:
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+
+class ChessEngineTests(SimpleTestCase):
+    """The consumers' ChessEngine API on top of the shared chess_core generator"""
+    
+    def test_perft_through_the_adapter(self):
+        for name, fen, counts in PERFT_POSITIONS:
+            depth = 3 if counts[2] <= 10000 else 2
+            self.assertEqual(adapter_perft(ChessEngine(fen), depth), counts[depth - 1], name)
+    
+    def test_validates_fresh_and_cached_positions_alike(self):
+        # The e2 knight is pinned to the king by the e8 rook
+        fen = '4r1k1/8/8/8/8/8/4N3/4K3 w - - 0 1'
+        for warm in (False, True):
+            engine = ChessEngine(fen)
+            if warm:
+                engine.legal_move_values()
+            self.assertFalse(engine.is_valid_move('e2', 'c3'))
+            self.assertTrue(engine.is_valid_move('e1', 'd1'))
+            self.assertFalse(engine.is_valid_move('e8', 'e2'))  # Not the side to move
+    
+    def test_make_move_results(self):
+        engine = ChessEngine()
+        for from_sq, to_sq in (('f2', 'f3'), ('e7', 'e5'), ('g2', 'g4')):
+            engine.make_move(from_sq, to_sq)
+        result = engine.make_move('d8', 'h4')
+        self.assertEqual((result['notation'], result['status'], result['winner']), ('Qh4', 'checkmate', 'black'))
+        self.assertTrue(result['is_checkmate'])
+        
+        engine = ChessEngine('r3k2r/1P6/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1')
+        self.assertEqual(engine.make_move('e5', 'd6')['captured'], 'pawn')
+        engine.unmake_move()
+        self.assertEqual(engine.make_move('e1', 'g1')['notation'], 'O-O')
+        engine.unmake_move()
+        self.assertEqual(engine.make_move('b7', 'a8', 'knight')['notation'], 'bxa8=N')
+        self.assertEqual(engine.to_fen(), 'N3k2r/8/8/3pP3/8/8/8/R3K2R b KQk - 0 1')
+
+
+class ClockSchedulerTests(FakeRedisMixin, SimpleTestCase):
+    """Deadlines, firing and the per-game clock lease"""
+    
+    def recording_scheduler(self, lease_seconds=1):
+        scheduler = ClockScheduler(lease_seconds=lease_seconds)
+        scheduler.fired = []
+        
+        async def check_flag(game_id):
+            scheduler.fired.append((game_id, time.time()))
+        scheduler._check_flag = check_flag
+        return scheduler
+    
+    async def test_fires_at_the_latest_deadline(self):
+        scheduler = self.recording_scheduler()
+        try:
+            deadline = time.time() + 0.2
+            scheduler.schedule('g1', time.time() + 30)
+            scheduler.schedule('g1', deadline)
+            await asyncio.sleep(0.1)
+            self.assertEqual(scheduler.fired, [])
+            await asyncio.sleep(0.25)
+            self.assertEqual([game_id for game_id, _ in scheduler.fired], ['g1'])
+            self.assertGreaterEqual(scheduler.fired[0][1], deadline)
+            
+            # A deadline moved later replaces the earlier one
+            scheduler.schedule('g2', time.time() + 0.1)
+            await asyncio.sleep(0.05)
+            scheduler.schedule('g2', time.time() + 30)
+            await asyncio.sleep(0.2)
+            self.assertEqual([game_id for game_id, _ in scheduler.fired], ['g1'])
+        finally:
+            await self.stop(scheduler)
+    
+    async def test_one_owner_renews_the_lease_and_another_takes_over_when_it_lapses(self):
+        first = self.recording_scheduler(lease_seconds=0.3)
+        second = self.recording_scheduler(lease_seconds=0.3)
+        redis = await self.subscriptions.connect()
+        try:
+            first.schedule('g1', time.time() + 30)
+            await asyncio.sleep(0.05)
+            second.schedule('g1', time.time() + 30)
+            await asyncio.sleep(0.5)  # Longer than the lease: renewed by its holder
+            self.assertEqual((first.owned, second.owned), ({'g1'}, set()))
+            self.assertEqual(await redis.get(lease_key('g1')), first.token)
+            
+            # The holder dies without releasing: the lease expires and the watcher takes it
+            await self.stop(first)
+            await asyncio.sleep(0.5)
+            self.assertEqual(second.owned, {'g1'})
+            self.assertEqual(await redis.get(lease_key('g1')), second.token)
+            self.assertIn('g1', second.deadlines)
+        finally:
+            await self.stop(first, second)
+    
+    async def test_cancel_hands_the_lease_over(self):
+        first = self.recording_scheduler(lease_seconds=5)
+        second = self.recording_scheduler(lease_seconds=0.3)
+        try:
+            first.schedule('g1', time.time() + 30)
+            await asyncio.sleep(0.05)
+            second.schedule('g1', time.time() + 30)
+            await asyncio.sleep(0.05)
+            first.cancel('g1')
+            await asyncio.sleep(0.2)
+            self.assertEqual((first.owned, second.owned), (set(), {'g1'}))
+        finally:
+            await self.stop(first, second)
+    
+    async def test_follows_moves_made_in_other_processes(self):
+        scheduler = self.recording_scheduler()
+        redis = await self.subscriptions.connect()
+        try:
+            scheduler.schedule('g1', time.time() + 30)
+            await asyncio.sleep(0.05)
+            self.assertEqual(scheduler.owned, {'g1'})
+            
+            deadline = time.time() + 0.15
+            await GameEventBus().publish(redis, 'g1', {'type': 'move_made', 'deadline': deadline})
+            await asyncio.sleep(0.3)
+            self.assertEqual([game_id for game_id, _ in scheduler.fired], ['g1'])
+            
+            scheduler.schedule('g1', time.time() + 30)
+            await GameEventBus().publish(redis, 'g1', {'type': 'game_ended'})
+            await asyncio.sleep(0.05)
+            self.assertEqual((scheduler.watched, scheduler.owned), ({}, set()))
+            self.assertIsNone(await redis.get(lease_key('g1')))
+        finally:
+            await self.stop(scheduler)
+
+
+class ClockFlagTests(FakeRedisMixin, TestCase):
+    """Ending games on time against the live state and the database"""
+    
+    def tearDown(self):
+        game_state_cache.invalidate('g1')
+        super().tearDown()
+    
+    async def test_flag_fall_ends_the_game(self):
+        await sync_to_async(create_game)(turn_started_at=timezone.now() - timedelta(seconds=61))
+        scheduler = ClockScheduler(lease_seconds=1)
+        redis = await self.subscriptions.connect()
+        try:
+            await scheduler._check_flag('g1')
+            game = await sync_to_async(Game.objects.get)(game_id='g1')
+            self.assertEqual((game.status, game.result, game.termination), ('completed', '0-1', 'timeout'))
+            self.assertEqual(await redis.hget(state_key('g1'), 'status'), 'completed')
+            self.assertEqual(scheduler.timeouts, 1)
+        finally:
+            await self.stop(scheduler)
+    
+    async def test_failed_database_write_reopens_the_game(self):
+        await sync_to_async(create_game)(turn_started_at=timezone.now() - timedelta(seconds=61))
+        scheduler = ClockScheduler(lease_seconds=1)
+        redis = await self.subscriptions.connect()
+        try:
+            with mock.patch('game.game_clock._end_game_if_flagged', side_effect=RuntimeError('database down')):
+                await scheduler._check_flag('g1')
+            self.assertEqual(await redis.hget(state_key('g1'), 'status'), 'ongoing')
+            self.assertIn('g1', scheduler.watched)  # Checked again shortly
+            game = await sync_to_async(Game.objects.get)(game_id='g1')
+            self.assertEqual(game.status, 'ongoing')
+        finally:
+            await self.stop(scheduler)
+
+
+class WriteBehindTests(TestCase):
+    """Moves logged in Redis reach the database once, in order"""
+    
+    FEN_1 = 'rnbqkbnr/pppppppp/8/8/8/P7/1PPPPPPP/RNBQKBNR b KQkq - 0 1'
+    FEN_2 = 'rnbqkbnr/1ppppppp/p7/8/8/P7/1PPPPPPP/RNBQKBNR w KQkq - 0 2'
+    
+    def setUp(self):
+        create_game()
+        now = time.time()
+        self.entries = [
+            ('1-0', log_entry('g1', 0, 1, 'white', self.FEN_1, now)),
+            ('2-0', log_entry('g1', 1, 1, 'black', self.FEN_2, now + 1)),
+        ]
+    
+    def test_duplicate_flush_writes_moves_once(self):
+        persist_entries(self.entries)
+        persist_entries(self.entries)
+        self.assertEqual(Move.objects.filter(game_id='g1').count(), 2)
+        game = Game.objects.get(game_id='g1')
+        self.assertEqual((game.move_count, game.current_fen, game.current_turn), (2, self.FEN_2, 'white'))
+    
+    def test_replayed_older_entry_does_not_move_the_game_back(self):
+        persist_entries(self.entries)
+        persist_entries(self.entries[:1])
+        game = Game.objects.get(game_id='g1')
+        self.assertEqual((game.move_count, game.current_fen), (2, self.FEN_2))
+    
+    @override_settings(GAME_MOVE_LOG_CLAIM_IDLE=0)
+    def test_replays_entries_a_dead_flusher_left_unacknowledged(self):
+        redis = fakeredis.FakeRedis(decode_responses=True)
+        redis.xgroup_create(MOVE_STREAM, FLUSH_GROUP, id='0', mkstream=True)
+        for _, entry in self.entries:
+            redis.xadd(MOVE_STREAM, {'entry': json.dumps(entry)})
+            redis.zadd(pending_key('g1'), {entry['move']: entry['ply']})
+        redis.xreadgroup(FLUSH_GROUP, 'dead-process', {MOVE_STREAM: '>'})
+        
+        self.assertEqual(replay_stale_entries(redis), 2)
+        self.assertEqual(Move.objects.filter(game_id='g1').count(), 2)
+        self.assertEqual(redis.xlen(MOVE_STREAM), 0)
+        self.assertEqual(redis.zcard(pending_key('g1')), 0)
+        self.assertEqual(replay_stale_entries(redis), 0)
+    
+    async def test_commit_conflicts_then_flush(self):
+        redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        writer = MoveWriteBehind()
+        writer.start = lambda: None  # Flushed by hand below
+        await redis.xgroup_create(MOVE_STREAM, FLUSH_GROUP, id='0', mkstream=True)
+        
+        game = await sync_to_async(Game.objects.get)(game_id='g1')
+        live = LiveGame(game, 0)
+        entry = self.entries[0][1]
+        move = json.loads(entry['move'])
+        self.assertEqual(await writer.commit_move(redis, live, move, entry['game']), 1)
+        # A second move made on the same (now stale) state is refused
+        self.assertEqual(await writer.commit_move(redis, live, move, entry['game']), 0)
+        self.assertEqual(await writer.pending_moves(redis, 'g1'), [move])
+        self.assertEqual(await writer.end_game(redis, live, 'completed'), 0)
+        
+        response = await redis.xreadgroup(FLUSH_GROUP, 'flusher', {MOVE_STREAM: '>'})
+        await writer._flush(redis, decode_messages(response[0][1]))
+        self.assertEqual(await sync_to_async(Move.objects.filter(game_id='g1').count)(), 1)
+        self.assertEqual(await writer.pending_moves(redis, 'g1'), [])
+        self.assertEqual(await redis.xlen(MOVE_STREAM), 0)
+        self.assertEqual(writer.moves_flushed, 1)
+
+
+class EventBusTests(SimpleTestCase):
+    """Sequenced delivery: duplicates dropped, gaps resynced"""
+    
+    async def test_publish_numbers_events_per_game(self):
+        redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        bus = GameEventBus()
+        pubsub = redis.pubsub()
+        await pubsub.subscribe('game:g1:events')
+        self.assertEqual((await pubsub.get_message(timeout=1))['type'], 'subscribe')
+        
+        self.assertEqual(await bus.publish(redis, 'g1', {'type': 'chat_message'}), 1)
+        self.assertEqual(await bus.publish(redis, 'g1', {'type': 'draw_offer'}), 2)
+        self.assertEqual(await bus.publish(redis, 'g2', {'type': 'draw_offer'}), 1)
+        self.assertEqual(await bus.current_seq(redis, 'g1'), 2)
+        
+        message = await pubsub.get_message(timeout=1)
+        self.assertEqual(json.loads(message['data']), {'seq': 1, 'type': 'chat_message', 'game_id': 'g1'})
+        await pubsub.aclose()
+    
+    async def test_consumer_drops_duplicates_and_resyncs_on_gaps(self):
+        consumer = GameConsumer()
+        consumer.game_id = 'g1'
+        consumer.last_seq = 0
+        consumer.snapshot_seq = 0
+        snapshots = [6, 8]  # Sequence numbers when each snapshot is taken
+        sent = []
+        
+        async def send(text_data):
+            sent.append(json.loads(text_data))
+        
+        async def join_game():
+            sent.append({'type': 'game_state'})
+            consumer.snapshot_seq = snapshots.pop(0)
+        consumer.send = send
+        consumer.join_game = join_game
+        
+        for event in (
+            {'seq': 1, 'type': 'move_made'},
+            {'seq': 1, 'type': 'move_made'},  # Duplicate
+            {'seq': 2, 'type': 'chat_message'},
+            {'seq': 4, 'type': 'move_made'},  # Gap: covered by the snapshot
+            {'seq': 5, 'type': 'move_made'},  # Queued behind it, already in the snapshot
+            {'seq': 6, 'type': 'chat_message'},  # Queued behind it, not in the snapshot
+            {'seq': 8, 'type': 'draw_offer'},  # Gap: delivered after the snapshot
+            {'seq': 9, 'type': 'chat_message'},
+        ):
+            await consumer._handle_redis_event(event)
+        
+        self.assertEqual(
+            [(event['type'], event.get('seq')) for event in sent],
+            [('move_made', 1), ('chat_message', 2), ('game_state', None), ('chat_message', 6),
+             ('game_state', None), ('draw_offer', 8), ('chat_message', 9)],
+        )
+        self.assertEqual(consumer.last_seq, 9)
@@ -0,0 +1,311 @@
+"""
+Write-behind persistence of moves.
+
+A move is committed to Redis instead of the database before it is
+broadcast. One Lua script checks the game's live state hash for a
+conflicting move or game end, updates it, and appends the move to the
+game:moves stream. The stream is the durable log. A flusher task in each
+server process reads it as a consumer group and writes the Move rows
+(bulk_create) and the latest Game row state in batches every
+GAME_MOVE_FLUSH_INTERVAL seconds.
+
+Until a move is flushed, Redis is the source of truth for its game. The
+game:<id>:state hash holds the position, clocks and status, and
+game:<id>:pending holds the logged moves by ply. Live state loads and move
+lists read both. Entries left unacknowledged by a crashed process are
+claimed and replayed by the other flushers once idle for
+GAME_MOVE_LOG_CLAIM_IDLE seconds, and by the replay_move_log beat task.
+Replays are harmless: the unique (game, move_number, color) constraint
+drops duplicate Move rows, and Game rows only move forward by move_count.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+from .game_cache import state_key, version_key
+
+
+MOVE_STREAM = 'game:moves'
+FLUSH_GROUP = 'move-writers'
+
+# Commit a move unless the game moved or ended since live was loaded; returns the new cache version (0 on conflict)
+COMMIT_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if status and status ~= 'ongoing' then return 0 end
+local count = redis.call('HGET', KEYS[1], 'move_count')
+if count and tonumber(count) ~= tonumber(ARGV[1]) then return 0 end
+redis.call('HSET', KEYS[1], unpack(ARGV, 5))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+redis.call('ZADD', KEYS[4], ARGV[1], ARGV[2])
+redis.call('EXPIRE', KEYS[4], ARGV[4])
+redis.call('XADD', KEYS[2], '*', 'entry', ARGV[3])
+return redis.call('INCR', KEYS[3])
+"""
+
+# Mark the game ended unless it moved or ended since live was loaded; returns the new cache version (0 on conflict)
+END_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if status and status ~= 'ongoing' then return 0 end
+local count = redis.call('HGET', KEYS[1], 'move_count')
+if count and tonumber(count) ~= tonumber(ARGV[1]) then return 0 end
+redis.call('HSET', KEYS[1], 'status', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return redis.call('INCR', KEYS[2])
+"""
+
+# Take back an END_SCRIPT ending whose database write failed; returns the new cache version (0 if not ended so)
+REOPEN_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'status') ~= ARGV[1] then return 0 end
+redis.call('HSET', KEYS[1], 'status', 'ongoing')
+return redis.call('INCR', KEYS[2])
+"""
+
+
+def pending_key(game_id):
+    return f"game:{game_id}:pending"
+
+
+def game_row_fields(fields):
+    """Game model field values from logged state (epoch seconds become datetimes)"""
+    row = dict(fields)
+    for name in ('turn_started_at', 'ended_at'):
+        if row.get(name) is not None:
+            row[name] = datetime.fromtimestamp(row[name], tz=dt_timezone.utc)
+    return row
+
+
+def persist_entries(entries):
+    """Write logged moves and the latest state of their games in one transaction"""
+    from .models import Game, Move
+    
+    moves = []
+    games = {}
+    for _, entry in entries:
+        moves.append(Move(game_id=entry['game_id'], **json.loads(entry['move'])))
+        latest = games.get(entry['game_id'])
+        if latest is None or entry['game']['move_count'] > latest['move_count']:
+            games[entry['game_id']] = entry['game']
+    
+    with transaction.atomic():
+        # Replayed entries that were already flushed hit the unique constraint and are skipped
+        Move.objects.bulk_create(moves, ignore_conflicts=True)
+        for game_id, fields in games.items():
+            Game.objects.filter(
+                game_id=game_id, move_count__lt=fields['move_count']
+            ).update(**game_row_fields(fields))
+
+
+def queue_acks(pipe, entries):
+    """Queue removal of flushed entries from the log on a Redis pipeline"""
+    for stream_id, entry in entries:
+        pipe.xack(MOVE_STREAM, FLUSH_GROUP, stream_id)
+        pipe.xdel(MOVE_STREAM, stream_id)
+        pipe.zrem(pending_key(entry['game_id']), entry['move'])
+
+
+def decode_messages(messages):
+    # Claimed entries deleted meanwhile come back without fields
+    return [(stream_id, json.loads(fields['entry'])) for stream_id, fields in messages if fields]
+
+
+def replay_stale_entries(redis, consumer='replay'):
+    """Persist entries left unacknowledged by dead flushers (synchronous client); returns how many"""
+    claim_idle_ms = int(getattr(settings, 'GAME_MOVE_LOG_CLAIM_IDLE', 30) * 1000)
+    try:
+        redis.xgroup_create(MOVE_STREAM, FLUSH_GROUP, id='0', mkstream=True)
+    except Exception as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+    
+    replayed = 0
+    start = '0-0'
+    while True:
+        next_id, messages = redis.xautoclaim(
+            MOVE_STREAM, FLUSH_GROUP, consumer, claim_idle_ms, start_id=start, count=500
+        )[:2]
+        entries = decode_messages(messages)
+        if entries:
+            persist_entries(entries)
+            pipe = redis.pipeline(transaction=False)
+            queue_acks(pipe, entries)
+            pipe.execute()
+            replayed += len(entries)
+        if next_id == '0-0':
+            return replayed
+        start = next_id
+
+
+class MoveWriteBehind:
+    """Commits moves to the Redis log and flushes the log to the database in batches"""
+    
+    def __init__(self):
+        self.flush_interval = getattr(settings, 'GAME_MOVE_FLUSH_INTERVAL', 0.25)
+        self.batch_size = getattr(settings, 'GAME_MOVE_FLUSH_BATCH', 500)
+        self.claim_idle = getattr(settings, 'GAME_MOVE_LOG_CLAIM_IDLE', 30)
+        self.state_ttl = getattr(settings, 'GAME_LIVE_STATE_TTL', 86400)
+        self.commit_script = None
+        self.end_script = None
+        self.reopen_script = None
+        self.script_client = None
+        self.task = None
+        self.pid = None
+        self.consumer = None
+        
+        # Statistics
+        self.moves_committed = 0
+        self.moves_flushed = 0
+        self.moves_replayed = 0
+        self.batches = 0
+        self.flush_errors = 0
+        self.flush_lag_ms = 0  # Age of the oldest entry in the last batch when it was written
+        self.max_flush_lag_ms = 0
+    
+    def _scripts(self, redis):
+        if self.script_client is not redis:
+            self.commit_script = redis.register_script(COMMIT_SCRIPT)
+            self.end_script = redis.register_script(END_SCRIPT)
+            self.reopen_script = redis.register_script(REOPEN_SCRIPT)
+            self.script_client = redis
+    
+    async def commit_move(self, redis, live, move, game):
+        """
+        Log a move made on live (Move fields and new Game fields, epoch
+        seconds for times). Returns the new cache version, or 0 if another
+        move or a game end was committed first.
+        """
+        self._scripts(redis)
+        self.start()
+        move_json = json.dumps(move)
+        entry = json.dumps({'game_id': live.game_id, 'ply': live.move_count, 'move': move_json, 'game': game})
+        state = [item for field, value in game.items() if field != 'ended_at' for item in (field, value)]
+        
+        version = await self.commit_script(
+            keys=[state_key(live.game_id), MOVE_STREAM, version_key(live.game_id), pending_key(live.game_id)],
+            args=[live.move_count, move_json, entry, self.state_ttl] + state,
+        )
+        if version:
+            self.moves_committed += 1
+        return version
+    
+    async def end_game(self, redis, live, status):
+        """Mark the game ended in its live state; returns the new cache version, or 0 if it moved or ended first"""
+        self._scripts(redis)
+        return await self.end_script(
+            keys=[state_key(live.game_id), version_key(live.game_id)],
+            args=[live.move_count, status, self.state_ttl],
+        )
+    
+    async def reopen_game(self, redis, live, status):
+        """Undo end_game when the ending could not be written to the database, so it can be retried"""
+        self._scripts(redis)
+        return await self.reopen_script(
+            keys=[state_key(live.game_id), version_key(live.game_id)],
+            args=[status],
+        )
+    
+    async def pending_moves(self, redis, game_id):
+        """Logged moves of the game not flushed yet, in ply order (Move field dicts)"""
+        return [json.loads(move) for move in await redis.zrange(pending_key(game_id), 0, -1)]
+    
+    def start(self):
+        """Start the flusher task in this process (again after a fork)"""
+        if self.pid == os.getpid() and self.task and not self.task.done():
+            return
+        self.pid = os.getpid()
+        self.consumer = f"{socket.gethostname()}:{self.pid}"
+        self.task = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        from .game_subscriptions import game_subscriptions
+        
+        last_claim = 0
+        backlog = True  # Read this consumer's unacknowledged entries first (left by a failed flush)
+        group_ready = False
+        while True:
+            started = time.time()
+            try:
+                redis = await game_subscriptions.connect()
+                if not group_ready:
+                    try:
+                        await redis.xgroup_create(MOVE_STREAM, FLUSH_GROUP, id='0', mkstream=True)
+                    except Exception as e:
+                        if 'BUSYGROUP' not in str(e):
+                            raise
+                    group_ready = True
+                
+                if started - last_claim >= self.claim_idle:
+                    last_claim = started
+                    await self._claim(redis)
+                
+                stream_id = '0' if backlog else '>'
+                response = await redis.xreadgroup(
+                    FLUSH_GROUP, self.consumer, {MOVE_STREAM: stream_id},
+                    count=self.batch_size, block=None if backlog else int(self.flush_interval * 1000),
+                )
+                messages = response[0][1] if response else []
+                backlog = backlog and len(messages) == self.batch_size
+                if messages:
+                    await self._flush(redis, decode_messages(messages))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.flush_errors += 1
+                backlog = True
+                print(f"Move log flush failed: {e}")
+            
+            # Let moves accumulate into the next batch
+            await asyncio.sleep(max(0.0, self.flush_interval - (time.time() - started)))
+    
+    async def _claim(self, redis):
+        """Take over entries of flushers that died before acknowledging them"""
+        start = '0-0'
+        while True:
+            next_id, messages = (await redis.xautoclaim(
+                MOVE_STREAM, FLUSH_GROUP, self.consumer, int(self.claim_idle * 1000),
+                start_id=start, count=self.batch_size,
+            ))[:2]
+            entries = decode_messages(messages)
+            if entries:
+                self.moves_replayed += len(entries)
+                await self._flush(redis, entries)
+            if next_id == '0-0':
+                return
+            start = next_id
+    
+    async def _flush(self, redis, entries):
+        if not entries:
+            return
+        await database_sync_to_async(persist_entries)(entries)
+        
+        # Stream ids start with the append time in milliseconds
+        self.flush_lag_ms = int(time.time() * 1000) - int(entries[0][0].split('-')[0])
+        self.max_flush_lag_ms = max(self.max_flush_lag_ms, self.flush_lag_ms)
+        self.moves_flushed += len(entries)
+        self.batches += 1
+        
+        pipe = redis.pipeline(transaction=False)
+        queue_acks(pipe, entries)
+        await pipe.execute()
+    
+    def get_stats(self):
+        return {
+            'moves_committed': self.moves_committed,
+            'moves_flushed': self.moves_flushed,
+            'moves_replayed': self.moves_replayed,
+            'batches': self.batches,
+            'flush_errors': self.flush_errors,
+            'flush_lag_ms': self.flush_lag_ms,
+            'max_flush_lag_ms': self.max_flush_lag_ms,
+        }
+
+
+# Global move write-behind instance (one flusher per server process)
+move_write_behind = MoveWriteBehind()